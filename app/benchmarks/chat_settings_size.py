@@ -0,0 +1,137 @@
+"""
+Compare the full and compact Redis encodings of `RDChatSettingsModel`.
+
+Prints payload bytes per chat and encode/decode timings for a few synthetic chats, or for a
+sample of the entries cached in Redis when `--redis-url` is given.
+
+Usage (environment from `.env` is required):
+
+    python -m benchmarks.chat_settings_size --redis-url redis://localhost:6379/0 --sample 5000
+"""
+
+import argparse
+import asyncio
+import time
+from collections.abc import Callable
+from statistics import mean
+from typing import Any
+
+import msgspec
+from redis.asyncio import Redis
+
+from bot.storages.psql import RDChatSettingsModel
+from bot.storages.psql.chat.chat_settings_model import GreetingFarewellType, ReportPolicy
+
+
+def synthetic_chats() -> dict[str, RDChatSettingsModel]:
+    default = RDChatSettingsModel(
+        id=-1001234567890,
+        language_code="uk",
+        kus_enabled=True,
+        allow_kus_admin=True,
+        admin_tools_enabled=True,
+        reports_enabled=True,
+        greeting_enabled=True,
+        greeting_type=GreetingFarewellType.PHOTO,
+        farewell_enabled=True,
+        farewell_type=GreetingFarewellType.PHOTO,
+    )
+    return {
+        "default": default,
+        "language": msgspec.structs.replace(default, language_code="en", timezone="Europe/Kyiv"),
+        "customized": msgspec.structs.replace(
+            default,
+            language_code="en",
+            timezone="Europe/Kyiv",
+            reports_policy=ReportPolicy.SPECIAL_CHAT,
+            reports_special_chat_id=-1009876543210,
+            greeting_type=GreetingFarewellType.TEXT,
+            greeting_text="Welcome to the chat! Please read the pinned message first.",
+            greeting_topic_id=42,
+            farewell_enabled=False,
+        ),
+    }
+
+
+async def sample_redis(redis_url: str, sample: int) -> list[RDChatSettingsModel]:
+    redis = Redis.from_url(redis_url)
+    chats: list[RDChatSettingsModel] = []
+
+    try:
+        async for key in redis.scan_iter(match=RDChatSettingsModel.key("*"), count=500):
+            data = await redis.get(key)
+            if data and (chat_settings := RDChatSettingsModel.decode(data)):
+                chats.append(chat_settings)
+
+            if len(chats) >= sample:
+                break
+    finally:
+        await redis.aclose()
+
+    return chats
+
+
+def microseconds_per_op(func: Callable[[], Any], iterations: int) -> float:
+    started_at = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started_at) / iterations * 1_000_000
+
+
+def encoded(chat_settings: RDChatSettingsModel, *, compact: bool) -> bytes:
+    RDChatSettingsModel.compact = compact
+    try:
+        return chat_settings.encode()
+    finally:
+        RDChatSettingsModel.compact = False
+
+
+def report(name: str, chats: list[RDChatSettingsModel], iterations: int) -> str:
+    full = [encoded(chat_settings, compact=False) for chat_settings in chats]
+    compact = [encoded(chat_settings, compact=True) for chat_settings in chats]
+
+    full_bytes = mean(map(len, full))
+    compact_bytes = mean(map(len, compact))
+
+    chat_settings = chats[0]
+    encode_full = microseconds_per_op(lambda: encoded(chat_settings, compact=False), iterations)
+    encode_compact = microseconds_per_op(lambda: encoded(chat_settings, compact=True), iterations)
+    decode_full = microseconds_per_op(lambda: RDChatSettingsModel.decode(full[0]), iterations)
+    decode_compact = microseconds_per_op(
+        lambda: RDChatSettingsModel.decode(compact[0]), iterations
+    )
+
+    return (
+        f"{name:<12} {len(chats):>6} chats  "
+        f"full {full_bytes:>6.1f} B  compact {compact_bytes:>6.1f} B  "
+        f"saved {1 - compact_bytes / full_bytes:>6.1%} "
+        f"({(full_bytes - compact_bytes) * 100_000 / 2**20:.1f} MiB per 100k chats)  "
+        f"encode {encode_full:.2f}/{encode_compact:.2f} us  "
+        f"decode {decode_full:.2f}/{decode_compact:.2f} us"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    if args.redis_url:
+        chats = await sample_redis(args.redis_url, args.sample)
+        if not chats:
+            print("No cached chat settings found")  # noqa: T201
+            return
+
+        print(report("redis", chats, args.iterations))  # noqa: T201
+        return
+
+    for name, chat_settings in synthetic_chats().items():
+        print(report(name, [chat_settings], args.iterations))  # noqa: T201
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--redis-url", default=None, help="Sample the entries cached in Redis")
+    parser.add_argument("--sample", type=int, default=1000, help="Entries to sample from Redis")
+    parser.add_argument("--iterations", type=int, default=50_000, help="Timing iterations")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
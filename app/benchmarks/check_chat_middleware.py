@@ -0,0 +1,398 @@
+"""
+Benchmark for the `CheckChatMiddleware` hot path.
+
+Drives a `Dispatcher` with synthetic message, callback_query and chat_member updates and reports
+updates/sec and p50/p99 latency for cold-cache, warm-cache and mixed workloads, plus the raw
+`RDChatModel`/`RDChatSettingsModel` encode/decode throughput.
+
+By default Redis and Postgres are replaced with in-memory fakes with configurable latency. Pass
+`--redis-url` and/or `--psql` to run against real services (e.g. the ones from docker-compose).
+
+Usage (the `PSQL_*` and `REDIS_*` environment from `.env` is required, `--psql` also needs
+`DEVELOPER_ID` and `BOT_TOKEN`; `make bench` takes care of it):
+
+    python -m benchmarks.check_chat_middleware --updates 20000 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+from itertools import count
+from typing import Any, Self
+
+import msgspec
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import (
+    CallbackQuery,
+    Chat,
+    ChatMemberMember,
+    ChatMemberUpdated,
+    Message,
+    Update,
+    User,
+)
+from redis.asyncio import Redis
+from redis.typing import ExpiryT
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.middlewares.check_chat_middleware import ChatContextMiddleware, CheckChatMiddleware
+from bot.settings import Settings
+from bot.storages.memory.chat_cache import ChatCache
+from bot.storages.psql import (
+    RDChatContext,
+    RDChatModel,
+    RDChatSettingsModel,
+    close_db,
+    create_db_session_pool,
+    init_db,
+)
+from bot.storages.psql.chat.chat_settings_model import GreetingFarewellType
+from bot.utils.metrics import Histogram, Metrics
+
+BENCH_USER = User(id=1, is_bot=False, first_name="Bench", language_code="en")
+
+
+class MemoryRedis:
+    """In-memory stand-in for the subset of `redis.asyncio.Redis` used by the hot path."""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self._data: dict[str, tuple[bytes, float]] = {}
+
+    async def _round_trip(self) -> None:
+        await asyncio.sleep(self.latency)
+
+    def _get(self, key: str) -> bytes | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+
+        return value
+
+    def _setex(self, key: str, ttl: ExpiryT, value: bytes) -> bool:
+        if isinstance(ttl, timedelta):
+            ttl = ttl.total_seconds()
+        self._data[key] = (value, time.monotonic() + ttl)
+        return True
+
+    async def get(self, key: str) -> bytes | None:
+        await self._round_trip()
+        return self._get(key)
+
+    async def mget(self, keys: str | list[str], *args: str) -> list[bytes | None]:
+        await self._round_trip()
+        keys = [keys] if isinstance(keys, str) else list(keys)
+        return [self._get(key) for key in [*keys, *args]]
+
+    async def setex(self, key: str, ttl: ExpiryT, value: bytes) -> bool:
+        await self._round_trip()
+        return self._setex(key, ttl, value)
+
+    async def publish(self, _: str, __: Any) -> int:
+        await self._round_trip()
+        return 0
+
+    async def flushall(self) -> bool:
+        self._data.clear()
+        return True
+
+    def pipeline(self, transaction: bool = True) -> "MemoryPipeline":  # noqa: ARG002
+        return MemoryPipeline(self)
+
+
+class MemoryPipeline:
+    def __init__(self, redis: MemoryRedis) -> None:
+        self.redis = redis
+        self._commands: list[Callable[[], Any]] = []
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        self._commands.clear()
+
+    def setex(self, key: str, ttl: ExpiryT, value: bytes) -> Self:
+        self._commands.append(lambda: self.redis._setex(key, ttl, value))  # noqa: SLF001
+        return self
+
+    def publish(self, _: str, __: Any) -> Self:
+        self._commands.append(lambda: 0)
+        return self
+
+    async def execute(self) -> list[Any]:
+        await self.redis._round_trip()  # noqa: SLF001
+        results = [command() for command in self._commands]
+        self._commands.clear()
+        return results
+
+
+def build_chat_context(chat: Chat, user: User) -> RDChatContext:
+    return RDChatContext(
+        chat_model=RDChatModel(
+            id=chat.id,
+            chat_type=chat.type,
+            username=chat.username,
+            registration_datetime=datetime.utcnow(),
+        ),
+        chat_settings=RDChatSettingsModel(
+            id=chat.id,
+            language_code=user.language_code or "ru",
+            kus_enabled=True,
+            allow_kus_admin=True,
+            admin_tools_enabled=True,
+            reports_enabled=True,
+            greeting_enabled=True,
+            greeting_type=GreetingFarewellType.PHOTO,
+            farewell_enabled=True,
+            farewell_type=GreetingFarewellType.PHOTO,
+        ),
+    )
+
+
+class FakeDBCheckChatMiddleware(CheckChatMiddleware):
+    """Replaces the Postgres upsert with a synthetic row built after `db_latency` seconds."""
+
+    def __init__(self, *args: Any, db_latency: float = 0.0, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.db_latency = db_latency
+
+    async def _upsert_chat_model(
+        self,
+        db_session: async_sessionmaker[AsyncSession],  # noqa: ARG002
+        redis: Redis,
+        chat: Chat,
+        user: User,
+        update_type: str,
+    ) -> RDChatContext:
+        with self.metrics.timer("db_upsert_seconds", update_type):
+            await asyncio.sleep(self.db_latency)
+            chat_context = build_chat_context(chat, user)
+
+        with self.metrics.timer("redis_save_seconds", update_type):
+            return await chat_context.save(redis, timedelta(minutes=random.randint(45, 75)))
+
+
+class BenchmarkResult(msgspec.Struct, kw_only=True):
+    workload: str
+    updates: int
+    seconds: float
+    p50: float
+    p99: float
+
+    @property
+    def updates_per_second(self) -> float:
+        return self.updates / self.seconds
+
+    def __str__(self) -> str:
+        return (
+            f"{self.workload:<10} {self.updates:>8} updates  "
+            f"{self.updates_per_second:>10.0f} upd/s  "
+            f"p50 {self.p50 * 1000:>8.3f} ms  p99 {self.p99 * 1000:>8.3f} ms"
+        )
+
+
+def build_router() -> Router:
+    router = Router(name="benchmark_router")
+
+    async def consume(_: Any, chat_settings: RDChatSettingsModel) -> None:  # noqa: ARG001
+        pass
+
+    router.message.register(consume)
+    router.callback_query.register(consume)
+    router.chat_member.register(consume)
+    return router
+
+
+def build_update(update_id: int, chat_id: int) -> Update:
+    chat = Chat(id=chat_id, type="supergroup")
+    now = datetime.now(tz=timezone.utc)
+    message = Message(message_id=update_id, date=now, chat=chat, from_user=BENCH_USER, text="hi")
+
+    match update_id % 3:
+        case 0:
+            return Update(update_id=update_id, message=message)
+        case 1:
+            return Update(
+                update_id=update_id,
+                callback_query=CallbackQuery(
+                    id=str(update_id),
+                    from_user=BENCH_USER,
+                    chat_instance=str(chat_id),
+                    message=message,
+                    data="bench",
+                ),
+            )
+        case _:
+            member = ChatMemberMember(user=BENCH_USER)
+            return Update(
+                update_id=update_id,
+                chat_member=ChatMemberUpdated(
+                    chat=chat,
+                    from_user=BENCH_USER,
+                    date=now,
+                    old_chat_member=member,
+                    new_chat_member=member,
+                ),
+            )
+
+
+async def run_workload(
+    name: str,
+    dispatcher: Dispatcher,
+    bot: Bot,
+    chat_ids: Callable[[int], int],
+    updates: int,
+    concurrency: int,
+) -> BenchmarkResult:
+    histogram = Histogram()
+    update_ids = count()
+
+    async def worker() -> None:
+        while (update_id := next(update_ids)) < updates:
+            update = build_update(update_id, chat_ids(update_id))
+            started_at = time.perf_counter()
+            await dispatcher.feed_update(bot, update)
+            histogram.observe(time.perf_counter() - started_at)
+            # Warm updates never suspend, let the other feeders run like with real polling
+            await asyncio.sleep(0)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    seconds = time.perf_counter() - started_at
+
+    return BenchmarkResult(
+        workload=name,
+        updates=updates,
+        seconds=seconds,
+        p50=histogram.quantile(0.5),
+        p99=histogram.quantile(0.99),
+    )
+
+
+def run_codec(iterations: int) -> list[str]:
+    chat_context = build_chat_context(Chat(id=-1, type="supergroup"), BENCH_USER)
+    encoder = msgspec.msgpack.Encoder()
+    chat_model_data = encoder.encode(chat_context.chat_model)
+    chat_settings_data = chat_context.chat_settings.encode()
+
+    cases: dict[str, Callable[[], Any]] = {
+        "RDChatModel encode": lambda: encoder.encode(chat_context.chat_model),
+        "RDChatSettingsModel encode": lambda: chat_context.chat_settings.encode(),
+        "RDChatContext decode": lambda: RDChatContext.decode(chat_model_data, chat_settings_data),
+    }
+
+    lines = []
+    for name, case in cases.items():
+        started_at = time.perf_counter()
+        for _ in range(iterations):
+            case()
+        seconds = time.perf_counter() - started_at
+        lines.append(
+            f"{name:<28} {iterations / seconds:>12.0f} ops/s  "
+            f"{seconds / iterations * 1_000_000:>8.3f} us/op",
+        )
+    return lines
+
+
+async def main(args: argparse.Namespace) -> None:
+    redis = Redis.from_url(args.redis_url) if args.redis_url else MemoryRedis(args.redis_latency)
+
+    engine = None
+    db_session = None
+    metrics = Metrics()
+    chat_cache = ChatCache(maxsize=args.chats * 2)
+
+    if args.psql:
+        # Only the Postgres run needs the bot settings, and through them DEVELOPER_ID and BOT_TOKEN
+        engine, db_session = await create_db_session_pool(Settings())
+        await init_db(engine)
+        middleware = CheckChatMiddleware(chat_cache, metrics=metrics)
+    else:
+        middleware = FakeDBCheckChatMiddleware(
+            chat_cache,
+            metrics=metrics,
+            db_latency=args.db_latency,
+        )
+
+    dispatcher = Dispatcher(db_session=db_session, redis=redis)
+    dispatcher.include_router(build_router())
+    dispatcher.update.outer_middleware(middleware)
+    chat_context_middleware = ChatContextMiddleware()
+    for observer in (dispatcher.message, dispatcher.callback_query, dispatcher.chat_member):
+        observer.middleware(chat_context_middleware)
+
+    bot = Bot("42:BENCHMARK")
+    # Benchmark chats use a dedicated negative id range to stay away from real ones
+    base_chat_id = -(10**12)
+    cold_chat_ids = count(base_chat_id, -1)
+
+    workloads: list[tuple[str, Callable[[int], int]]] = [
+        ("warm", lambda update_id: base_chat_id - update_id % args.chats),
+        ("cold", lambda _: next(cold_chat_ids)),
+        (
+            "mixed",
+            lambda update_id: (
+                next(cold_chat_ids)
+                if random.random() < args.cold_ratio
+                else base_chat_id - update_id % args.chats
+            ),
+        ),
+    ]
+
+    try:
+        # Pre-populate the chats used by the warm workload
+        await run_workload(
+            "prepare",
+            dispatcher,
+            bot,
+            lambda update_id: base_chat_id - update_id % args.chats,
+            args.chats,
+            args.concurrency,
+        )
+        cold_chat_ids = count(base_chat_id - args.chats, -1)
+
+        for name, chat_ids in workloads:
+            metrics.reset()
+
+            result = await run_workload(
+                name, dispatcher, bot, chat_ids, args.updates, args.concurrency
+            )
+            print(result)  # noqa: T201
+
+            if args.verbose:
+                print(msgspec.json.format(msgspec.json.encode(metrics.snapshot())).decode())  # noqa: T201
+
+    finally:
+        await bot.session.close()
+        if engine is not None:
+            await close_db(engine)
+
+    for line in run_codec(args.codec_iterations):
+        print(line)  # noqa: T201
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--updates", type=int, default=10_000, help="Updates per workload")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent feeders")
+    parser.add_argument("--chats", type=int, default=500, help="Chats in the warm set")
+    parser.add_argument("--cold-ratio", type=float, default=0.1, help="Cold share in mixed")
+    parser.add_argument("--redis-url", default=None, help="Use a real Redis instead of a fake")
+    parser.add_argument("--redis-latency", type=float, default=0.0002, help="Fake Redis RTT")
+    parser.add_argument("--psql", action="store_true", help="Use Postgres from the settings")
+    parser.add_argument("--db-latency", type=float, default=0.002, help="Fake upsert latency")
+    parser.add_argument("--codec-iterations", type=int, default=100_000)
+    parser.add_argument("--verbose", action="store_true", help="Print metrics per workload")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
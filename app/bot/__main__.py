@@ -2,6 +2,7 @@ import asyncio
 import contextlib
 import logging
 from asyncio import CancelledError
+from datetime import timedelta
 from functools import partial
 
 from aiogram import Bot, Dispatcher
@@ -15,10 +16,26 @@ from aiogram.utils.deep_linking import create_start_link
 from redis.asyncio import Redis
 
 from bot import handlers, scenes
-from bot.middlewares.check_chat_middleware import CheckChatMiddleware
+from bot.middlewares.check_chat_middleware import ChatContextMiddleware, CheckChatMiddleware
 from bot.settings import Settings
-from bot.storages.psql import close_db, create_db_session_pool, init_db
+from bot.storages.memory.chat_cache import ChatCache
+from bot.storages.memory.sliding_expiration import SlidingExpiration
+from bot.storages.psql import (
+    ChatSettingsOutbox,
+    ChatSettingsRepository,
+    RDChatModel,
+    RDChatSettingsModel,
+    ReadSessionRouter,
+    close_db,
+    create_db_session_pool,
+    init_db,
+)
+from bot.storages.psql.chat import warm_up_chat_contexts
+from bot.storages.psql.utils.engine_metrics import EngineMetrics
+from bot.storages.psql.utils.pool import reap_idle_connections
 from bot.storages.redis.bot.reaction_media import RDBotReactionMedia
+from bot.storages.redis.utils.tracking import TrackedCache
+from bot.utils.metrics import Metrics
 
 logging.basicConfig(level=logging.INFO)
 
@@ -30,19 +47,68 @@ async def startup(dispatcher: Dispatcher, bot: Bot, settings: Settings, redis: R
     await bot.delete_webhook(drop_pending_updates=True)
 
     engine, db_session = await create_db_session_pool(settings)
+    db_metrics = EngineMetrics(engine, profile=settings.psql.profile)
 
     await init_db(engine)
 
+    engines = [engine]
+    db_replica_session = None
+    if settings.psql.replica_host:
+        replica_engine, db_replica_session = await create_db_session_pool(settings, replica=True)
+        engines.append(replica_engine)
+        dispatcher.workflow_data.update(
+            db_replica_metrics=EngineMetrics(replica_engine, profile=settings.psql.profile),
+        )
+
+    db_read_session = ReadSessionRouter(
+        db_session,
+        db_replica_session,
+        read_your_writes_window=settings.psql.read_your_writes_window,
+    )
+
+    if settings.psql.pool_idle_timeout is not None:
+        dispatcher.workflow_data.update(
+            db_pool_reaper_task=asyncio.create_task(
+                reap_idle_connections(*engines, interval=settings.psql.pool_reap_interval),
+            ),
+        )
+
+    chat_settings_outbox = ChatSettingsOutbox(
+        db_session,
+        redis,
+        batch_size=settings.cache.outbox_batch_size,
+        poll_interval=settings.cache.outbox_poll_interval,
+    )
     dispatcher.workflow_data.update(
         {
             "db_session": db_session,
-            "db_session_closer": partial(close_db, engine),
+            "db_read_session": db_read_session,
+            "db_metrics": db_metrics,
+            "db_session_closer": partial(close_db, *engines),
+            "chat_settings_repository": ChatSettingsRepository(
+                db_session, chat_settings_outbox, db_read_session
+            ),
+            "chat_settings_outbox_task": asyncio.create_task(chat_settings_outbox.run()),
         }
     )
 
     # Delete all keys from redis
     # await redis.flushall()
 
+    if settings.cache.warm_up_limit > 0:
+        warmed = await warm_up_chat_contexts(
+            db_read_session,
+            redis,
+            limit=settings.cache.warm_up_limit,
+            window=(
+                timedelta(days=settings.cache.warm_up_window_days)
+                if settings.cache.warm_up_window_days is not None
+                else None
+            ),
+            batch_size=settings.cache.warm_up_batch_size,
+        )
+        logger.info("Chat cache warmed up with %d chats", warmed)
+
     bot_reaction_media = await RDBotReactionMedia.get(redis)
 
     if bot_reaction_media is None:
@@ -63,13 +129,63 @@ async def startup(dispatcher: Dispatcher, bot: Bot, settings: Settings, redis: R
 
     dispatcher.workflow_data.update(bot_reaction_media=bot_reaction_media)
 
-    dispatcher.update.outer_middleware(CheckChatMiddleware())
+    RDChatSettingsModel.stale_ttl = timedelta(seconds=settings.cache.chat_stale_ttl)
+    RDChatSettingsModel.compact = settings.cache.chat_settings_compact
+
+    if settings.cache.redis_tracking:
+        tracked_cache = TrackedCache(
+            prefixes=(RDChatModel.key(""), RDChatSettingsModel.key("")),
+            maxsize=settings.cache.redis_tracking_maxsize,
+        )
+        RDChatModel.local_cache = RDChatSettingsModel.local_cache = tracked_cache
+        dispatcher.workflow_data.update(
+            tracked_cache_listener=asyncio.create_task(tracked_cache.listen(redis)),
+        )
+
+    chat_cache = ChatCache(maxsize=settings.cache.chat_maxsize, ttl=settings.cache.chat_ttl)
+    dispatcher.workflow_data.update(
+        chat_cache=chat_cache,
+        chat_cache_listener=asyncio.create_task(chat_cache.listen(redis)),
+    )
+
+    sliding_expiration = None
+    if settings.cache.chat_touch_interval > 0:
+        sliding_expiration = SlidingExpiration(interval=settings.cache.chat_touch_interval)
+        dispatcher.workflow_data.update(
+            sliding_expiration_task=asyncio.create_task(sliding_expiration.run(redis)),
+        )
+
+    chat_context_metrics = Metrics()
+    dispatcher.workflow_data.update(chat_context_metrics=chat_context_metrics)
+
+    dispatcher.update.outer_middleware(
+        CheckChatMiddleware(
+            chat_cache,
+            lock_timeout=settings.cache.chat_lock_timeout,
+            metrics=chat_context_metrics,
+            sliding_expiration=sliding_expiration,
+            read_session_router=db_read_session,
+        ),
+    )
+    chat_context_middleware = ChatContextMiddleware()
+    for observer in (
+        dispatcher.message,
+        dispatcher.callback_query,
+        dispatcher.my_chat_member,
+        dispatcher.chat_member,
+    ):
+        observer.middleware(chat_context_middleware)
     # dispatcher.update.outer_middleware(CheckUserMiddleware())
 
     logger.info("Bot started")
 
 
 async def shutdown(dispatcher: Dispatcher, **__) -> None:
+    dispatcher["chat_cache_listener"].cancel()
+    dispatcher["chat_settings_outbox_task"].cancel()
+    for task_name in ("tracked_cache_listener", "sliding_expiration_task", "db_pool_reaper_task"):
+        if task := dispatcher.workflow_data.get(task_name):
+            task.cancel()
     await dispatcher["db_session_closer"]()
     logger.info("Bot stopped")
 
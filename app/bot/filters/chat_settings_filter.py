@@ -1,11 +1,12 @@
 from types import NoneType
+from typing import Any
 
 import msgspec
 from aiogram.enums import ChatType
 from aiogram.filters import Filter
 from aiogram.types import Chat, TelegramObject
 
-from bot.storages.psql.chat import RDChatSettingsModel
+from bot.middlewares.check_chat_middleware import CHAT_CONTEXT_FLAG, LazyChatContext
 
 
 class ChatSettings(msgspec.Struct, frozen=True, kw_only=True):
@@ -24,11 +25,14 @@ class ChatSettingsFilter(Filter):
 
         self.settings = settings
 
+    def update_handler_flags(self, flags: dict[str, Any]) -> None:
+        flags[CHAT_CONTEXT_FLAG] = True
+
     async def __call__(
         self,
         event: TelegramObject,  # noqa: ARG002
         event_chat: Chat,
-        chat_settings: RDChatSettingsModel,
+        chat_context: LazyChatContext | None = None,
     ) -> bool:
         match event_chat.type:
             case ChatType.PRIVATE:
@@ -36,9 +40,11 @@ class ChatSettingsFilter(Filter):
             case ChatType.CHANNEL:
                 return False
 
-        if self.settings is None:
+        if self.settings is None or chat_context is None:
             return True
 
+        _, chat_settings = await chat_context
+
         fields = {
             field: value
             for field, value in msgspec.structs.asdict(self.settings).items()
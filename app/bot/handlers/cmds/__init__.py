@@ -1,7 +1,13 @@
 from aiogram import Router
 
-from . import prepare, set_reports_special_chat, start
+from . import memory, pool, prepare, set_reports_special_chat, start
 
 router = Router(name="cmds_router")
 
-router.include_routers(start.router, prepare.router, set_reports_special_chat.router)
+router.include_routers(
+    start.router,
+    prepare.router,
+    set_reports_special_chat.router,
+    memory.router,
+    pool.router,
+)
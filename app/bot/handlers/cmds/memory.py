@@ -0,0 +1,50 @@
+from aiogram import F, Router
+from aiogram.filters import Command, CommandObject, MagicData
+from aiogram.types import Message
+from aiogram.utils.text_decorations import html_decoration
+from redis.asyncio import Redis
+
+from bot.settings import Settings
+from bot.storages.redis.utils.memory import MemoryReport, memory_report
+
+router = Router(name="memory_router")
+
+
+def format_report(report: MemoryReport) -> str:
+    lines = [
+        f"used {report.used_memory / 2**20:.1f} MiB, "
+        f"maxmemory {report.maxmemory / 2**20:.0f} MiB, {report.keys} keys"
+    ]
+
+    for usage in report.prefixes:
+        share = usage.share(report.maxmemory)
+        budget = f" / {usage.budget:.0%}" if usage.budget is not None else ""
+        warning = "⚠️ " if usage.over_budget(report.maxmemory) else ""
+        ttl = ", ".join(f"{bucket}: {count}" for bucket, count in sorted(usage.ttl.items()))
+
+        lines.extend(
+            (
+                "",
+                f"{warning}{usage.prefix}: {usage.keys} keys, "
+                f"~{usage.estimated_bytes / 2**20:.2f} MiB"
+                + (f" ({share:.1%}{budget})" if share is not None else ""),
+                f"avg {usage.average_bytes:.0f} B, ttl {ttl}",
+            ),
+        )
+
+    return "\n".join(lines)
+
+
+@router.message(Command("memory"), MagicData(F.event_from_user.id == F.developer_id))
+async def memory_cmd(
+    msg: Message,
+    command: CommandObject,
+    redis: Redis,
+    settings: Settings,
+) -> None:
+    report = await memory_report(
+        redis,
+        budgets=settings.cache.memory_budgets,
+        prefix=command.args.strip() if command.args else None,
+    )
+    await msg.answer(html_decoration.pre(html_decoration.quote(format_report(report))))
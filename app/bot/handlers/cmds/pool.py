@@ -0,0 +1,93 @@
+from aiogram import F, Router
+from aiogram.filters import Command, CommandObject, MagicData
+from aiogram.types import Message
+from aiogram.utils.text_decorations import html_decoration
+from redis.asyncio import Redis
+
+from bot.storages.psql.utils.engine_metrics import EngineMetrics, EngineStats
+from bot.storages.redis.utils.pool import InstrumentedConnectionPool, PoolStats
+
+router = Router(name="pool_router")
+
+
+def format_stats(stats: PoolStats) -> str:
+    lines = [
+        f"in use {stats.in_use}/{stats.max_connections} (peak {stats.peak_in_use}), "
+        f"idle {stats.idle}, waiting {stats.waiting}, errors {stats.errors}",
+    ]
+
+    for command_name, checkout in sorted(
+        stats.checkout.items(), key=lambda item: item[1].count, reverse=True
+    ):
+        lines.append(
+            f"{command_name}: {checkout.count} checkouts, "
+            f"p50 {checkout.p50 * 1000:g} ms, p90 {checkout.p90 * 1000:g} ms, "
+            f"p99 {checkout.p99 * 1000:g} ms"
+        )
+
+    return "\n".join(lines)
+
+
+def _hit_ratio(counters: dict[str, int]) -> str:
+    hits = counters.get("hit", 0)
+    lookups = hits + counters.get("miss", 0)
+    return f"{hits / lookups:.1%} of {lookups}" if lookups else "n/a"
+
+
+def format_engine_stats(stats: EngineStats) -> str:
+    pool_hits = stats.checkouts - stats.connects
+    lines = [
+        f"profile {stats.profile}, in use {stats.checked_out}/{stats.pool_size} "
+        f"(+{stats.overflow}/{stats.max_overflow} overflow, peak {stats.peak_checked_out}), "
+        f"idle {stats.idle}, waiting {stats.waiting}",
+        f"checkouts {stats.checkouts}, reused {pool_hits}, new connections {stats.connects}, "
+        f"timeouts {stats.checkout_timeouts}",
+        f"stale pings {stats.pings}, discarded {stats.discarded}, idle reaped {stats.reaped}",
+    ]
+
+    if stats.checkout is not None:
+        lines.append(
+            f"checkout wait p50 {stats.checkout.p50 * 1000:g} ms, "
+            f"p90 {stats.checkout.p90 * 1000:g} ms, p99 {stats.checkout.p99 * 1000:g} ms"
+        )
+
+    lines.append(f"compiled cache hits {_hit_ratio(stats.compiled_cache)}")
+
+    if disabled := stats.prepared_statements.get("disabled", 0):
+        lines.append(f"prepared statement cache disabled, {disabled} statements prepared")
+    else:
+        lines.append(f"prepared statement cache hits {_hit_ratio(stats.prepared_statements)}")
+
+    return "\n".join(lines)
+
+
+@router.message(Command("pool"), MagicData(F.event_from_user.id == F.developer_id))
+async def pool_cmd(
+    msg: Message,
+    command: CommandObject,
+    redis: Redis,
+    db_metrics: EngineMetrics,
+    db_replica_metrics: EngineMetrics | None = None,
+) -> None:
+    pool = redis.connection_pool
+    redis_stats = (
+        format_stats(pool.stats())
+        if isinstance(pool, InstrumentedConnectionPool)
+        else "Redis connection pool is not instrumented"
+    )
+
+    sections = [
+        f"Redis\n{redis_stats}",
+        f"Postgres\n{format_engine_stats(db_metrics.stats())}",
+    ]
+    if db_replica_metrics is not None:
+        sections.append(f"Postgres replica\n{format_engine_stats(db_replica_metrics.stats())}")
+
+    await msg.answer(html_decoration.pre(html_decoration.quote("\n\n".join(sections))))
+
+    if command.args == "reset":
+        if isinstance(pool, InstrumentedConnectionPool):
+            pool.reset_stats()
+        db_metrics.reset_stats()
+        if db_replica_metrics is not None:
+            db_replica_metrics.reset_stats()
@@ -2,12 +2,9 @@ from aiogram import Bot, F, Router
 from aiogram.filters import Command, CommandObject, MagicData
 from aiogram.types import Message
 from redis.asyncio import Redis
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from bot.scenes.chat_settings.stages.admin_settings.reports_policy.keyboards import back_keyboard
-from bot.storages.psql import DBChatSettingsModel
-from bot.storages.psql.chat.chat_settings_model import RDChatSettingsModel, ReportPolicy
+from bot.storages.psql import ChatSettingsRepository
 from bot.storages.redis.reports_special_chat.set_reports_special_chat_pending_model import (
     RDSetReportsSpecialChatPending,
 )
@@ -25,8 +22,8 @@ async def set_reports_special_chat(
     msg: Message,
     bot: Bot,
     command: CommandObject,
-    db_session: async_sessionmaker[AsyncSession],
     redis: Redis,
+    chat_settings_repository: ChatSettingsRepository,
 ) -> None:
     if command.args and ":" in command.args:
         public_hash_arg, secret_hash_arg = command.args.split(":")
@@ -67,14 +64,7 @@ async def set_reports_special_chat(
         user_id=msg.from_user.id,
     )
 
-    async with db_session() as session:
-        stmt = select(DBChatSettingsModel).where(DBChatSettingsModel.id == pending.origin_chat_id)
-        chat_settings = await session.scalar(stmt)
-        chat_settings.reports_special_chat_id = msg.chat.id
-        chat_settings.reports_policy = ReportPolicy.SPECIAL_CHAT.value
-        await session.commit()
-
-        await RDChatSettingsModel.from_orm(chat_settings).save(redis)
+    await chat_settings_repository.set_reports_special_chat(pending.origin_chat_id, msg.chat.id)
 
     await msg.answer(
         "✅ Chat for reports has been saved:\n"
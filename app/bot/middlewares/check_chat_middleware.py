@@ -1,78 +1,302 @@
+import asyncio
+import contextlib
+import logging
 import random
-from collections.abc import Awaitable, Callable
+from collections.abc import Awaitable, Callable, Generator
 from datetime import timedelta
-from typing import Any
+from functools import partial
+from typing import Any, Final
 
 from aiogram import BaseMiddleware
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.dispatcher.flags import get_flag
 from aiogram.enums import ChatType
+from aiogram.fsm.scene import SceneHandlerWrapper
 from aiogram.types import Chat, TelegramObject, Update, User
 from redis.asyncio.client import Redis
-from sqlalchemy.dialects.postgresql import insert
+from redis.exceptions import LockError
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from bot.storages.psql.chat.chat_model import DBChatModel, RDChatModel
-from bot.storages.psql.chat.chat_settings_model import DBChatSettingsModel, RDChatSettingsModel
+from bot.storages.memory.chat_cache import ChatCache
+from bot.storages.memory.sliding_expiration import SlidingExpiration
+from bot.storages.psql.chat.chat_context import RDChatContext
+from bot.storages.psql.chat.chat_model import RDChatModel
+from bot.storages.psql.chat.chat_settings_model import RDChatSettingsModel
+from bot.storages.psql.routing import ReadSessionRouter
+from bot.utils.metrics import Metrics
+from bot.utils.single_flight import SingleFlight
 
+logger = logging.getLogger(__name__)
 
-async def _get_chat_model(
-    db_session: async_sessionmaker[AsyncSession],
-    redis: Redis,
-    chat: Chat,
-    user: User,
-) -> tuple[RDChatModel, RDChatSettingsModel]:
-    chat_model: RDChatModel | None = await RDChatModel.get(redis, chat.id)
-    chat_settings: RDChatSettingsModel | None = await RDChatSettingsModel.get(redis, chat.id)
+LOCK_POLL_INTERVAL: Final[float] = 0.05
+CHAT_CONTEXT_FLAG: Final[str] = "chat_context"
+CHAT_CONTEXT_PARAMS: Final[frozenset[str]] = frozenset({"chat_model", "chat_settings"})
 
-    if chat_model and chat_settings:
-        return chat_model, chat_settings
+# Chat model, its settings, still encoded when read from Redis, and whether the entry is stale
+ChatEntry = tuple[RDChatModel, RDChatSettingsModel | bytes, bool]
+
+
+class LazyChatContext:
+    """
+    Registered chat model, with its settings decoded only when awaited for the first time.
 
-    async with db_session() as session:
-        stmt = (
-            insert(DBChatModel)
-            .values(
-                id=chat.id,
-                chat_type=chat.type,
-                username=chat.username,
+    `CheckChatMiddleware` puts it into the handler data as `chat_context`, and
+    `ChatContextMiddleware` resolves it into `chat_model` and `chat_settings` for handlers
+    that need them.
+    """
+
+    def __init__(
+        self,
+        chat_model: RDChatModel,
+        chat_settings: RDChatSettingsModel | bytes,
+        decoder: Callable[
+            [RDChatModel, bytes], Awaitable[tuple[RDChatModel, RDChatSettingsModel]]
+        ],
+    ) -> None:
+        self._chat_model = chat_model
+        self._chat_settings = chat_settings
+        self._decoder = decoder
+
+    def __await__(self) -> Generator[Any, None, tuple[RDChatModel, RDChatSettingsModel]]:
+        return self.resolve().__await__()
+
+    @property
+    def resolved(self) -> bool:
+        return isinstance(self._chat_settings, RDChatSettingsModel)
+
+    async def resolve(self) -> tuple[RDChatModel, RDChatSettingsModel]:
+        if isinstance(self._chat_settings, bytes):
+            self._chat_model, self._chat_settings = await self._decoder(
+                self._chat_model, self._chat_settings
             )
-            .on_conflict_do_update(
-                index_elements=["id"],
-                set_={
-                    "username": chat.username,
-                },
+        return self._chat_model, self._chat_settings
+
+
+def _handler_requires_chat_context(handler: HandlerObject) -> bool:
+    callback = handler.callback
+    if isinstance(callback, SceneHandlerWrapper):
+        # aiogram wraps scene handlers into a `**kwargs` callable, the declared parameters are
+        # those of the wrapped method
+        params = callback.handler.params
+    elif handler.varkw:
+        # Handlers with **kwargs may pass the data further
+        return True
+    else:
+        params = handler.params
+
+    return bool(get_flag(handler, CHAT_CONTEXT_FLAG, default=False)) or not (
+        CHAT_CONTEXT_PARAMS.isdisjoint(params)
+    )
+
+
+class CheckChatMiddleware(BaseMiddleware):
+    """
+    Outer middleware that registers the chat of every group update and provides its
+    `LazyChatContext`.
+
+    Lookups go through the in-process `ChatCache`, then Redis, then Postgres. Hits, misses and
+    the latency of every leg are recorded in `metrics`, labelled by update type. Resolved chats
+    are reported to `sliding_expiration`, when given, to keep their Redis entries alive, and
+    registered chats to `read_session_router`, so they are not looked up on a lagging replica.
+    """
+
+    def __init__(
+        self,
+        chat_cache: ChatCache,
+        lock_timeout: float | None = None,
+        metrics: Metrics | None = None,
+        sliding_expiration: SlidingExpiration | None = None,
+        read_session_router: ReadSessionRouter | None = None,
+    ) -> None:
+        self.chat_cache = chat_cache
+        self.lock_timeout = lock_timeout
+        self.metrics = metrics or Metrics()
+        self.sliding_expiration = sliding_expiration
+        self.read_session_router = read_session_router
+        self.single_flight: SingleFlight[int, ChatEntry] = SingleFlight()
+        self.refreshes: SingleFlight[int, None] = SingleFlight()
+
+    async def _upsert_chat_model(
+        self,
+        db_session: async_sessionmaker[AsyncSession],
+        redis: Redis,
+        chat: Chat,
+        user: User,
+        update_type: str,
+    ) -> RDChatContext:
+        with self.metrics.timer("db_upsert_seconds", update_type):
+            async with db_session() as session:
+                chat_context = await RDChatContext.upsert(
+                    session,
+                    chat_id=chat.id,
+                    chat_type=chat.type,
+                    username=chat.username,
+                    language_code=user.language_code or "ru",
+                )
+
+                await session.commit()
+
+        if self.read_session_router is not None:
+            self.read_session_router.written(chat.id)
+
+        with self.metrics.timer("redis_save_seconds", update_type):
+            return await chat_context.save(redis, timedelta(minutes=random.randint(45, 75)))
+
+    async def _get_cached_chat_model(
+        self,
+        redis: Redis,
+        chat: Chat,
+        update_type: str,
+    ) -> ChatEntry | None:
+        with self.metrics.timer("redis_fetch_seconds", update_type):
+            data = await RDChatContext.fetch(redis, chat.id)
+
+        with self.metrics.timer("decode_seconds", update_type):
+            decoded = RDChatContext.decode_chat_model(*data)
+
+        if decoded is None:
+            return None
+
+        # The settings stay encoded until a handler asks for them
+        chat_model, is_stale = decoded
+        return chat_model, data[1], is_stale
+
+    async def _load_chat_model(
+        self,
+        db_session: async_sessionmaker[AsyncSession],
+        redis: Redis,
+        chat: Chat,
+        user: User,
+        update_type: str,
+    ) -> ChatEntry:
+        if entry := await self._get_cached_chat_model(redis, chat, update_type):
+            self.metrics.inc("redis_hit", update_type)
+            return entry
+
+        self.metrics.inc("redis_miss", update_type)
+
+        if self.lock_timeout is None:
+            return self._entry(
+                await self._upsert_chat_model(db_session, redis, chat, user, update_type)
             )
-            .returning(DBChatModel)
+
+        lock = redis.lock(
+            RDChatContext.lock_key(chat.id),
+            timeout=self.lock_timeout,
+            blocking=False,
         )
-        chat_model: DBChatModel = await session.scalar(stmt)
 
-        stmt = (
-            insert(DBChatSettingsModel)
-            .values(
-                id=chat.id,
-                language_code=user.language_code or "ru",
+        if await lock.acquire():
+            try:
+                return self._entry(
+                    await self._upsert_chat_model(db_session, redis, chat, user, update_type)
+                )
+
+            finally:
+                with contextlib.suppress(LockError):
+                    await lock.release()
+
+        # Another replica is rebuilding the entry, wait for it instead of hitting the database
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.lock_timeout
+
+        while loop.time() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+
+            if entry := await self._get_cached_chat_model(redis, chat, update_type):
+                return entry
+
+        return self._entry(
+            await self._upsert_chat_model(db_session, redis, chat, user, update_type)
+        )
+
+    @staticmethod
+    def _entry(chat_context: RDChatContext) -> ChatEntry:
+        return chat_context.chat_model, chat_context.chat_settings, chat_context.is_stale
+
+    async def _refresh_chat_model(
+        self,
+        db_session: async_sessionmaker[AsyncSession],
+        redis: Redis,
+        chat: Chat,
+        user: User,
+        update_type: str,
+    ) -> None:
+        try:
+            chat_context = await self._upsert_chat_model(
+                db_session, redis, chat, user, update_type
             )
-            .on_conflict_do_update(
-                index_elements=["id"],
-                set_={
-                    "language_code": DBChatSettingsModel.language_code,  # Required for returning
-                },
+
+        except Exception:
+            logger.exception("Failed to refresh stale chat context for chat %s", chat.id)
+
+        else:
+            self.chat_cache.set(chat_context.chat_model, chat_context.chat_settings)
+
+    async def _decode_chat_settings(
+        self,
+        db_session: async_sessionmaker[AsyncSession],
+        redis: Redis,
+        chat: Chat,
+        user: User,
+        update_type: str,
+        chat_model: RDChatModel,
+        data: bytes,
+    ) -> tuple[RDChatModel, RDChatSettingsModel]:
+        with self.metrics.timer("settings_decode_seconds", update_type):
+            chat_settings = RDChatSettingsModel.decode(data)
+
+        if chat_settings is None:
+            # The entry is unreadable by this version, rebuild it like a miss
+            self.metrics.inc("redis_miss", update_type)
+            chat_context = await self._upsert_chat_model(
+                db_session, redis, chat, user, update_type
             )
-            .returning(DBChatSettingsModel)
-        )
-        chat_settings: DBChatSettingsModel = await session.scalar(stmt)
+            self.chat_cache.set(chat_context.chat_model, chat_context.chat_settings)
+            return chat_context.chat_model, chat_context.chat_settings
+
+        self.chat_cache.set_decoded(chat_model.id, data, chat_settings)
+        return chat_model, chat_settings
 
-        await session.commit()
+    async def _get_chat_context(
+        self,
+        db_session: async_sessionmaker[AsyncSession],
+        redis: Redis,
+        chat: Chat,
+        user: User,
+        update_type: str,
+    ) -> LazyChatContext:
+        if self.sliding_expiration is not None:
+            self.sliding_expiration.touch(chat.id)
 
-        chat_model: RDChatModel = RDChatModel.from_orm(chat_model)
-        chat_settings: RDChatSettingsModel = RDChatSettingsModel.from_orm(chat_settings)
+        if cached := self.chat_cache.get(chat.id):
+            self.metrics.inc("memory_hit", update_type)
+            chat_model, chat_settings = cached
 
-        ttl = timedelta(minutes=random.randint(45, 75))
-        await chat_model.save(redis, ttl)
-        await chat_settings.save(redis, ttl)
+        else:
+            self.metrics.inc("memory_miss", update_type)
 
-    return chat_model, chat_settings
+            chat_model, chat_settings, is_stale = await self.single_flight.do(
+                chat.id,
+                lambda: self._load_chat_model(db_session, redis, chat, user, update_type),
+            )
 
+            if is_stale:
+                # Serve the stale entry right away and refresh it in the background
+                self.metrics.inc("redis_stale", update_type)
+                self.refreshes.start(
+                    chat.id,
+                    lambda: self._refresh_chat_model(db_session, redis, chat, user, update_type),
+                )
+
+            self.chat_cache.set(chat_model, chat_settings)
+
+        return LazyChatContext(
+            chat_model,
+            chat_settings,
+            partial(self._decode_chat_settings, db_session, redis, chat, user, update_type),
+        )
 
-class CheckChatMiddleware(BaseMiddleware):
     async def __call__(
         self,
         handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
@@ -85,13 +309,48 @@ class CheckChatMiddleware(BaseMiddleware):
         match event.event_type:
             case "message" | "callback_query" | "my_chat_member" | "chat_member":
                 if chat.type in (ChatType.GROUP, ChatType.SUPERGROUP, ChatType.CHANNEL):
-                    data["chat_model"], data["chat_settings"] = await _get_chat_model(
+                    # The chat is registered for every update, only decoding its settings waits
+                    # for a handler that uses them
+                    data["chat_context"] = await self._get_chat_context(
                         data["db_session"],
                         data["redis"],
                         chat,
                         user,
+                        event.event_type,
                     )
             case _:
                 pass
 
         return await handler(event, data)
+
+
+class ChatContextMiddleware(BaseMiddleware):
+    """
+    Inner middleware that resolves `chat_context` into `chat_model` and `chat_settings`.
+
+    Chat settings are decoded only when the matched handler declares `chat_model` or
+    `chat_settings` parameters, accepts `**kwargs` or is marked with `flags.chat_context`. Register
+    it with `required=True` on a router to always decode them for the handlers of that router.
+
+    Scene handlers are checked by the parameters of the wrapped method. A transition runs the
+    enter and leave handlers of another scene with the data of the handler that triggered it, so
+    mark that handler with `flags.chat_context` when those handlers use chat models.
+    """
+
+    def __init__(self, *, required: bool = False) -> None:
+        self.required = required
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        chat_context: LazyChatContext | None = data.get("chat_context")
+
+        if chat_context is not None and (
+            self.required or _handler_requires_chat_context(data["handler"])
+        ):
+            data["chat_model"], data["chat_settings"] = await chat_context
+
+        return await handler(event, data)
@@ -2,9 +2,7 @@ from aiogram import F
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.scene import on
 from aiogram.types import CallbackQuery, Message
-from redis.asyncio import Redis
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from bot.scenes.chat_settings.base import (
     Action,
@@ -14,7 +12,7 @@ from bot.scenes.chat_settings.base import (
     FSMData,
 )
 from bot.scenes.chat_settings.stages.admin_settings.keyboards import admin_settings_keyboard
-from bot.storages.psql import DBChatSettingsModel, RDChatSettingsModel
+from bot.storages.psql import ChatSettingsRepository, DBChatSettingsModel, ReadSessionRouter
 
 ADMIN_SETTINGS_WINDOW_TEXT = (
     "👮 Admin settings\n"
@@ -29,9 +27,9 @@ class AdminSettingsWindow(BaseScene, state=ChatSettingsStates.ADMIN_SETTINGS):
         self,
         msg: Message,
         state: FSMContext,
-        db_session: async_sessionmaker[AsyncSession],
+        db_read_session: ReadSessionRouter,
     ) -> None:
-        async with db_session() as session:
+        async with db_read_session(msg.chat.id) as session:
             stmt = select(DBChatSettingsModel).where(DBChatSettingsModel.id == msg.chat.id)
             chat_settings: DBChatSettingsModel = await session.scalar(stmt)
 
@@ -48,9 +46,9 @@ class AdminSettingsWindow(BaseScene, state=ChatSettingsStates.ADMIN_SETTINGS):
         self,
         cb: CallbackQuery,
         state: FSMContext,
-        db_session: async_sessionmaker[AsyncSession],
+        db_read_session: ReadSessionRouter,
     ) -> None:
-        async with db_session() as session:
+        async with db_read_session(cb.message.chat.id) as session:
             stmt = select(DBChatSettingsModel).where(DBChatSettingsModel.id == cb.message.chat.id)
             chat_settings: DBChatSettingsModel = await session.scalar(stmt)
 
@@ -65,17 +63,9 @@ class AdminSettingsWindow(BaseScene, state=ChatSettingsStates.ADMIN_SETTINGS):
     async def reports_switch(
         self,
         cb: CallbackQuery,
-        db_session: async_sessionmaker[AsyncSession],
-        redis: Redis,
+        chat_settings_repository: ChatSettingsRepository,
     ) -> None:
-        async with db_session() as session:
-            stmt = select(DBChatSettingsModel).where(DBChatSettingsModel.id == cb.message.chat.id)
-            chat_settings: DBChatSettingsModel = await session.scalar(stmt)
-            chat_settings.reports_enabled = not chat_settings.reports_enabled
-
-            await session.commit()
-
-            await RDChatSettingsModel.from_orm(chat_settings).save(redis)
+        await chat_settings_repository.toggle(cb.message.chat.id, "reports_enabled")
 
         await self.wizard.retake()
 
@@ -3,13 +3,12 @@ from aiogram.fsm.scene import on
 from aiogram.types import CallbackQuery
 from redis.asyncio import Redis
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from bot.scenes.chat_settings.base import Action, BaseScene, ChatSettingsCB, ChatSettingsStates
 from bot.scenes.chat_settings.stages.admin_settings.reports_policy.keyboards import (
     set_reports_special_chat_keyboard,
 )
-from bot.storages.psql import DBChatSettingsModel
+from bot.storages.psql import DBChatSettingsModel, ReadSessionRouter
 from bot.storages.redis.reports_special_chat.set_reports_special_chat_pending_model import (
     RDSetReportsSpecialChatPending,
 )
@@ -33,13 +32,13 @@ class SetReportsSpecialChatWindow(BaseScene, state=ChatSettingsStates.REPORTS_SP
     async def on_enter_cb(
         self,
         cb: CallbackQuery,
-        db_session: async_sessionmaker[AsyncSession],
+        db_read_session: ReadSessionRouter,
         redis: Redis,
     ) -> None:
         # Reset SetRepostsSpecialChat pending state in Redis
         await RDSetReportsSpecialChatPending.delete(redis, cb.from_user.id)
 
-        async with db_session() as session:
+        async with db_read_session(cb.message.chat.id) as session:
             stmt = select(DBChatSettingsModel).where(DBChatSettingsModel.id == cb.message.chat.id)
             chat_settings: DBChatSettingsModel = await session.scalar(stmt)
 
@@ -4,7 +4,6 @@ from aiogram.fsm.scene import on
 from aiogram.types import CallbackQuery, Message
 from redis.asyncio import Redis
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from bot.scenes.chat_settings.base import (
     Action,
@@ -15,7 +14,7 @@ from bot.scenes.chat_settings.base import (
     process_message_delete,
 )
 from bot.scenes.chat_settings.stages.general_settings.keyboards import general_settings_keyboard
-from bot.storages.psql import DBChatSettingsModel, RDChatSettingsModel
+from bot.storages.psql import ChatSettingsRepository, DBChatSettingsModel, ReadSessionRouter
 
 CHAT_SETTINGS_GENERAL_SETTINGS_WINDOW_TEXT = (
     "<b>⚙️ General chat settings</b>\n"
@@ -32,12 +31,11 @@ class GeneralSettingsWindow(BaseScene, state=ChatSettingsStates.GENERAL_SETTINGS
         msg: Message,
         bot: Bot,
         state: FSMContext,
-        chat_settings: RDChatSettingsModel,
-        db_session: async_sessionmaker[AsyncSession],
+        db_read_session: ReadSessionRouter,
     ) -> None:
         data: FSMData = await state.get_data()
 
-        async with db_session() as session:
+        async with db_read_session(msg.chat.id) as session:
             stmt = select(DBChatSettingsModel).where(DBChatSettingsModel.id == msg.chat.id)
             chat_settings: DBChatSettingsModel = await session.scalar(stmt)
 
@@ -56,13 +54,12 @@ class GeneralSettingsWindow(BaseScene, state=ChatSettingsStates.GENERAL_SETTINGS
         cb: CallbackQuery,
         bot: Bot,
         state: FSMContext,
-        chat_settings: RDChatSettingsModel,
-        db_session: async_sessionmaker[AsyncSession],
+        db_read_session: ReadSessionRouter,
         redis: Redis,
     ) -> None:
         await process_message_delete(bot=bot, chat_id=cb.message.chat.id, state=state, redis=redis)
 
-        async with db_session() as session:
+        async with db_read_session(cb.message.chat.id) as session:
             stmt = select(DBChatSettingsModel).where(DBChatSettingsModel.id == cb.message.chat.id)
             chat_settings: DBChatSettingsModel = await session.scalar(stmt)
 
@@ -85,17 +82,9 @@ class GeneralSettingsWindow(BaseScene, state=ChatSettingsStates.GENERAL_SETTINGS
     async def greeting_switch(
         self,
         cb: CallbackQuery,
-        db_session: async_sessionmaker[AsyncSession],
-        redis: Redis,
+        chat_settings_repository: ChatSettingsRepository,
     ) -> None:
-        async with db_session() as session:
-            stmt = select(DBChatSettingsModel).where(DBChatSettingsModel.id == cb.message.chat.id)
-            chat_settings: DBChatSettingsModel = await session.scalar(stmt)
-            chat_settings.greeting_enabled = not chat_settings.greeting_enabled
-
-            await session.commit()
-
-            await RDChatSettingsModel.from_orm(chat_settings).save(redis)
+        await chat_settings_repository.toggle(cb.message.chat.id, "greeting_enabled")
 
         await self.wizard.retake()
 
@@ -120,17 +109,9 @@ class GeneralSettingsWindow(BaseScene, state=ChatSettingsStates.GENERAL_SETTINGS
     async def farewell_switch(
         self,
         cb: CallbackQuery,
-        db_session: async_sessionmaker[AsyncSession],
-        redis: Redis,
+        chat_settings_repository: ChatSettingsRepository,
     ) -> None:
-        async with db_session() as session:
-            stmt = select(DBChatSettingsModel).where(DBChatSettingsModel.id == cb.message.chat.id)
-            chat_settings: DBChatSettingsModel = await session.scalar(stmt)
-            chat_settings.farewell_enabled = not chat_settings.farewell_enabled
-
-            await session.commit()
-
-            await RDChatSettingsModel.from_orm(chat_settings).save(redis)
+        await chat_settings_repository.toggle(cb.message.chat.id, "farewell_enabled")
 
         await self.wizard.retake()
 
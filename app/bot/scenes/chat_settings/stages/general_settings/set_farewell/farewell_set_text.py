@@ -2,9 +2,6 @@ from aiogram import F
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.scene import on
 from aiogram.types import CallbackQuery, Message
-from redis.asyncio import Redis
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from bot.scenes.chat_settings.base import (
     MAX_GREETING_FAREWELL_LENGTH,
@@ -17,7 +14,7 @@ from bot.scenes.chat_settings.base import (
 from bot.scenes.chat_settings.stages.general_settings.set_farewell.keyboards import (
     farewell_text_keyboard,
 )
-from bot.storages.psql import DBChatSettingsModel, RDChatSettingsModel
+from bot.storages.psql import ChatSettingsRepository
 
 CHAT_SETTINGS_FAREWELL_SET_TEXT_WINDOW_TEXT = (
     "💁‍♂️ In this window, you need to send a message of farewell to the chat members.\n"
@@ -47,20 +44,11 @@ class SetFarewellTextWindow(BaseScene, state=ChatSettingsStates.FAREWELL_SET_TEX
         self,
         msg: Message,
         state: FSMContext,
-        db_session: async_sessionmaker[AsyncSession],
-        redis: Redis,
+        chat_settings_repository: ChatSettingsRepository,
     ) -> None:
         data: FSMData = await state.get_data()
 
-        async with db_session() as session:
-            stmt = select(DBChatSettingsModel).where(DBChatSettingsModel.id == msg.chat.id)
-            chat_settings: DBChatSettingsModel = await session.scalar(stmt)
-
-            chat_settings.farewell_text = msg.html_text
-
-            await session.commit()
-
-            await RDChatSettingsModel.from_orm(chat_settings).save(redis)
+        await chat_settings_repository.set_text(msg.chat.id, "farewell", msg.html_text)
 
         await state.update_data(
             FSMData(
@@ -95,12 +83,13 @@ class SetFarewellTextWindow(BaseScene, state=ChatSettingsStates.FAREWELL_SET_TEX
         self,
         cb: CallbackQuery,
         state: FSMContext,
-        db_session: async_sessionmaker[AsyncSession],
-        redis: Redis,
+        chat_settings_repository: ChatSettingsRepository,
     ) -> None:
         data = await state.get_data()
 
-        updated = await reset_farewell_text(cb, db_session, redis)
+        updated = (
+            await chat_settings_repository.reset_text(cb.message.chat.id, "farewell") is not None
+        )
 
         if updated is True:
             await state.update_data(
@@ -121,26 +110,3 @@ class SetFarewellTextWindow(BaseScene, state=ChatSettingsStates.FAREWELL_SET_TEX
     @on.callback_query(ChatSettingsCB.filter(F.action == Action.BACK))
     async def back_handler_cb(self, _: CallbackQuery) -> None:
         await self.wizard.goto(ChatSettingsStates.FAREWELL, updated=False)
-
-
-async def reset_farewell_text(
-    cb: CallbackQuery,
-    db_session: async_sessionmaker[AsyncSession],
-    redis: Redis,
-) -> bool:
-    updated: bool = False
-
-    async with db_session() as session:
-        stmt = select(DBChatSettingsModel).where(DBChatSettingsModel.id == cb.message.chat.id)
-        chat_settings: DBChatSettingsModel = await session.scalar(stmt)
-
-        if chat_settings.farewell_text is not None:
-            updated = True
-
-        chat_settings.farewell_text = None
-
-        await session.commit()
-
-        await RDChatSettingsModel.from_orm(chat_settings).save(redis)
-
-    return updated
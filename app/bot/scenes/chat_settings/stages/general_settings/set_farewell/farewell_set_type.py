@@ -2,9 +2,6 @@ from aiogram import F
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.scene import on
 from aiogram.types import CallbackQuery
-from redis.asyncio import Redis
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from bot.scenes.chat_settings.base import (
     Action,
@@ -17,7 +14,7 @@ from bot.scenes.chat_settings.base import (
 from bot.scenes.chat_settings.stages.general_settings.set_farewell.keyboards import (
     farewell_type_keyboard,
 )
-from bot.storages.psql import DBChatSettingsModel, RDChatSettingsModel
+from bot.storages.psql import ChatSettingsRepository, RDChatSettingsModel
 
 CHAT_SETTINGS_FAREWELL_SET_TYPE_WINDOW_TEXT = (
     "💁‍♂️ In this window, you need to select the type of message that the bot will send to "
@@ -49,8 +46,7 @@ class SetFarewellTypeWindow(BaseScene, state=ChatSettingsStates.FAREWELL_SET_TYP
         callback_data: ChatSettingsFarewellCB,
         state: FSMContext,
         chat_settings: RDChatSettingsModel,
-        db_session: async_sessionmaker[AsyncSession],
-        redis: Redis,
+        chat_settings_repository: ChatSettingsRepository,
     ) -> None:
         data: FSMData = await state.get_data()
 
@@ -58,14 +54,9 @@ class SetFarewellTypeWindow(BaseScene, state=ChatSettingsStates.FAREWELL_SET_TYP
             await self.wizard.goto(ChatSettingsStates.FAREWELL, updated=False)
             return
 
-        async with db_session() as session:
-            stmt = select(DBChatSettingsModel).where(DBChatSettingsModel.id == cb.message.chat.id)
-            chat_settings: DBChatSettingsModel = await session.scalar(stmt)
-            chat_settings.farewell_type = callback_data.farewell_type.value
-
-            await session.commit()
-
-            await RDChatSettingsModel.from_orm(chat_settings).save(redis)
+        await chat_settings_repository.set_type(
+            cb.message.chat.id, "farewell", callback_data.farewell_type
+        )
 
         await state.update_data(
             FSMData(
@@ -2,9 +2,6 @@ from aiogram import F
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.scene import on
 from aiogram.types import CallbackQuery, Message
-from redis.asyncio import Redis
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from bot.scenes.chat_settings.base import (
     Action,
@@ -16,7 +13,7 @@ from bot.scenes.chat_settings.base import (
 from bot.scenes.chat_settings.stages.general_settings.set_greeting.keyboards import (
     greeting_media_keyboard,
 )
-from bot.storages.psql import DBChatSettingsModel, RDChatSettingsModel
+from bot.storages.psql import ChatSettingsRepository
 from bot.storages.psql.chat.chat_settings_model import GreetingFarewellType
 
 CHAT_SETTINGS_GREETING_SET_MEDIA_WINDOW_TEXT = (
@@ -48,21 +45,13 @@ class SetGreetingMediaWindow(BaseScene, state=ChatSettingsStates.GREETING_SET_ME
         self,
         msg: Message,
         state: FSMContext,
-        db_session: async_sessionmaker[AsyncSession],
-        redis: Redis,
+        chat_settings_repository: ChatSettingsRepository,
     ) -> None:
         data: FSMData = await state.get_data()
 
-        async with db_session() as session:
-            stmt = select(DBChatSettingsModel).where(DBChatSettingsModel.id == msg.chat.id)
-            chat_settings: DBChatSettingsModel = await session.scalar(stmt)
-
-            chat_settings.greeting_photo_id = msg.photo[-1].file_id
-            chat_settings.greeting_type = GreetingFarewellType.PHOTO.value
-
-            await session.commit()
-
-            await RDChatSettingsModel.from_orm(chat_settings).save(redis)
+        await chat_settings_repository.set_media(
+            msg.chat.id, "greeting", GreetingFarewellType.PHOTO, msg.photo[-1].file_id
+        )
 
         await state.update_data(
             FSMData(
@@ -84,21 +73,13 @@ class SetGreetingMediaWindow(BaseScene, state=ChatSettingsStates.GREETING_SET_ME
         self,
         msg: Message,
         state: FSMContext,
-        db_session: async_sessionmaker[AsyncSession],
-        redis: Redis,
+        chat_settings_repository: ChatSettingsRepository,
     ) -> None:
         data: FSMData = await state.get_data()
 
-        async with db_session() as session:
-            stmt = select(DBChatSettingsModel).where(DBChatSettingsModel.id == msg.chat.id)
-            chat_settings: DBChatSettingsModel = await session.scalar(stmt)
-
-            chat_settings.greeting_video_id = msg.video.file_id
-            chat_settings.greeting_type = GreetingFarewellType.VIDEO.value
-
-            await session.commit()
-
-            await RDChatSettingsModel.from_orm(chat_settings).save(redis)
+        await chat_settings_repository.set_media(
+            msg.chat.id, "greeting", GreetingFarewellType.VIDEO, msg.video.file_id
+        )
 
         await state.update_data(
             FSMData(
@@ -120,21 +101,13 @@ class SetGreetingMediaWindow(BaseScene, state=ChatSettingsStates.GREETING_SET_ME
         self,
         msg: Message,
         state: FSMContext,
-        db_session: async_sessionmaker[AsyncSession],
-        redis: Redis,
+        chat_settings_repository: ChatSettingsRepository,
     ) -> None:
         data: FSMData = await state.get_data()
 
-        async with db_session() as session:
-            stmt = select(DBChatSettingsModel).where(DBChatSettingsModel.id == msg.chat.id)
-            chat_settings: DBChatSettingsModel = await session.scalar(stmt)
-
-            chat_settings.greeting_gif_id = msg.animation.file_id
-            chat_settings.greeting_type = GreetingFarewellType.GIF.value
-
-            await session.commit()
-
-            await RDChatSettingsModel.from_orm(chat_settings).save(redis)
+        await chat_settings_repository.set_media(
+            msg.chat.id, "greeting", GreetingFarewellType.GIF, msg.animation.file_id
+        )
 
         await state.update_data(
             FSMData(
@@ -156,21 +129,13 @@ class SetGreetingMediaWindow(BaseScene, state=ChatSettingsStates.GREETING_SET_ME
         self,
         msg: Message,
         state: FSMContext,
-        db_session: async_sessionmaker[AsyncSession],
-        redis: Redis,
+        chat_settings_repository: ChatSettingsRepository,
     ) -> None:
         data: FSMData = await state.get_data()
 
-        async with db_session() as session:
-            stmt = select(DBChatSettingsModel).where(DBChatSettingsModel.id == msg.chat.id)
-            chat_settings: DBChatSettingsModel = await session.scalar(stmt)
-
-            chat_settings.greeting_sticker_id = msg.sticker.file_id
-            chat_settings.greeting_type = GreetingFarewellType.STICKER.value
-
-            await session.commit()
-
-            await RDChatSettingsModel.from_orm(chat_settings).save(redis)
+        await chat_settings_repository.set_media(
+            msg.chat.id, "greeting", GreetingFarewellType.STICKER, msg.sticker.file_id
+        )
 
         await state.update_data(
             FSMData(
@@ -192,12 +157,13 @@ class SetGreetingMediaWindow(BaseScene, state=ChatSettingsStates.GREETING_SET_ME
         self,
         cb: CallbackQuery,
         state: FSMContext,
-        db_session: async_sessionmaker[AsyncSession],
-        redis: Redis,
+        chat_settings_repository: ChatSettingsRepository,
     ) -> None:
         data: FSMData = await state.get_data()
 
-        updated = await reset_greeting_media(cb, db_session, redis)
+        updated = (
+            await chat_settings_repository.reset_media(cb.message.chat.id, "greeting") is not None
+        )
 
         if updated is True:
             await state.update_data(
@@ -218,44 +184,3 @@ class SetGreetingMediaWindow(BaseScene, state=ChatSettingsStates.GREETING_SET_ME
     @on.callback_query(ChatSettingsCB.filter(F.action == Action.BACK))
     async def back_handler_cb(self, _: CallbackQuery) -> None:
         await self.wizard.goto(ChatSettingsStates.GREETING, updated=False)
-
-
-async def reset_greeting_media(
-    cb: CallbackQuery, db_session: async_sessionmaker[AsyncSession], redis: Redis
-) -> bool:
-    updated: bool = False
-
-    async with db_session() as session:
-        stmt = select(DBChatSettingsModel).where(DBChatSettingsModel.id == cb.message.chat.id)
-        chat_settings: DBChatSettingsModel = await session.scalar(stmt)
-
-        match chat_settings.greeting_type:
-            case GreetingFarewellType.PHOTO.value:
-                if chat_settings.greeting_photo_id is not None:
-                    updated = True
-
-                chat_settings.greeting_photo_id = None
-            case GreetingFarewellType.VIDEO.value:
-                if chat_settings.greeting_video_id is not None:
-                    updated = True
-
-                chat_settings.greeting_video_id = None
-            case GreetingFarewellType.GIF.value:
-                if chat_settings.greeting_gif_id is not None:
-                    updated = True
-
-                chat_settings.greeting_gif_id = None
-            case GreetingFarewellType.STICKER.value:
-                if chat_settings.greeting_sticker_id is not None:
-                    updated = True
-
-                chat_settings.greeting_sticker_id = None
-
-            case _:
-                pass
-
-        await session.commit()
-
-        await RDChatSettingsModel.from_orm(chat_settings).save(redis)
-
-    return updated
@@ -3,9 +3,7 @@ from aiogram.exceptions import TelegramBadRequest
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.scene import on
 from aiogram.types import CallbackQuery, Message, ReactionTypeEmoji
-from redis.asyncio import Redis
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from bot.errors.errors import TopicClosedError, resolve_exception
 from bot.scenes.chat_settings.base import (
@@ -18,7 +16,7 @@ from bot.scenes.chat_settings.base import (
 from bot.scenes.chat_settings.stages.general_settings.set_greeting.keyboards import (
     greeting_topic_id_keyboard,
 )
-from bot.storages.psql import DBChatSettingsModel, RDChatSettingsModel
+from bot.storages.psql import ChatSettingsRepository, DBChatSettingsModel, ReadSessionRouter
 
 CHAT_SETTINGS_SET_TOPIC_ID_WINDOW_TEXT = (
     "💁‍♂️ Now send any text message in the Topic where the bot should send greetings/farewells "
@@ -34,15 +32,14 @@ class SetGreetingTopicIDWindow(BaseScene, state=ChatSettingsStates.GREETING_SET_
         self,
         cb: CallbackQuery,
         state: FSMContext,
-        db_session: async_sessionmaker[AsyncSession],
-        chat_settings: RDChatSettingsModel,
+        db_read_session: ReadSessionRouter,
     ) -> None:
         if not cb.message.is_topic_message:
             await cb.answer("⚠️ This chat doesn't contain Topics", show_alert=True)
             await self.wizard.goto(ChatSettingsStates.GREETING, updated=False)
             return
 
-        async with db_session() as session:
+        async with db_read_session(cb.message.chat.id) as session:
             stmt = select(DBChatSettingsModel).where(DBChatSettingsModel.id == cb.message.chat.id)
             chat_settings: DBChatSettingsModel = await session.scalar(stmt)
 
@@ -61,20 +58,12 @@ class SetGreetingTopicIDWindow(BaseScene, state=ChatSettingsStates.GREETING_SET_
         msg: Message,
         bot: Bot,
         state: FSMContext,
-        db_session: async_sessionmaker[AsyncSession],
-        redis: Redis,
+        chat_settings_repository: ChatSettingsRepository,
     ) -> None:
         topic_id = msg.message_thread_id
         data: FSMData = await state.get_data()
 
-        async with db_session() as session:
-            stmt = select(DBChatSettingsModel).where(DBChatSettingsModel.id == msg.chat.id)
-            chat_settings: DBChatSettingsModel = await session.scalar(stmt)
-            chat_settings.greeting_topic_id = topic_id
-
-            await session.commit()
-
-            await RDChatSettingsModel.from_orm(chat_settings).save(redis)
+        await chat_settings_repository.set_topic_id(msg.chat.id, "greeting", topic_id)
 
         await state.update_data(
             FSMData(
@@ -124,17 +113,9 @@ class SetGreetingTopicIDWindow(BaseScene, state=ChatSettingsStates.GREETING_SET_
     async def reset_greeting_topic_id_handler(
         self,
         cb: CallbackQuery,
-        db_session: async_sessionmaker[AsyncSession],
-        redis: Redis,
+        chat_settings_repository: ChatSettingsRepository,
     ) -> None:
-        async with db_session() as session:
-            stmt = select(DBChatSettingsModel).where(DBChatSettingsModel.id == cb.message.chat.id)
-            chat_settings: DBChatSettingsModel = await session.scalar(stmt)
-            chat_settings.greeting_topic_id = None
-
-            await session.commit()
-
-            await RDChatSettingsModel.from_orm(chat_settings).save(redis)
+        await chat_settings_repository.set_topic_id(cb.message.chat.id, "greeting", None)
 
         await cb.answer("✅ Topic ID reset.", show_alert=True)
 
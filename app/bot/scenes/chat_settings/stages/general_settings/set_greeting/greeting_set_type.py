@@ -2,9 +2,6 @@ from aiogram import F
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.scene import on
 from aiogram.types import CallbackQuery
-from redis.asyncio import Redis
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from bot.scenes.chat_settings.base import (
     Action,
@@ -17,7 +14,7 @@ from bot.scenes.chat_settings.base import (
 from bot.scenes.chat_settings.stages.general_settings.set_greeting.keyboards import (
     greeting_type_keyboard,
 )
-from bot.storages.psql import DBChatSettingsModel, RDChatSettingsModel
+from bot.storages.psql import ChatSettingsRepository, RDChatSettingsModel
 
 CHAT_SETTINGS_GREETING_SET_TEXT_WINDOW_TEXT = (
     "💁‍♂️ In this window, you need to send a message of greeting to the chat members.\n"
@@ -49,8 +46,7 @@ class SetGreetingTypeWindow(BaseScene, state=ChatSettingsStates.GREETING_SET_TYP
         callback_data: ChatSettingsGreetingCB,
         state: FSMContext,
         chat_settings: RDChatSettingsModel,
-        db_session: async_sessionmaker[AsyncSession],
-        redis: Redis,
+        chat_settings_repository: ChatSettingsRepository,
     ) -> None:
         data: FSMData = await state.get_data()
 
@@ -58,14 +54,9 @@ class SetGreetingTypeWindow(BaseScene, state=ChatSettingsStates.GREETING_SET_TYP
             await self.wizard.goto(ChatSettingsStates.GREETING, updated=False)
             return
 
-        async with db_session() as session:
-            stmt = select(DBChatSettingsModel).where(DBChatSettingsModel.id == cb.message.chat.id)
-            chat_settings: DBChatSettingsModel = await session.scalar(stmt)
-            chat_settings.greeting_type = callback_data.greeting_type.value
-
-            await session.commit()
-
-            await RDChatSettingsModel.from_orm(chat_settings).save(redis)
+        await chat_settings_repository.set_type(
+            cb.message.chat.id, "greeting", callback_data.greeting_type
+        )
 
         await state.update_data(
             FSMData(
@@ -4,7 +4,6 @@ from aiogram.fsm.scene import on
 from aiogram.types import CallbackQuery, Message
 from redis.asyncio import Redis
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from bot.scenes.chat_settings.base import (
     Action,
@@ -14,17 +13,15 @@ from bot.scenes.chat_settings.base import (
     FSMData,
     process_message_delete,
 )
-from bot.scenes.chat_settings.stages.general_settings.set_greeting.greeting_set_media import (
-    reset_greeting_media,
-)
-from bot.scenes.chat_settings.stages.general_settings.set_greeting.greeting_set_text import (
-    reset_greeting_text,
-)
 from bot.scenes.chat_settings.stages.general_settings.set_greeting.keyboards import (
     greeting_keyboard,
 )
-from bot.storages.psql import DBChatSettingsModel, RDChatSettingsModel
-from bot.storages.psql.chat.chat_settings_model import GreetingFarewellType
+from bot.storages.psql import (
+    ChatSettingsRepository,
+    DBChatSettingsModel,
+    RDChatSettingsModel,
+    ReadSessionRouter,
+)
 from bot.storages.redis.bot.reaction_media import RDBotReactionMedia
 from bot.utils.greeting_farewell_builder import GF_Message, build_greeting_message
 
@@ -52,7 +49,7 @@ class SetGreetingWindow(BaseScene, state=ChatSettingsStates.GREETING):
         bot: Bot,
         state: FSMContext,
         bot_reaction_media: RDBotReactionMedia,
-        db_session: async_sessionmaker[AsyncSession],
+        db_read_session: ReadSessionRouter,
         redis: Redis,
         updated: bool = True,
     ) -> None:
@@ -60,7 +57,7 @@ class SetGreetingWindow(BaseScene, state=ChatSettingsStates.GREETING):
             bot=bot, chat_id=cb.message.chat.id, state=state, redis=redis, updated=updated
         )
 
-        async with db_session() as session:
+        async with db_read_session(cb.message.chat.id) as session:
             stmt = select(DBChatSettingsModel).where(DBChatSettingsModel.id == cb.message.chat.id)
             chat_settings: DBChatSettingsModel = await session.scalar(stmt)
             chat_settings: RDChatSettingsModel = RDChatSettingsModel.from_orm(chat_settings)
@@ -108,7 +105,7 @@ class SetGreetingWindow(BaseScene, state=ChatSettingsStates.GREETING):
         bot: Bot,
         state: FSMContext,
         bot_reaction_media: RDBotReactionMedia,
-        db_session: async_sessionmaker[AsyncSession],
+        db_read_session: ReadSessionRouter,
         redis: Redis,
         updated: bool = True,
     ) -> None:
@@ -117,7 +114,7 @@ class SetGreetingWindow(BaseScene, state=ChatSettingsStates.GREETING):
             bot=bot, chat_id=msg.chat.id, state=state, redis=redis, updated=updated
         )
 
-        async with db_session() as session:
+        async with db_read_session(msg.chat.id) as session:
             stmt = select(DBChatSettingsModel).where(DBChatSettingsModel.id == msg.chat.id)
             chat_settings: DBChatSettingsModel = await session.scalar(stmt)
             chat_settings: RDChatSettingsModel = RDChatSettingsModel.from_orm(chat_settings)
@@ -160,12 +157,13 @@ class SetGreetingWindow(BaseScene, state=ChatSettingsStates.GREETING):
         self,
         cb: CallbackQuery,
         state: FSMContext,
-        db_session: async_sessionmaker[AsyncSession],
-        redis: Redis,
+        chat_settings_repository: ChatSettingsRepository,
     ) -> None:
         data = await state.get_data()
 
-        updated = await reset_greeting_text(cb, db_session, redis)
+        updated = (
+            await chat_settings_repository.reset_text(cb.message.chat.id, "greeting") is not None
+        )
 
         if updated is True:
             await state.update_data(
@@ -195,12 +193,13 @@ class SetGreetingWindow(BaseScene, state=ChatSettingsStates.GREETING):
         self,
         cb: CallbackQuery,
         state: FSMContext,
-        db_session: async_sessionmaker[AsyncSession],
-        redis: Redis,
+        chat_settings_repository: ChatSettingsRepository,
     ) -> None:
         data = await state.get_data()
 
-        updated = await reset_greeting_media(cb, db_session, redis)
+        updated = (
+            await chat_settings_repository.reset_media(cb.message.chat.id, "greeting") is not None
+        )
 
         if updated is True:
             await state.update_data(
@@ -229,17 +228,9 @@ class SetGreetingWindow(BaseScene, state=ChatSettingsStates.GREETING):
     async def reset_greeting_topic_id_handler(
         self,
         cb: CallbackQuery,
-        db_session: async_sessionmaker[AsyncSession],
-        redis: Redis,
+        chat_settings_repository: ChatSettingsRepository,
     ) -> None:
-        async with db_session() as session:
-            stmt = select(DBChatSettingsModel).where(DBChatSettingsModel.id == cb.message.chat.id)
-            chat_settings: DBChatSettingsModel = await session.scalar(stmt)
-            chat_settings.greeting_topic_id = None
-
-            await session.commit()
-
-            await RDChatSettingsModel.from_orm(chat_settings).save(redis)
+        await chat_settings_repository.set_topic_id(cb.message.chat.id, "greeting", None)
 
         await cb.answer(text="Chat topic ID has been reset successfully! ✅", show_alert=True)
 
@@ -248,25 +239,11 @@ class SetGreetingWindow(BaseScene, state=ChatSettingsStates.GREETING):
         self,
         cb: CallbackQuery,
         state: FSMContext,
-        db_session: async_sessionmaker[AsyncSession],
-        redis: Redis,
+        chat_settings_repository: ChatSettingsRepository,
     ) -> None:
         data = await state.get_data()
 
-        async with db_session() as session:
-            stmt = select(DBChatSettingsModel).where(DBChatSettingsModel.id == cb.message.chat.id)
-            chat_settings: DBChatSettingsModel = await session.scalar(stmt)
-            chat_settings.greeting_type = GreetingFarewellType.PHOTO.value
-            chat_settings.greeting_text = None
-            chat_settings.greeting_photo_id = None
-            chat_settings.greeting_video_id = None
-            chat_settings.greeting_gif_id = None
-            chat_settings.greeting_sticker_id = None
-            chat_settings.greeting_topic_id = None
-
-            await session.commit()
-
-            await RDChatSettingsModel.from_orm(chat_settings).save(redis)
+        await chat_settings_repository.reset_all(cb.message.chat.id, "greeting")
 
         await cb.answer(text="✅", show_alert=True)
 
@@ -1,13 +1,10 @@
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.scene import After, on
 from aiogram.types import CallbackQuery, Message
-from redis.asyncio import Redis
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from bot.scenes.chat_settings.base import BaseScene, ChatSettingsStates, FSMData, SelectLanguageCB
 from bot.scenes.chat_settings.stages.general_settings.keyboards import language_keyboard
-from bot.storages.psql import DBChatSettingsModel, RDChatSettingsModel
+from bot.storages.psql import ChatSettingsRepository
 
 
 class SetLanguageWindow(BaseScene, state=ChatSettingsStates.LANGUAGE):
@@ -33,14 +30,8 @@ class SetLanguageWindow(BaseScene, state=ChatSettingsStates.LANGUAGE):
         self,
         cb: CallbackQuery,
         callback_data: SelectLanguageCB,
-        db_session: async_sessionmaker[AsyncSession],
-        redis: Redis,
+        chat_settings_repository: ChatSettingsRepository,
     ) -> None:
-        async with db_session() as session:
-            stmt = select(DBChatSettingsModel).where(DBChatSettingsModel.id == cb.message.chat.id)
-            chat_settings: DBChatSettingsModel = await session.scalar(stmt)
-            chat_settings.language_code = callback_data.language_code.value
-
-            await session.commit()
-
-            await RDChatSettingsModel.from_orm(chat_settings).save(redis)
+        await chat_settings_repository.set_language(
+            cb.message.chat.id, callback_data.language_code.value
+        )
@@ -3,9 +3,6 @@ from aiogram import Bot, F
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.scene import on
 from aiogram.types import CallbackQuery, Message
-from redis.asyncio import Redis
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from bot.scenes.chat_settings.base import (
     Action,
@@ -15,7 +12,7 @@ from bot.scenes.chat_settings.base import (
     FSMData,
 )
 from bot.scenes.chat_settings.stages.general_settings.keyboards import timezone_keyboard
-from bot.storages.psql import DBChatSettingsModel, RDChatSettingsModel
+from bot.storages.psql import ChatSettingsRepository
 
 
 class SetTimezoneWindow(BaseScene, state=ChatSettingsStates.TIMEZONE):
@@ -43,8 +40,7 @@ class SetTimezoneWindow(BaseScene, state=ChatSettingsStates.TIMEZONE):
         msg: Message,
         bot: Bot,
         state: FSMContext,
-        db_session: async_sessionmaker[AsyncSession],
-        redis: Redis,
+        chat_settings_repository: ChatSettingsRepository,
     ) -> None:
         data = await state.get_data()
         try:
@@ -70,14 +66,7 @@ class SetTimezoneWindow(BaseScene, state=ChatSettingsStates.TIMEZONE):
             return
 
         else:
-            async with db_session() as session:
-                stmt = select(DBChatSettingsModel).where(DBChatSettingsModel.id == msg.chat.id)
-                chat_settings: DBChatSettingsModel = await session.scalar(stmt)
-                chat_settings.timezone = timezone.zone
-
-                await session.commit()
-
-                await RDChatSettingsModel.from_orm(chat_settings).save(redis)
+            await chat_settings_repository.set_timezone(msg.chat.id, timezone.zone)
 
             await state.update_data(FSMData(current_message_id=None))
 
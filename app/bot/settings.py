@@ -1,8 +1,21 @@
+from typing import Any, Final, Literal
+from uuid import uuid4
+
 from pydantic import SecretStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from redis.asyncio import Redis
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialBackoff, NoBackoff
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import TimeoutError as RedisTimeoutError
 from sqlalchemy import URL
 
+from bot.storages.redis.utils.pool import InstrumentedConnectionPool
+
+# The server closes idle sessions this much later than the pool discards them, so a connection
+# can never be closed by the server while it is being handed out
+IDLE_SESSION_TIMEOUT_MARGIN: Final[float] = 5.0
+
 
 class PostgresSettings(BaseSettings):
     host: str
@@ -11,6 +24,31 @@ class PostgresSettings(BaseSettings):
     password: SecretStr
     db: str
 
+    # "direct" reuses statements prepared on each connection, "pgbouncer" prepares every
+    # statement under a unique name and caches nothing, which is safe behind transaction pooling
+    profile: Literal["direct", "pgbouncer"] = "direct"
+    pool_size: int = 100
+    max_overflow: int = 10
+    # Connections to each server shared by all `processes` bot processes. When set, every process
+    # keeps half of its share open and opens the rest on demand, ignoring the two above
+    connection_budget: int | None = None
+    processes: int = 1
+    pool_timeout: float = 30.0
+    # Pooled connections idle for this many seconds are pinged before they are used
+    pool_stale_after: float | None = 30.0
+    # Pooled connections idle for this many seconds are closed by a reaper running every
+    # `pool_reap_interval` seconds, or discarded at checkout if it has not run yet. With the
+    # "direct" profile the server closes them too, shortly after
+    pool_idle_timeout: float | None = 600.0
+    pool_reap_interval: float = 60.0
+    # Prepared statements kept per connection by the "direct" profile
+    prepared_statement_cache_size: int = 500
+    # Read-only lookups go to this replica when set, with the primary's credentials and database
+    replica_host: str | None = None
+    replica_port: int | None = None
+    # Seconds a changed chat is read from the primary, so its new settings are visible at once
+    read_your_writes_window: float = 5.0
+
 
 class RedisSettings(BaseSettings):
     host: str
@@ -19,6 +57,46 @@ class RedisSettings(BaseSettings):
     password: SecretStr
     db: int
 
+    # Callers wait up to `pool_timeout` seconds for a free connection once all are in use
+    max_connections: int = 50
+    pool_timeout: float | None = 5.0
+    # Unset by default, the pub/sub listeners block on reads for as long as nothing is published
+    socket_timeout: float | None = None
+    socket_connect_timeout: float | None = 2.0
+    socket_keepalive: bool = True
+    health_check_interval: int = 30
+    # Retries of a command after a connection error or timeout, with exponential backoff
+    retry_attempts: int = 0
+    retry_backoff_base: float = 0.01
+    retry_backoff_cap: float = 0.5
+
+
+class CacheSettings(BaseSettings):
+    chat_maxsize: int = 10_000
+    chat_ttl: float = 60.0
+    chat_lock_timeout: float | None = None
+    chat_stale_ttl: float = 0.0
+    # Extend the Redis entries of chats in use every this many seconds (0 disables)
+    chat_touch_interval: float = 0.0
+    chat_settings_compact: bool = False
+    redis_tracking: bool = False
+    redis_tracking_maxsize: int = 50_000
+    # Settings changes are cached by a background publisher from the outbox table
+    outbox_batch_size: int = 500
+    outbox_poll_interval: float = 1.0
+    warm_up_limit: int = 0
+    warm_up_window_days: int | None = None
+    warm_up_batch_size: int = 1000
+    # Share of Redis maxmemory allowed per key prefix, checked by /memory
+    memory_budgets: dict[str, float] = {
+        "fsm": 0.2,
+        "RDChatModel": 0.1,
+        "RDChatSettingsModel": 0.3,
+        "RDChatMemberModel": 0.2,
+        "RDChatBotModel": 0.05,
+        "RDSetReportsSpecialChatPending": 0.05,
+    }
+
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict()
@@ -27,19 +105,65 @@ class Settings(BaseSettings):
 
     psql: PostgresSettings = PostgresSettings(_env_prefix="PSQL_")  # type: ignore[call-arg]
     redis: RedisSettings = RedisSettings(_env_prefix="REDIS_")  # type: ignore[call-arg]
+    cache: CacheSettings = CacheSettings(_env_prefix="CACHE_")
 
-    def psql_dsn(self) -> URL:
+    def psql_dsn(self, *, replica: bool = False) -> URL:
         return URL.create(
             drivername="postgresql+asyncpg",
             username=self.psql.user,
             password=self.psql.password.get_secret_value(),
-            host=self.psql.host,
-            port=self.psql.port,
+            host=self.psql.replica_host if replica else self.psql.host,
+            port=(self.psql.replica_port or self.psql.port) if replica else self.psql.port,
             database=self.psql.db,
         )
 
+    def psql_pool_limits(self) -> tuple[int, int]:
+        """Pool size and overflow of this process."""
+        if self.psql.connection_budget is None:
+            return self.psql.pool_size, self.psql.max_overflow
+
+        per_process = max(self.psql.connection_budget // self.psql.processes, 1)
+        pool_size = max(per_process // 2, 1)
+        return pool_size, per_process - pool_size
+
+    def psql_engine_options(self) -> dict[str, Any]:
+        idle_timeout = self.psql.pool_idle_timeout
+
+        if self.psql.profile == "pgbouncer":
+            connect_args = {
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+                "statement_cache_size": 0,
+            }
+        else:
+            connect_args = {
+                "prepared_statement_cache_size": self.psql.prepared_statement_cache_size,
+            }
+            if idle_timeout is not None:
+                connect_args["server_settings"] = {
+                    "idle_session_timeout": str(
+                        int((idle_timeout + IDLE_SESSION_TIMEOUT_MARGIN) * 1000)
+                    ),
+                }
+
+        pool_size, max_overflow = self.psql_pool_limits()
+
+        return {
+            "pool_size": pool_size,
+            "max_overflow": max_overflow,
+            "pool_timeout": self.psql.pool_timeout,
+            # Reusing the most recent connections lets the surplus sit idle until it is reaped
+            "pool_use_lifo": True,
+            "stale_after": self.psql.pool_stale_after,
+            "idle_timeout": idle_timeout,
+            "connect_args": connect_args,
+        }
+
     async def redis_dsn(self) -> Redis:
-        return Redis.from_url(
+        retry_on_error = (
+            [RedisConnectionError, RedisTimeoutError] if self.redis.retry_attempts else []
+        )
+        pool = InstrumentedConnectionPool.from_url(
             "redis://{username}:{password}@{host}:{port}/{db}".format(  # noqa: UP032
                 username=self.redis.user,
                 password=self.redis.password.get_secret_value(),
@@ -47,4 +171,20 @@ class Settings(BaseSettings):
                 port=self.redis.port,
                 db=self.redis.db,
             ),
+            max_connections=self.redis.max_connections,
+            timeout=self.redis.pool_timeout,
+            socket_timeout=self.redis.socket_timeout,
+            socket_connect_timeout=self.redis.socket_connect_timeout,
+            socket_keepalive=self.redis.socket_keepalive,
+            health_check_interval=self.redis.health_check_interval,
+            retry=Retry(
+                ExponentialBackoff(
+                    cap=self.redis.retry_backoff_cap, base=self.redis.retry_backoff_base
+                )
+                if self.redis.retry_attempts
+                else NoBackoff(),
+                self.redis.retry_attempts,
+            ),
+            retry_on_error=retry_on_error,
         )
+        return Redis.from_pool(pool)
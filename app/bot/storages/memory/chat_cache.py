@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+from redis.asyncio import Redis
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+
+from bot.storages.psql.chat.chat_model import RDChatModel
+from bot.storages.psql.chat.chat_settings_model import RDChatSettingsModel
+
+logger = logging.getLogger(__name__)
+
+
+class ChatCache:
+    """
+    Bounded TTL + LRU in-process cache for chat models.
+
+    Settings read from Redis are stored encoded until `set_decoded` swaps in their decoded form,
+    so chats whose updates never need them are not decoded at all.
+
+    Entries are evicted across all bot replicas through the Redis pub/sub channel that
+    `RDChatSettingsModel.save` and `RDChatSettingsModel.delete` publish to. The TTL only bounds
+    staleness when an invalidation message is lost (e.g. during a reconnect).
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 60.0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[int, tuple[float, RDChatModel, RDChatSettingsModel | bytes]] = (
+            OrderedDict()
+        )
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, chat_id: int) -> tuple[RDChatModel, RDChatSettingsModel | bytes] | None:
+        entry = self._data.get(chat_id)
+        if entry is None:
+            return None
+
+        expires_at, chat_model, chat_settings = entry
+        if expires_at < time.monotonic():
+            del self._data[chat_id]
+            return None
+
+        self._data.move_to_end(chat_id)
+        return chat_model, chat_settings
+
+    def set(self, chat_model: RDChatModel, chat_settings: RDChatSettingsModel | bytes) -> None:
+        self._data[chat_model.id] = (time.monotonic() + self.ttl, chat_model, chat_settings)
+        self._data.move_to_end(chat_model.id)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def set_decoded(self, chat_id: int, data: bytes, chat_settings: RDChatSettingsModel) -> None:
+        # An entry invalidated or replaced since `data` was read is left alone
+        entry = self._data.get(chat_id)
+        if entry is not None and entry[2] is data:
+            self._data[chat_id] = (entry[0], entry[1], chat_settings)
+
+    def invalidate(self, chat_id: int) -> None:
+        self._data.pop(chat_id, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    async def listen(self, redis: Redis) -> None:
+        while True:
+            try:
+                async with redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+                    await pubsub.subscribe(RDChatSettingsModel.invalidation_channel())
+
+                    # Anything could have changed while we were not subscribed
+                    self.clear()
+
+                    async for message in pubsub.listen():
+                        match message["data"]:
+                            case b"*":
+                                self.clear()
+                            case data:
+                                self.invalidate(int(data))
+
+            except (RedisConnectionError, RedisTimeoutError):  # noqa: PERF203
+                logger.exception("Chat cache invalidation listener disconnected, reconnecting")
+                self.clear()
+                await asyncio.sleep(1)
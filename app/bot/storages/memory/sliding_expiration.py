@@ -0,0 +1,58 @@
+import asyncio
+import logging
+from itertools import islice
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from bot.storages.psql.chat.chat_context import RDChatContext
+from bot.storages.psql.chat.chat_settings_model import RDChatSettingsModel
+
+logger = logging.getLogger(__name__)
+
+
+class SlidingExpiration:
+    """
+    Keep the cache entries of chats that are in use from expiring.
+
+    `CheckChatMiddleware` records every chat it resolves with `touch`, including in-process
+    cache hits that never reach Redis, and `run` extends the Redis entries of the recorded chats
+    every `interval` seconds with `RDChatContext.touch_many`. Chats that go idle stop being
+    touched and age out with their regular TTL.
+    """
+
+    def __init__(self, interval: float = 60.0, batch_size: int = 1000) -> None:
+        self.interval = interval
+        self.batch_size = batch_size
+        self._pending: set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def touch(self, chat_id: int) -> None:
+        self._pending.add(chat_id)
+
+    async def flush(self, redis: Redis) -> int:
+        pending, self._pending = self._pending, set()
+        chat_ids = iter(pending)
+        touched = 0
+
+        while batch := list(islice(chat_ids, self.batch_size)):
+            touched += await RDChatContext.touch_many(
+                redis, batch, RDChatSettingsModel.default_ttl()
+            )
+
+        return touched
+
+    async def run(self, redis: Redis) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+
+            try:
+                touched = await self.flush(redis)
+
+            except RedisError:  # noqa: PERF203
+                logger.exception("Failed to extend the expiration of cached chats")
+
+            else:
+                logger.debug("Extended the expiration of %d cached chats", touched)
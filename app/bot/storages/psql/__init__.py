@@ -1,12 +1,25 @@
 from .base import Base, close_db, create_db_session_pool, init_db
-from .chat import DBChatModel, DBChatSettingsModel, RDChatModel, RDChatSettingsModel
+from .chat import (
+    ChatSettingsOutbox,
+    ChatSettingsRepository,
+    DBChatModel,
+    DBChatSettingsModel,
+    RDChatContext,
+    RDChatModel,
+    RDChatSettingsModel,
+)
+from .routing import ReadSessionRouter
 
 __all__ = [
     "Base",
+    "ChatSettingsOutbox",
+    "ChatSettingsRepository",
     "DBChatModel",
     "DBChatSettingsModel",
+    "RDChatContext",
     "RDChatModel",
     "RDChatSettingsModel",
+    "ReadSessionRouter",
     "close_db",
     "create_db_session_pool",
     "init_db",
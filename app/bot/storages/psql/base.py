@@ -1,12 +1,43 @@
+import hashlib
+import logging
+from typing import Final
+
+from sqlalchemy import Column, MetaData, String, Table, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Dialect
 from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
     AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.schema import CreateColumn, CreateIndex, CreateTable
 
 from bot.settings import Settings
+from bot.storages.psql.utils.pool import InstrumentedQueuePool
+
+logger = logging.getLogger(__name__)
+
+# Replicas that start at once apply the schema one after another
+SCHEMA_LOCK_ID: Final[int] = 0x736368656D61
+SCHEMA_FINGERPRINT_KEY: Final[str] = "schema_fingerprint"
+
+schema_meta = Table(
+    "schema_meta",
+    MetaData(),
+    Column("key", String(64), primary_key=True),
+    Column("value", String(64), nullable=False),
+)
+information_schema_columns = Table(
+    "columns",
+    MetaData(),
+    Column("table_schema", String),
+    Column("table_name", String),
+    Column("column_name", String),
+    schema="information_schema",
+)
 
 
 class Base(DeclarativeBase):
@@ -22,21 +53,107 @@ class Base(DeclarativeBase):
 
 async def create_db_session_pool(
     settings: Settings,
+    *,
+    replica: bool = False,
 ) -> tuple[AsyncEngine, async_sessionmaker[AsyncSession]]:
     engine: AsyncEngine = create_async_engine(
-        settings.psql_dsn(),
+        settings.psql_dsn(replica=replica),
         echo=False,
-        max_overflow=10,
-        pool_size=100,
+        poolclass=InstrumentedQueuePool,
+        **settings.psql_engine_options(),
     )
 
     return engine, async_sessionmaker(engine, expire_on_commit=False)
 
 
+def schema_fingerprint(dialect: Dialect) -> str:
+    """Hash of the DDL that creates every table and index of `Base.metadata`."""
+    digest = hashlib.sha256()
+
+    for table in Base.metadata.sorted_tables:
+        digest.update(str(CreateTable(table).compile(dialect=dialect)).encode())
+        for index in sorted(table.indexes, key=lambda index: index.name or ""):
+            digest.update(str(CreateIndex(index).compile(dialect=dialect)).encode())
+
+    return digest.hexdigest()
+
+
+async def apply_additive_schema(conn: AsyncConnection) -> None:
+    """
+    Create missing tables, columns and indexes with `IF NOT EXISTS` DDL.
+
+    Existing columns are read with a single catalog query, instead of reflecting every table.
+    Changed or dropped columns, constraints on added columns and other non-additive changes are
+    not applied and need a migration. A new `NOT NULL` column without a `server_default` has no
+    value for the existing rows, so it is added as nullable and logged: backfill it and set
+    `NOT NULL` in a migration.
+    """
+    for table in Base.metadata.sorted_tables:
+        await conn.execute(CreateTable(table, if_not_exists=True))
+
+    existing = set(
+        await conn.execute(
+            select(
+                information_schema_columns.c.table_name,
+                information_schema_columns.c.column_name,
+            ).where(information_schema_columns.c.table_schema == func.current_schema()),
+        ),
+    )
+
+    for table in Base.metadata.sorted_tables:
+        for column in table.columns:
+            if (table.name, column.name) in existing:
+                continue
+
+            if not column.nullable and column.server_default is None and column.identity is None:
+                logger.warning(
+                    "Adding %s.%s as nullable, existing rows have no value for it",
+                    table.name,
+                    column.name,
+                )
+                column = column._copy()  # noqa: PLW2901, SLF001
+                column.nullable = True
+
+            column_ddl = CreateColumn(column).compile(dialect=conn.dialect)
+            await conn.execute(
+                text(f"ALTER TABLE {table.name} ADD COLUMN IF NOT EXISTS {column_ddl}"),
+            )
+
+        for index in table.indexes:
+            await conn.execute(CreateIndex(index, if_not_exists=True))
+
+
 async def init_db(engine: AsyncEngine) -> None:
+    """
+    Bring the schema up to date, skipping all DDL when the stored fingerprint matches.
+
+    The fingerprint of `Base.metadata` is kept in `schema_meta`, so a restart with an unchanged
+    schema costs a single lookup instead of the catalog introspection of `create_all`.
+    """
+    fingerprint = schema_fingerprint(engine.dialect)
+
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(select(func.pg_advisory_xact_lock(SCHEMA_LOCK_ID)))
+        await conn.execute(CreateTable(schema_meta, if_not_exists=True))
+
+        stored = await conn.scalar(
+            select(schema_meta.c.value).where(schema_meta.c.key == SCHEMA_FINGERPRINT_KEY),
+        )
+        if stored == fingerprint:
+            return
+
+        logger.info("Schema fingerprint changed, applying additive changes")
+        await apply_additive_schema(conn)
+
+        upsert = insert(schema_meta).values(key=SCHEMA_FINGERPRINT_KEY, value=fingerprint)
+        await conn.execute(
+            upsert.on_conflict_do_update(
+                index_elements=[schema_meta.c.key],
+                set_={"value": upsert.excluded.value},
+            ),
+        )
 
 
-async def close_db(engine: AsyncEngine) -> None:
-    await engine.dispose()
+async def close_db(*engines: AsyncEngine) -> None:
+    for engine in engines:
+        await engine.dispose()
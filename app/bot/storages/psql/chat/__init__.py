@@ -1,9 +1,17 @@
+from .chat_context import RDChatContext, warm_up_chat_contexts
 from .chat_model import DBChatModel, RDChatModel
 from .chat_settings_model import DBChatSettingsModel, RDChatSettingsModel
+from .chat_settings_outbox import ChatSettingsOutbox, DBChatSettingsOutboxModel
+from .chat_settings_repository import ChatSettingsRepository
 
 __all__ = [
     "DBChatModel",
     "RDChatModel",
     "DBChatSettingsModel",
     "RDChatSettingsModel",
+    "RDChatContext",
+    "ChatSettingsRepository",
+    "ChatSettingsOutbox",
+    "DBChatSettingsOutboxModel",
+    "warm_up_chat_contexts",
 ]
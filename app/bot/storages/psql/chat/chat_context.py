@@ -0,0 +1,245 @@
+import random
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from typing import Final, Self
+
+import msgspec
+from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+from redis.typing import ExpiryT
+from sqlalchemy import String, literal, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.storages.psql.chat.chat_model import DBChatModel, RDChatModel
+from bot.storages.psql.chat.chat_settings_model import DBChatSettingsModel, RDChatSettingsModel
+from bot.storages.psql.routing import ReadSessionRouter
+from bot.storages.redis.base import redis_transaction
+
+# Extends the chat, settings and fresh marker keys of every chat whose settings entry is past
+# half of its lifetime. Missing keys are left alone, so a stale entry does not turn fresh again
+TOUCH_SCRIPT: Final[str] = """
+local touched = 0
+for i = 1, #KEYS, 3 do
+    local pttl = redis.call('PTTL', KEYS[i + 1])
+    if pttl >= 0 and pttl < tonumber(ARGV[2]) then
+        redis.call('PEXPIRE', KEYS[i], ARGV[1])
+        redis.call('PEXPIRE', KEYS[i + 1], ARGV[1])
+        redis.call('PEXPIRE', KEYS[i + 2], ARGV[3])
+        touched = touched + 1
+    end
+end
+return touched
+"""
+
+
+class RDChatContext(msgspec.Struct, kw_only=True):
+    """
+    Both cached chat structs, fetched with one MGET and stored with one MULTI/EXEC.
+
+    The keys are the same as `RDChatModel.key` and `RDChatSettingsModel.key`, so entries written
+    here are visible to the per-model `get` methods and vice versa.
+    """
+
+    chat_model: RDChatModel
+    chat_settings: RDChatSettingsModel
+    is_stale: bool = False
+
+    @classmethod
+    def lock_key(cls, chat_id: int | str) -> str:
+        return f"{cls.__name__}:lock:{chat_id}"
+
+    @classmethod
+    async def fetch(cls, redis: Redis, chat_id: int | str) -> list[bytes | None]:
+        keys = [RDChatModel.key(chat_id), RDChatSettingsModel.key(chat_id)]
+        if RDChatSettingsModel.stale_ttl:
+            keys.append(RDChatSettingsModel.fresh_key(chat_id))
+
+        # All keys share the tracked local cache when it is enabled
+        return await RDChatSettingsModel.mget(redis, keys)
+
+    @classmethod
+    def decode_chat_model(
+        cls,
+        chat_model_data: bytes | None,
+        chat_settings_data: bytes | None,
+        fresh_data: bytes | None = None,
+    ) -> tuple[RDChatModel, bool] | None:
+        """
+        Decode only the chat model of a fetched entry and tell whether the entry is stale.
+
+        The settings entry is only checked for presence, so it can be decoded when needed.
+        """
+        if chat_model_data and chat_settings_data:
+            chat_model = RDChatModel.decode(chat_model_data)
+            if chat_model is None:
+                return None
+
+            # The fresh marker expires at the soft expiry, the entry `stale_ttl` later
+            return chat_model, bool(RDChatSettingsModel.stale_ttl) and fresh_data is None
+        return None
+
+    @classmethod
+    def decode(
+        cls,
+        chat_model_data: bytes | None,
+        chat_settings_data: bytes | None,
+        fresh_data: bytes | None = None,
+    ) -> Self | None:
+        decoded = cls.decode_chat_model(chat_model_data, chat_settings_data, fresh_data)
+        if decoded is None:
+            return None
+
+        chat_settings = RDChatSettingsModel.decode(chat_settings_data)
+        if chat_settings is None:
+            return None
+
+        chat_model, is_stale = decoded
+        return cls(chat_model=chat_model, chat_settings=chat_settings, is_stale=is_stale)
+
+    @classmethod
+    async def get(cls, redis: Redis, chat_id: int | str) -> Self | None:
+        return cls.decode(*await cls.fetch(redis, chat_id))
+
+    @classmethod
+    async def upsert(
+        cls,
+        session: AsyncSession,
+        *,
+        chat_id: int,
+        chat_type: str,
+        username: str | None,
+        language_code: str,
+    ) -> Self:
+        """
+        Register the chat and its settings with a single data-modifying CTE.
+
+        Both rows are upserted and returned in one round trip. The caller is responsible for
+        committing the session.
+        """
+        chat_cte = (
+            insert(DBChatModel)
+            .values(id=chat_id, chat_type=chat_type, username=username)
+            .on_conflict_do_update(index_elements=["id"], set_={"username": username})
+            .returning(*DBChatModel.__table__.columns)
+            .cte("chat")
+        )
+        chat_settings_cte = (
+            insert(DBChatSettingsModel)
+            .from_select(
+                ["id", "language_code"],
+                select(chat_cte.c.id, literal(language_code, String)),
+            )
+            .on_conflict_do_update(
+                index_elements=["id"],
+                set_={
+                    "language_code": DBChatSettingsModel.language_code,  # Required for returning
+                },
+            )
+            .returning(*DBChatSettingsModel.__table__.columns)
+            .cte("chat_settings")
+        )
+        stmt = select(
+            *(column.label(f"chat_{column.name}") for column in chat_cte.c),
+            *(column.label(f"chat_settings_{column.name}") for column in chat_settings_cte.c),
+        ).join_from(chat_cte, chat_settings_cte, chat_cte.c.id == chat_settings_cte.c.id)
+
+        row = (await session.execute(stmt)).mappings().one()
+
+        return cls(
+            chat_model=RDChatModel.from_mapping(
+                {column.name: row[f"chat_{column.name}"] for column in chat_cte.c},
+            ),
+            chat_settings=RDChatSettingsModel.from_mapping(
+                {
+                    column.name: row[f"chat_settings_{column.name}"]
+                    for column in chat_settings_cte.c
+                },
+            ),
+        )
+
+    def queue_save(self, pipe: Pipeline, ttl: ExpiryT) -> None:
+        # The chat model lives as long as the settings entry, including the stale window
+        self.chat_model.queue_save(pipe, RDChatSettingsModel.hard_ttl(ttl))
+        # Freshly loaded entries do not invalidate anything, so nothing is published
+        self.chat_settings.queue_save(pipe, ttl, publish=False)
+
+    async def save(self, redis: Redis, ttl: ExpiryT) -> Self:
+        # Readers treat an entry with only one of the keys as a miss, so write both at once
+        async with redis_transaction(redis) as pipe:
+            self.queue_save(pipe, ttl)
+        return self
+
+    @classmethod
+    async def touch_many(cls, redis: Redis, chat_ids: Iterable[int], ttl: ExpiryT) -> int:
+        """
+        Restart the expiration of cached chats as if they were written now with `ttl`.
+
+        Only entries past half of their lifetime are touched, so hot chats are extended about
+        once per TTL. `TOUCH_SCRIPT` only runs PTTL and PEXPIRE, the payloads are never read.
+        Returns the number of touched chats.
+        """
+        keys = [
+            key
+            for chat_id in chat_ids
+            for key in (
+                RDChatModel.key(chat_id),
+                RDChatSettingsModel.key(chat_id),
+                RDChatSettingsModel.fresh_key(chat_id),
+            )
+        ]
+        if not keys:
+            return 0
+
+        if not isinstance(ttl, timedelta):
+            ttl = timedelta(seconds=ttl)
+        hard_ttl_ms = int(RDChatSettingsModel.hard_ttl(ttl) / timedelta(milliseconds=1))
+
+        return await redis.register_script(TOUCH_SCRIPT)(
+            keys=keys,
+            args=[hard_ttl_ms, hard_ttl_ms // 2, int(ttl / timedelta(milliseconds=1))],
+        )
+
+
+async def warm_up_chat_contexts(
+    db_session: async_sessionmaker[AsyncSession] | ReadSessionRouter,
+    redis: Redis,
+    limit: int,
+    window: timedelta | None = None,
+    batch_size: int = 1000,
+) -> int:
+    """
+    Stream the most recently registered chats from Postgres into Redis.
+
+    Rows are read through a server-side cursor and written in pipelined batches with jittered
+    TTLs, so the warmed entries do not expire all at once.
+    """
+    stmt = (
+        select(DBChatModel, DBChatSettingsModel)
+        .join(DBChatSettingsModel, DBChatSettingsModel.id == DBChatModel.id)
+        .order_by(DBChatModel.registration_datetime.desc())
+        .limit(limit)
+        .execution_options(yield_per=batch_size)
+    )
+    if window is not None:
+        # registration_datetime is stored as naive UTC
+        stmt = stmt.where(DBChatModel.registration_datetime >= datetime.utcnow() - window)
+
+    warmed = 0
+
+    async with db_session() as session:
+        result = await session.stream(stmt)
+
+        async for partition in result.partitions():
+            async with redis.pipeline(transaction=False) as pipe:
+                for chat_model, chat_settings in partition:
+                    RDChatContext(
+                        chat_model=RDChatModel.from_orm(chat_model),
+                        chat_settings=RDChatSettingsModel.from_orm(chat_settings),
+                    ).queue_save(pipe, timedelta(minutes=random.randint(45, 75)))
+
+                await pipe.execute()
+
+            warmed += len(partition)
+
+    return warmed
@@ -1,17 +1,16 @@
 from datetime import datetime
-from typing import Final, Literal, Self
+from typing import Literal
 
 import msgspec
 from redis.asyncio import Redis
-from redis.typing import ExpiryT
 from sqlalchemy import BigInteger, CheckConstraint, String
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql import expression
 
 from bot.storages.psql.base import Base
 from bot.storages.psql.utils.alchemy_struct import AlchemyStruct
-
-ENCODER: Final[msgspec.msgpack.Encoder] = msgspec.msgpack.Encoder()
+from bot.storages.redis.base import RedisStruct
+from bot.storages.redis.utils.scan import unlink_by_pattern
 
 
 class DBChatModel(Base):
@@ -32,31 +31,15 @@ class DBChatModel(Base):
     __table_args__ = (CheckConstraint("chat_type in ('group', 'supergroup', 'channel')"),)
 
 
-class RDChatModel(AlchemyStruct, kw_only=True, array_like=True):
+class RDChatModel(AlchemyStruct, RedisStruct, kw_only=True, array_like=True):
     id: int
     chat_type: Literal["group", "supergroup", "channel"]
     username: str | None = msgspec.field(default=None)
     registration_datetime: datetime
 
-    @classmethod
-    def key(cls, chat_id: int | str) -> str:
-        return f"{cls.__name__}:{chat_id}"
-
-    @classmethod
-    async def get(cls, redis: Redis, chat_id: int | str) -> Self | None:
-        data = await redis.get(cls.key(chat_id))
-        if data:
-            return msgspec.msgpack.decode(data, type=cls)
-        return None
-
-    async def save(self, redis: Redis, ttl: ExpiryT) -> int:
-        return await redis.setex(self.key(self.id), ttl, ENCODER.encode(self))
-
-    @classmethod
-    async def delete(cls, redis: Redis, chat_id: int | str) -> int:
-        return await redis.delete(cls.key(chat_id))
+    def key_parts(self) -> tuple[int]:
+        return (self.id,)
 
     @classmethod
     async def delete_all(cls, redis: Redis) -> int:
-        keys = await redis.keys(f"{cls.__name__}:*")
-        return await redis.delete(*keys)
+        return await unlink_by_pattern(redis, f"{cls.__name__}:*")
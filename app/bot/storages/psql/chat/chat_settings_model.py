@@ -1,18 +1,19 @@
 import random
 from datetime import timedelta
 from enum import Enum
-from typing import Final, Self
+from typing import Any, ClassVar, Final, Self
 
 import msgspec
 from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
 from redis.typing import ExpiryT
 from sqlalchemy import BigInteger, ForeignKey, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from bot.storages.psql.base import Base
 from bot.storages.psql.utils.alchemy_struct import AlchemyStruct
-
-ENCODER: Final[msgspec.msgpack.Encoder] = msgspec.msgpack.Encoder()
+from bot.storages.redis.base import ENCODER, ModelID, RedisStruct, as_key_parts
+from bot.storages.redis.utils.scan import unlink_by_pattern
 
 
 class GreetingFarewellType(Enum):
@@ -79,7 +80,16 @@ class DBChatSettingsModel(Base):
     farewell_topic_id: Mapped[int] = mapped_column(BigInteger, nullable=True)
 
 
-class RDChatSettingsModel(AlchemyStruct, kw_only=True, array_like=True):
+class RDChatSettingsModel(AlchemyStruct, RedisStruct, kw_only=True, array_like=True):
+    # How long an entry may be served stale past its soft expiry while it is being refreshed.
+    # The soft expiry is the TTL of the `fresh_key` marker, so the payload does not carry it.
+    # Zero disables stale-while-revalidate: entries are removed by Redis at their soft expiry.
+    stale_ttl: ClassVar[timedelta] = timedelta(0)
+    # Store only the fields that differ from the column defaults, see `encode_compact`.
+    # Both formats are always decoded, so it can be toggled without flushing Redis. Replicas
+    # that predate the schema header cannot read compact entries, enable it once none are left.
+    compact: ClassVar[bool] = False
+
     id: int
     language_code: str
     timezone: str | None = msgspec.field(default=None)
@@ -108,26 +118,125 @@ class RDChatSettingsModel(AlchemyStruct, kw_only=True, array_like=True):
     farewell_sticker_id: str | None = msgspec.field(default=None)
     farewell_topic_id: int | None = msgspec.field(default=None)
 
+    def key_parts(self) -> tuple[int]:
+        return (self.id,)
+
+    @classmethod
+    def fresh_key(cls, chat_id: int | str) -> str:
+        return cls.key(chat_id, "fresh")
+
+    @classmethod
+    def invalidation_channel(cls) -> str:
+        return f"{cls.__name__}:invalidate"
+
+    @classmethod
+    def default_ttl(cls) -> timedelta:
+        return timedelta(minutes=random.randint(45, 90))
+
     @classmethod
-    def key(cls, chat_id: int | str) -> str:
-        return f"{cls.__name__}:{chat_id}"
+    def hard_ttl(cls, ttl: ExpiryT) -> timedelta:
+        if not isinstance(ttl, timedelta):
+            ttl = timedelta(seconds=ttl)
+        return ttl + cls.stale_ttl
+
+    def encode(self) -> bytes:
+        if self.compact:
+            # Always versioned, replicas that predate the header fail on the format byte
+            return self.pack(self.encode_compact(), versioned=True)
+        return super().encode()
+
+    def encode_compact(self) -> bytes:
+        """
+        Encode as the format byte followed by `{field index: value}`.
+
+        Only the fields that differ from `COMPACT_DEFAULTS` are stored.
+        """
+        return COMPACT_FORMAT_V1 + ENCODER.encode(
+            {
+                index: value
+                for index, (value, default) in enumerate(
+                    zip(msgspec.structs.astuple(self), COMPACT_DEFAULTS, strict=True),
+                )
+                if value != default
+            },
+        )
 
     @classmethod
-    async def get(cls, redis: Redis, chat_id: int | str) -> Self | None:
-        data = await redis.get(cls.key(chat_id))
-        if data:
-            return msgspec.msgpack.decode(data, type=cls)
-        return None
+    def decode_compact(cls, body: bytes) -> Self:
+        fields = list(COMPACT_DEFAULTS)
+        for index, value in COMPACT_DECODER.decode(body[1:]).items():
+            fields[index] = value
 
-    async def save(self, redis: Redis, ttl: ExpiryT | None = None) -> bool:
-        ttl = ttl or timedelta(minutes=random.randint(45, 90))
-        return await redis.setex(self.key(self.id), ttl, ENCODER.encode(self))
+        return msgspec.convert(fields, cls)
 
     @classmethod
-    async def delete(cls, redis: Redis, chat_id: int | str) -> int:
-        return await redis.delete(cls.key(chat_id))
+    def decode(cls, data: bytes) -> Self | None:
+        try:
+            version, body = cls.unpack(data)
+            if body[:1] != COMPACT_FORMAT_V1:
+                return super().decode(data)
+
+            # Compact entries of other versions are relative to defaults that are unknown here
+            if version != cls.schema_version:
+                return None
+
+            return cls.decode_compact(body)
+
+        except (msgspec.DecodeError, IndexError, TypeError, ValueError):
+            # Written in an incompatible format, treat it as a cache miss
+            return None
+
+    def queue_save(
+        self,
+        pipe: Pipeline,
+        ttl: ExpiryT | None = None,
+        *,
+        publish: bool = True,
+    ) -> None:
+        ttl = ttl or self.default_ttl()
+        super().queue_save(pipe, ttl)
+        if self.stale_ttl:
+            pipe.set(self.fresh_key(self.id), 1, ex=ttl)
+        if publish:
+            pipe.publish(self.invalidation_channel(), self.id)
+
+    @classmethod
+    def queue_delete(cls, pipe: Pipeline, model_ids: list[ModelID]) -> int:
+        counted = super().queue_delete(pipe, model_ids)
+        pipe.delete(*(cls.fresh_key(*as_key_parts(model_id)) for model_id in model_ids))
+        for model_id in model_ids:
+            (chat_id,) = as_key_parts(model_id)
+            pipe.publish(cls.invalidation_channel(), chat_id)
+        return counted
 
     @classmethod
     async def delete_all(cls, redis: Redis) -> int:
-        keys = await redis.keys(f"{cls.__name__}:*")
-        return await redis.delete(*keys)
+        deleted = await unlink_by_pattern(redis, f"{cls.__name__}:*")
+        await redis.publish(cls.invalidation_channel(), "*")
+        return deleted
+
+
+def _column_defaults() -> tuple[Any, ...]:
+    """Defaults of the `DBChatSettingsModel` columns in `RDChatSettingsModel` field order."""
+    defaults: dict[str, Any] = {"id": 0}
+
+    for column in DBChatSettingsModel.__table__.columns:
+        if column.name in defaults:
+            continue
+
+        if column.default is not None and column.default.is_scalar:
+            defaults[column.name] = column.default.arg
+        elif column.server_default is not None:
+            defaults[column.name] = column.server_default.arg
+        else:
+            defaults[column.name] = None
+
+    return msgspec.structs.astuple(RDChatSettingsModel.from_mapping(defaults))
+
+
+# Never the first byte of the plain payload, which is a msgpack array
+COMPACT_FORMAT_V1: Final[bytes] = b"\x01"
+COMPACT_DEFAULTS: Final[tuple[Any, ...]] = _column_defaults()
+COMPACT_DECODER: Final[msgspec.msgpack.Decoder[dict[int, Any]]] = msgspec.msgpack.Decoder(
+    dict[int, Any]
+)
@@ -0,0 +1,149 @@
+import asyncio
+import contextlib
+import logging
+from datetime import datetime
+from typing import Final
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import ARRAY, BigInteger, Identity, any_, delete, func, literal, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import expression
+
+from bot.storages.psql.base import Base
+from bot.storages.psql.chat.chat_settings_model import DBChatSettingsModel, RDChatSettingsModel
+
+logger = logging.getLogger(__name__)
+
+# Only one replica publishes at a time, so an older row can never overwrite a newer one in Redis
+PUBLISHER_LOCK_ID: Final[int] = 0x6F7574626F78
+
+
+class DBChatSettingsOutboxModel(Base):
+    __tablename__ = "chats_settings_outbox"
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    chat_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, server_default=expression.text("(now() AT TIME ZONE 'UTC'::text)")
+    )
+
+
+class ChatSettingsOutbox:
+    """
+    Propagates committed chat settings changes to Redis in the background.
+
+    `ChatSettingsRepository` records the id of every changed chat in `chats_settings_outbox`
+    within the same statement as the change, then calls `evict` and `wake`. `run` claims batches
+    of recorded chats, reads their current settings and caches them with one pipeline, publishing
+    the invalidations for the in-process caches. The outbox rows are deleted in the transaction
+    that read the settings, which commits only after Redis accepted the pipeline, so a change is
+    retried until it reaches Redis.
+
+    Only the replica that holds the publisher lock flushes, and others see the change once it
+    polls, up to `poll_interval` seconds later. `evict` closes that window in the common case.
+    """
+
+    def __init__(
+        self,
+        db_session: async_sessionmaker[AsyncSession],
+        redis: Redis,
+        batch_size: int = 500,
+        poll_interval: float = 1.0,
+        max_backoff: float = 30.0,
+    ) -> None:
+        self.db_session = db_session
+        self.redis = redis
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_backoff = max_backoff
+        self._wakeup = asyncio.Event()
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    async def evict(self, chat_id: int) -> None:
+        """
+        Drop the cached settings of a chat and invalidate the in-process caches right away.
+
+        Best effort, a failure only leaves the change to `run`. Nothing is written, so unlike a
+        save from the writing replica, an eviction never puts an older row over a newer one.
+        """
+        try:
+            await RDChatSettingsModel.delete(self.redis, chat_id)
+
+        except RedisError:
+            logger.warning("Failed to evict cached settings of chat %s", chat_id, exc_info=True)
+
+    async def flush(self) -> int:
+        """Publish one batch and return the number of outbox rows, or -1 if it is locked."""
+        async with self.db_session() as session:
+            if not await session.scalar(select(func.pg_try_advisory_xact_lock(PUBLISHER_LOCK_ID))):
+                return -1
+
+            claimed = (
+                select(DBChatSettingsOutboxModel.id)
+                .order_by(DBChatSettingsOutboxModel.id)
+                .limit(self.batch_size)
+                .scalar_subquery()
+            )
+            recorded = list(
+                await session.scalars(
+                    delete(DBChatSettingsOutboxModel)
+                    .where(DBChatSettingsOutboxModel.id.in_(claimed))
+                    .returning(DBChatSettingsOutboxModel.chat_id)
+                ),
+            )
+            if not recorded:
+                return 0
+
+            chat_ids = set(recorded)
+
+            rows = await session.scalars(
+                # A single array parameter keeps the SQL, and its prepared statement, the same for
+                # any number of chats
+                select(DBChatSettingsModel).where(
+                    DBChatSettingsModel.id == any_(literal(list(chat_ids), ARRAY(BigInteger))),
+                ),
+            )
+            chats_settings = [RDChatSettingsModel.from_orm(row) for row in rows]
+            deleted = chat_ids - {chat_settings.id for chat_settings in chats_settings}
+
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for chat_settings in chats_settings:
+                    chat_settings.queue_save(pipe)
+                if deleted:
+                    RDChatSettingsModel.queue_delete(pipe, list(deleted))
+                await pipe.execute()
+
+            await session.commit()
+
+        return len(recorded)
+
+    async def run(self) -> None:
+        backoff = self.poll_interval
+
+        while True:
+            self._wakeup.clear()
+
+            try:
+                published = await self.flush()
+
+            except (RedisError, SQLAlchemyError, OSError):
+                logger.exception(
+                    "Failed to publish chat settings changes, retrying in %ss", backoff
+                )
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+
+            backoff = self.poll_interval
+
+            # A full batch means there is probably more to publish
+            if published >= self.batch_size:
+                continue
+
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
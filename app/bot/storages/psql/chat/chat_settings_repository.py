@@ -0,0 +1,202 @@
+from collections.abc import Mapping
+from typing import Any, Final, Literal, TypeAlias
+
+from sqlalchemy import Column, ColumnElement, case, insert, not_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from bot.storages.psql.chat.chat_settings_model import (
+    DBChatSettingsModel,
+    GreetingFarewellType,
+    RDChatSettingsModel,
+    ReportPolicy,
+)
+from bot.storages.psql.chat.chat_settings_outbox import (
+    ChatSettingsOutbox,
+    DBChatSettingsOutboxModel,
+)
+from bot.storages.psql.routing import ReadSessionRouter
+
+ToggleField: TypeAlias = Literal[
+    "kus_enabled",
+    "allow_kus_admin",
+    "admin_tools_enabled",
+    "reports_enabled",
+    "greeting_enabled",
+    "farewell_enabled",
+]
+GreetingFarewell: TypeAlias = Literal["greeting", "farewell"]
+
+MEDIA_COLUMN_SUFFIXES: Final[dict[GreetingFarewellType, str]] = {
+    GreetingFarewellType.PHOTO: "photo_id",
+    GreetingFarewellType.VIDEO: "video_id",
+    GreetingFarewellType.GIF: "gif_id",
+    GreetingFarewellType.STICKER: "sticker_id",
+}
+
+
+def _column(name: str) -> Column[Any]:
+    return DBChatSettingsModel.__table__.columns[name]
+
+
+def _media_column(kind: GreetingFarewell, media_type: GreetingFarewellType) -> Column[Any]:
+    return _column(f"{kind}_{MEDIA_COLUMN_SUFFIXES[media_type]}")
+
+
+class ChatSettingsRepository:
+    """
+    Chat settings changes, each applied with a single `UPDATE ... RETURNING` statement.
+
+    The same statement records the change in the outbox. After the commit the cached settings are
+    evicted, so every replica reloads them from Postgres on its next update, and
+    `ChatSettingsOutbox` caches the new settings in the background, even if the eviction failed.
+    Changed chats are reported to `read_session_router`, which reads them from the primary for a
+    while. Methods return the updated settings, or `None` when the chat is not registered or the
+    conditional `reset_*` methods had nothing to reset.
+    """
+
+    def __init__(
+        self,
+        db_session: async_sessionmaker[AsyncSession],
+        outbox: ChatSettingsOutbox,
+        read_session_router: ReadSessionRouter,
+    ) -> None:
+        self.db_session = db_session
+        self.outbox = outbox
+        self.read_session_router = read_session_router
+
+    async def update(
+        self,
+        chat_id: int,
+        values: Mapping[Column[Any], Any],
+        *where: ColumnElement[bool],
+    ) -> RDChatSettingsModel | None:
+        updated = (
+            update(DBChatSettingsModel)
+            .where(DBChatSettingsModel.id == chat_id, *where)
+            .values(dict(values))
+            .returning(*DBChatSettingsModel.__table__.columns)
+            .cte("updated")
+        )
+        recorded = (
+            insert(DBChatSettingsOutboxModel)
+            .from_select(["chat_id"], select(updated.c.id))
+            .cte("recorded")
+        )
+        stmt = select(updated).add_cte(recorded)
+
+        async with self.db_session() as session:
+            row = (await session.execute(stmt)).mappings().one_or_none()
+            await session.commit()
+
+        if row is None:
+            return None
+
+        self.read_session_router.written(chat_id)
+        await self.outbox.evict(chat_id)
+        self.outbox.wake()
+        return RDChatSettingsModel.from_mapping(row)
+
+    async def toggle(self, chat_id: int, field: ToggleField) -> RDChatSettingsModel | None:
+        column = _column(field)
+        return await self.update(chat_id, {column: not_(column)})
+
+    async def set_language(self, chat_id: int, language_code: str) -> RDChatSettingsModel | None:
+        return await self.update(chat_id, {DBChatSettingsModel.language_code: language_code})
+
+    async def set_timezone(self, chat_id: int, timezone: str) -> RDChatSettingsModel | None:
+        return await self.update(chat_id, {DBChatSettingsModel.timezone: timezone})
+
+    async def set_reports_special_chat(
+        self,
+        chat_id: int,
+        special_chat_id: int,
+    ) -> RDChatSettingsModel | None:
+        return await self.update(
+            chat_id,
+            {
+                DBChatSettingsModel.reports_special_chat_id: special_chat_id,
+                DBChatSettingsModel.reports_policy: ReportPolicy.SPECIAL_CHAT.value,
+            },
+        )
+
+    async def set_type(
+        self,
+        chat_id: int,
+        kind: GreetingFarewell,
+        media_type: GreetingFarewellType,
+    ) -> RDChatSettingsModel | None:
+        return await self.update(chat_id, {_column(f"{kind}_type"): media_type.value})
+
+    async def set_text(
+        self,
+        chat_id: int,
+        kind: GreetingFarewell,
+        text: str,
+    ) -> RDChatSettingsModel | None:
+        return await self.update(chat_id, {_column(f"{kind}_text"): text})
+
+    async def set_media(
+        self,
+        chat_id: int,
+        kind: GreetingFarewell,
+        media_type: GreetingFarewellType,
+        file_id: str,
+    ) -> RDChatSettingsModel | None:
+        """Store the media and make it the type that is sent."""
+        return await self.update(
+            chat_id,
+            {
+                _media_column(kind, media_type): file_id,
+                _column(f"{kind}_type"): media_type.value,
+            },
+        )
+
+    async def set_topic_id(
+        self,
+        chat_id: int,
+        kind: GreetingFarewell,
+        topic_id: int | None,
+    ) -> RDChatSettingsModel | None:
+        return await self.update(chat_id, {_column(f"{kind}_topic_id"): topic_id})
+
+    async def reset_text(self, chat_id: int, kind: GreetingFarewell) -> RDChatSettingsModel | None:
+        column = _column(f"{kind}_text")
+        return await self.update(chat_id, {column: None}, column.is_not(None))
+
+    async def reset_media(
+        self,
+        chat_id: int,
+        kind: GreetingFarewell,
+    ) -> RDChatSettingsModel | None:
+        """Remove the media of the currently selected type, if there is any."""
+        type_column = _column(f"{kind}_type")
+        current_media = case(
+            {
+                media_type.value: _media_column(kind, media_type)
+                for media_type in MEDIA_COLUMN_SUFFIXES
+            },
+            value=type_column,
+        )
+
+        return await self.update(
+            chat_id,
+            {
+                _media_column(kind, media_type): case(
+                    (type_column == media_type.value, None),
+                    else_=_media_column(kind, media_type),
+                )
+                for media_type in MEDIA_COLUMN_SUFFIXES
+            },
+            current_media.is_not(None),
+        )
+
+    async def reset_all(self, chat_id: int, kind: GreetingFarewell) -> RDChatSettingsModel | None:
+        return await self.update(
+            chat_id,
+            {
+                _column(f"{kind}_type"): GreetingFarewellType.PHOTO.value,
+                _column(f"{kind}_text"): None,
+                _column(f"{kind}_topic_id"): None,
+                **{_media_column(kind, media_type): None for media_type in MEDIA_COLUMN_SUFFIXES},
+            },
+        )
@@ -0,0 +1,52 @@
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+
+class ReadSessionRouter:
+    """
+    Opens sessions for read-only lookups on the replica, falling back to the primary.
+
+    Writes always go through the primary sessionmaker. Call `written` once a change to a chat is
+    committed: for `read_your_writes_window` seconds afterwards, reads of that chat are served by
+    the primary, so the replica lag never shows the previous settings right after a change.
+    Only changes made by this process are tracked.
+    """
+
+    def __init__(
+        self,
+        primary: async_sessionmaker[AsyncSession],
+        replica: async_sessionmaker[AsyncSession] | None = None,
+        read_your_writes_window: float = 5.0,
+    ) -> None:
+        self.primary = primary
+        self.replica = replica
+        self.read_your_writes_window = read_your_writes_window
+        # Insertion ordered, so the earliest deadline is always first
+        self._pinned: dict[int, float] = {}
+
+    def written(self, chat_id: int) -> None:
+        if self.replica is None:
+            return
+
+        now = time.monotonic()
+        self._expire(now)
+        self._pinned.pop(chat_id, None)
+        self._pinned[chat_id] = now + self.read_your_writes_window
+
+    def _expire(self, now: float) -> None:
+        while self._pinned:
+            chat_id, deadline = next(iter(self._pinned.items()))
+            if deadline > now:
+                break
+            del self._pinned[chat_id]
+
+    def is_pinned(self, chat_id: int) -> bool:
+        deadline = self._pinned.get(chat_id)
+        return deadline is not None and deadline > time.monotonic()
+
+    def __call__(self, chat_id: int | None = None) -> AsyncSession:
+        if self.replica is None or (chat_id is not None and self.is_pinned(chat_id)):
+            return self.primary()
+
+        return self.replica()
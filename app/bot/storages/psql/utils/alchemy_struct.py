@@ -1,4 +1,6 @@
-from typing import Self
+from collections.abc import Mapping
+from types import SimpleNamespace
+from typing import Any, Self
 
 import msgspec
 
@@ -9,3 +11,7 @@ class AlchemyStruct(msgspec.Struct, kw_only=True):
     @classmethod
     def from_orm(cls, obj: Base) -> Self:
         return msgspec.convert(obj, cls, from_attributes=True)
+
+    @classmethod
+    def from_mapping(cls, mapping: Mapping[str, Any]) -> Self:
+        return msgspec.convert(SimpleNamespace(**mapping), cls, from_attributes=True)
@@ -0,0 +1,132 @@
+from typing import Any
+
+import msgspec
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, ExecutionContext
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import ConnectionPoolEntry, QueuePool
+
+from bot.storages.psql.utils.pool import InstrumentedQueuePool
+from bot.utils.metrics import HistogramSnapshot, Metrics
+
+
+class EngineStats(msgspec.Struct, kw_only=True):
+    profile: str
+    pool_size: int
+    max_overflow: int
+    checked_out: int
+    idle: int
+    overflow: int
+    waiting: int
+    peak_checked_out: int
+    checkouts: int
+    connects: int
+    checkout: HistogramSnapshot | None
+    checkout_timeouts: int
+    pings: int
+    discarded: int
+    reaped: int
+    compiled_cache: dict[str, int]
+    prepared_statements: dict[str, int]
+
+
+class EngineMetrics:
+    """
+    Pool and statement cache counters of an engine, collected with SQLAlchemy events.
+
+    `connects` counts checkouts that had to open a new connection. Wait times, pings, connections
+    discarded as stale on checkout and idle connections reaped in the background are reported
+    when the engine uses `InstrumentedQueuePool`. `compiled_cache` tells whether the SQL string
+    came from SQLAlchemy's compiled cache, `prepared_statements` whether the asyncpg adapter
+    reused a statement prepared on the connection (`disabled` when the profile turns the cache
+    off, so every execution prepares its statement).
+    """
+
+    def __init__(self, engine: AsyncEngine, profile: str) -> None:
+        self.engine = engine
+        self.profile = profile
+        self.metrics = Metrics()
+
+        event.listen(engine.sync_engine.pool, "connect", self._on_connect)
+        event.listen(engine.sync_engine.pool, "checkout", self._on_checkout)
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_connect(self, _dbapi_connection: Any, _record: ConnectionPoolEntry) -> None:
+        self.metrics.inc("pool", "connects")
+
+    def _on_checkout(self, _dbapi_connection: Any, _record: ConnectionPoolEntry, _: Any) -> None:
+        self.metrics.inc("pool", "checkouts")
+
+    def _on_execute(
+        self,
+        conn: Connection,
+        _cursor: Any,
+        statement: str,
+        _parameters: Any,
+        context: ExecutionContext | None,
+        _executemany: bool,  # noqa: FBT001
+    ) -> None:
+        cache_hit = getattr(context, "cache_hit", None)
+        if cache_hit is CACHE_HIT:
+            self.metrics.inc("compiled_cache", "hit")
+        elif cache_hit is CACHE_MISS:
+            self.metrics.inc("compiled_cache", "miss")
+
+        # The asyncpg adapter keys its per-connection LRU by the final SQL string
+        cache = getattr(conn.connection.dbapi_connection, "_prepared_statement_cache", None)
+        if cache is None:
+            self.metrics.inc("prepared_statements", "disabled")
+        elif statement in cache:
+            self.metrics.inc("prepared_statements", "hit")
+        else:
+            self.metrics.inc("prepared_statements", "miss")
+
+    def stats(self) -> EngineStats:
+        pool = self.engine.sync_engine.pool
+        if not isinstance(pool, QueuePool):
+            msg = f"Unsupported pool class: {type(pool).__name__}"
+            raise TypeError(msg)
+
+        counters = self.metrics.snapshot().counters
+        pool_counters = counters.get("pool", {})
+
+        instrumented = isinstance(pool, InstrumentedQueuePool)
+        pool_snapshot = pool.metrics.snapshot() if instrumented else None
+
+        def pool_counter(name: str) -> int:
+            if pool_snapshot is None:
+                return 0
+            return pool_snapshot.counters.get(name, {}).get("pool", 0)
+
+        return EngineStats(
+            profile=self.profile,
+            pool_size=pool.size(),
+            max_overflow=pool._max_overflow,  # noqa: SLF001
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            # Negative while the pool has not opened `pool_size` connections yet
+            overflow=max(pool.overflow(), 0),
+            waiting=pool.waiting if instrumented else 0,
+            peak_checked_out=pool.peak_checked_out if instrumented else 0,
+            checkouts=pool_counters.get("checkouts", 0),
+            connects=pool_counters.get("connects", 0),
+            checkout=(
+                pool_snapshot.histograms.get("checkout_seconds", {}).get("pool")
+                if pool_snapshot is not None
+                else None
+            ),
+            checkout_timeouts=pool_counter("checkout_timeouts"),
+            pings=pool_counter("pings"),
+            discarded=pool_counter("discarded"),
+            reaped=pool_counter("reaped"),
+            compiled_cache=counters.get("compiled_cache", {}),
+            prepared_statements=counters.get("prepared_statements", {}),
+        )
+
+    def reset_stats(self) -> None:
+        self.metrics.reset()
+
+        pool = self.engine.sync_engine.pool
+        if isinstance(pool, InstrumentedQueuePool):
+            pool.reset_stats()
@@ -0,0 +1,164 @@
+import asyncio
+import time
+from typing import Any, Final
+
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+from sqlalchemy.util import greenlet_spawn
+
+from bot.utils.metrics import Metrics
+
+RETURNED_AT_KEY: Final[str] = "returned_at"
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Async queue pool that records checkout wait times and pings only stale connections.
+
+    A connection that sat in the pool for longer than `stale_after` seconds is pinged before it is
+    handed out, one idle for longer than `idle_timeout` is discarded and reconnected right away,
+    since the server has closed it by then (see `idle_session_timeout`). Recently used connections
+    skip the round trip that `pre_ping` would spend on every checkout. `checkout_seconds` includes
+    opening a new connection, `checkout_timeouts` counts checkouts that gave up after `timeout`
+    seconds.
+
+    With `use_lifo` the busiest connections are reused and the rest can sit in the pool for good,
+    so `reap` closes the connections idle for longer than `idle_timeout` and frees their slots,
+    the pool opens new ones on demand. `reap_idle_connections` runs it periodically.
+    """
+
+    # Not keyword-only, create_engine routes only positional-or-keyword parameters to the pool
+    def __init__(
+        self,
+        creator: Any,
+        stale_after: float | None = None,
+        idle_timeout: float | None = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(creator, **kwargs)
+        self.stale_after = stale_after
+        self.idle_timeout = idle_timeout
+        self.metrics = Metrics()
+        self.waiting = 0
+        self.peak_checked_out = 0
+
+    def recreate(self) -> "InstrumentedQueuePool":
+        self.logger.info("Pool recreating")
+        return self.__class__(
+            self._creator,
+            pool_size=self._pool.maxsize,
+            max_overflow=self._max_overflow,
+            pre_ping=self._pre_ping,
+            use_lifo=self._pool.use_lifo,
+            timeout=self._timeout,
+            recycle=self._recycle,
+            echo=self.echo,
+            logging_name=self._orig_logging_name,
+            reset_on_return=self._reset_on_return,
+            _dispatch=self.dispatch,
+            dialect=self._dialect,
+            stale_after=self.stale_after,
+            idle_timeout=self.idle_timeout,
+        )
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        started_at = time.perf_counter()
+        waiting = self.checkedin() == 0 and self.overflow() >= self._max_overflow
+        self.waiting += waiting
+
+        try:
+            record = super()._do_get()
+
+        except exc.TimeoutError:
+            self.metrics.inc("checkout_timeouts", "pool")
+            raise
+
+        finally:
+            self.waiting -= waiting
+            self.metrics.observe("checkout_seconds", "pool", time.perf_counter() - started_at)
+
+        self.peak_checked_out = max(self.peak_checked_out, self.checkedout())
+
+        try:
+            self._check_stale(record)
+
+        except BaseException as e:
+            # An interrupted ping (e.g. a cancelled checkout) leaves the connection in an unknown
+            # state, drop it and give the record back instead of leaking it as checked out
+            record.invalidate(e)
+            self._do_return_conn(record)
+            raise
+
+        return record
+
+    def _check_stale(self, record: ConnectionPoolEntry) -> None:
+        returned_at = record.info.get(RETURNED_AT_KEY)
+        if returned_at is None or record.dbapi_connection is None:
+            return
+
+        idle = time.monotonic() - returned_at
+
+        # An invalidated record opens a new connection in the checkout that follows
+        if self.idle_timeout is not None and idle > self.idle_timeout:
+            self.metrics.inc("discarded", "pool")
+            record.invalidate()
+
+        elif self.stale_after is not None and idle > self.stale_after:
+            self.metrics.inc("pings", "pool")
+            try:
+                self._dialect.do_ping(record.dbapi_connection)
+            except self._dialect.loaded_dbapi.Error as e:
+                self.metrics.inc("discarded", "pool")
+                record.invalidate(e)
+
+    def reap(self) -> int:
+        """
+        Close the checked-in connections idle for longer than `idle_timeout`.
+
+        Their records leave the pool, so its slots are free for new connections. Must run in a
+        greenlet (see `greenlet_spawn`), since closing an async connection awaits. Returns the
+        number of closed connections.
+        """
+        if self.idle_timeout is None:
+            return 0
+
+        records = [self._pool.get(block=False) for _ in range(self._pool.qsize())]
+
+        # Put the rest back in their original order before anything awaits
+        if self._pool.use_lifo:
+            records.reverse()
+
+        now = time.monotonic()
+        reaped: list[ConnectionPoolEntry] = []
+        for record in records:
+            if now - record.info.get(RETURNED_AT_KEY, now) > self.idle_timeout:
+                reaped.append(record)
+                self._dec_overflow()
+            else:
+                self._pool.put(record, block=False)
+
+        for record in reaped:
+            self.metrics.inc("reaped", "pool")
+            record.close()
+
+        return len(reaped)
+
+    def _do_return_conn(self, record: ConnectionPoolEntry) -> None:
+        record.info[RETURNED_AT_KEY] = time.monotonic()
+        super()._do_return_conn(record)
+
+    def reset_stats(self) -> None:
+        self.metrics.reset()
+        self.peak_checked_out = self.checkedout()
+
+
+async def reap_idle_connections(*engines: AsyncEngine, interval: float) -> None:
+    """Reap the idle connections of the engines' pools every `interval` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+
+        for engine in engines:
+            pool = engine.sync_engine.pool
+            if isinstance(pool, InstrumentedQueuePool):
+                await greenlet_spawn(pool.reap)
@@ -0,0 +1,221 @@
+from collections.abc import AsyncIterator, Callable, Iterable
+from contextlib import asynccontextmanager
+from functools import cache
+from typing import Any, ClassVar, Final, Self, TypeAlias, TypeVar
+
+import msgspec
+from redis.asyncio import Redis
+from redis.asyncio.client import Pipeline
+from redis.typing import ExpiryT
+
+from bot.storages.redis.utils.tracking import TrackedCache
+
+KeyPart: TypeAlias = int | str
+ModelID: TypeAlias = KeyPart | tuple[KeyPart, ...]
+
+Upgrade: TypeAlias = Callable[[Any], Any]
+
+ENCODER: Final[msgspec.msgpack.Encoder] = msgspec.msgpack.Encoder()
+# 0xc1 is never used by msgpack, so versioned payloads never clash with plain ones
+SCHEMA_MARKER: Final[int] = 0xC1
+
+_UPGRADES: dict[tuple[type, int], Upgrade] = {}
+
+T = TypeVar("T", bound=msgspec.Struct)
+
+
+@cache
+def _decoder(model: type[T]) -> msgspec.msgpack.Decoder[T]:
+    return msgspec.msgpack.Decoder(model)
+
+
+def as_key_parts(model_id: ModelID) -> tuple[KeyPart, ...]:
+    return model_id if isinstance(model_id, tuple) else (model_id,)
+
+
+@asynccontextmanager
+async def redis_transaction(redis: Redis) -> AsyncIterator[Pipeline]:
+    """
+    Queue writes of one or several models and run them in a single MULTI/EXEC on exit.
+
+    ```
+    async with redis_transaction(redis) as pipe:
+        chat_model.queue_save(pipe, ttl)
+        chat_settings.queue_save(pipe, ttl)
+    ```
+    """
+    async with redis.pipeline(transaction=True) as pipe:
+        yield pipe
+        await pipe.execute()
+
+
+class RedisStruct(msgspec.Struct, kw_only=True):
+    """
+    Base for structs cached in Redis as msgpack values under `{ClassName}:{key parts}` keys.
+
+    Every write is queued on a pipeline with `queue_save`/`queue_delete`, so the `*_many` methods
+    cost one round trip regardless of the batch size. Subclasses override `key_parts`, and
+    `encode`/`decode` when they store another layout or `hard_ttl` to outlive the requested TTL.
+
+    Payloads carry `schema_version`. Bump it when the fields change and register an upgrade from
+    the previous version with `register_upgrade`, entries written by older replicas are upgraded
+    on read instead of being flushed. Entries of an unknown newer version are cache misses.
+
+    When `local_cache` is set, `get` and `get_many` are served from that `TrackedCache` and only
+    its misses reach Redis.
+    """
+
+    # Plain version 1 payloads are written without the header to stay readable by replicas that
+    # predate it. Layouts those replicas cannot read are packed with `versioned=True` instead
+    schema_version: ClassVar[int] = 1
+    local_cache: ClassVar[TrackedCache | None] = None
+
+    @classmethod
+    def key(cls, *parts: KeyPart) -> str:
+        return ":".join((cls.__name__, *map(str, parts)))
+
+    def key_parts(self) -> tuple[KeyPart, ...]:
+        return ()
+
+    @classmethod
+    def decoder(cls) -> msgspec.msgpack.Decoder[Self]:
+        return _decoder(cls)
+
+    @classmethod
+    def register_upgrade(cls, from_version: int) -> Callable[[Upgrade], Upgrade]:
+        """
+        Register a function that turns a raw payload of `from_version` into the next version.
+
+        The payload is the plain msgpack value: a list of fields for `array_like` structs and a
+        mapping otherwise.
+        """
+
+        def decorator(upgrade: Upgrade) -> Upgrade:
+            _UPGRADES[cls, from_version] = upgrade
+            return upgrade
+
+        return decorator
+
+    @classmethod
+    def upgrade(cls, raw: Any, version: int) -> Any:
+        while version < cls.schema_version:
+            upgrade = _UPGRADES.get((cls, version))
+            if upgrade is None:
+                msg = f"No upgrade registered for {cls.__name__} from version {version}"
+                raise msgspec.ValidationError(msg)
+
+            raw = upgrade(raw)
+            version += 1
+
+        return raw
+
+    @classmethod
+    def pack(cls, body: bytes, *, versioned: bool = False) -> bytes:
+        if cls.schema_version == 1 and not versioned:
+            return body
+        return bytes((SCHEMA_MARKER, cls.schema_version)) + body
+
+    @classmethod
+    def unpack(cls, data: bytes) -> tuple[int, bytes]:
+        if data[0] == SCHEMA_MARKER:
+            return data[1], data[2:]
+        return 1, data
+
+    def encode(self) -> bytes:
+        return self.pack(ENCODER.encode(self))
+
+    @classmethod
+    def decode(cls, data: bytes) -> Self | None:
+        try:
+            version, body = cls.unpack(data)
+            if version == cls.schema_version:
+                return cls.decoder().decode(body)
+            if version > cls.schema_version:
+                return None
+
+            return msgspec.convert(cls.upgrade(msgspec.msgpack.decode(body), version), cls)
+
+        except msgspec.DecodeError:
+            # Written in an incompatible format, treat it as a cache miss
+            return None
+
+    @classmethod
+    def default_ttl(cls) -> ExpiryT | None:
+        return None
+
+    @classmethod
+    def hard_ttl(cls, ttl: ExpiryT) -> ExpiryT:
+        return ttl
+
+    def queue_save(self, pipe: Pipeline, ttl: ExpiryT | None = None) -> None:
+        ttl = ttl or self.default_ttl()
+        key = self.key(*self.key_parts())
+
+        if ttl is None:
+            pipe.set(key, self.encode())
+        else:
+            pipe.setex(key, self.hard_ttl(ttl), self.encode())
+
+    @classmethod
+    def queue_delete(cls, pipe: Pipeline, model_ids: list[ModelID]) -> int:
+        """Queue the removal and return how many leading commands report removed entries."""
+        pipe.delete(*(cls.key(*as_key_parts(model_id)) for model_id in model_ids))
+        return 1
+
+    @classmethod
+    async def mget(cls, redis: Redis, keys: list[str]) -> list[bytes | None]:
+        if cls.local_cache is not None:
+            return await cls.local_cache.mget(redis, keys)
+        return await redis.mget(keys)
+
+    @classmethod
+    async def get(cls, redis: Redis, *parts: KeyPart) -> Self | None:
+        if cls.local_cache is not None:
+            (data,) = await cls.local_cache.mget(redis, [cls.key(*parts)])
+        else:
+            data = await redis.get(cls.key(*parts))
+
+        if data:
+            return cls.decode(data)
+        return None
+
+    @classmethod
+    async def get_many(cls, redis: Redis, model_ids: Iterable[ModelID]) -> list[Self | None]:
+        keys = [cls.key(*as_key_parts(model_id)) for model_id in model_ids]
+        if not keys:
+            return []
+
+        return [cls.decode(data) if data else None for data in await cls.mget(redis, keys)]
+
+    async def save(self, redis: Redis, ttl: ExpiryT | None = None) -> Self:
+        async with redis.pipeline(transaction=False) as pipe:
+            self.queue_save(pipe, ttl)
+            await pipe.execute()
+        return self
+
+    @classmethod
+    async def save_many(
+        cls,
+        redis: Redis,
+        models: Iterable[Self],
+        ttl: ExpiryT | None = None,
+    ) -> None:
+        async with redis.pipeline(transaction=False) as pipe:
+            for model in models:
+                model.queue_save(pipe, ttl)
+            await pipe.execute()
+
+    @classmethod
+    async def delete(cls, redis: Redis, *parts: KeyPart) -> int:
+        return await cls.delete_many(redis, [parts])
+
+    @classmethod
+    async def delete_many(cls, redis: Redis, model_ids: Iterable[ModelID]) -> int:
+        model_ids = list(model_ids)
+        if not model_ids:
+            return 0
+
+        async with redis.pipeline(transaction=False) as pipe:
+            counted = cls.queue_delete(pipe, model_ids)
+            results = await pipe.execute()
+        return sum(results[:counted])
@@ -1,7 +1,6 @@
 import asyncio
 from typing import Self
 
-import msgspec
 from aiogram.types import FSInputFile, Message
 from redis.asyncio import Redis
 
@@ -13,9 +12,10 @@ from bot.images.images import (
     GREETING_IMAGE_PATH,
     PROMOTE_IMAGE_PATH,
 )
+from bot.storages.redis.base import RedisStruct
 
 
-class RDBotReactionMedia(msgspec.Struct, kw_only=True):
+class RDBotReactionMedia(RedisStruct, kw_only=True):
     """
     Class for preparing and storing bot reaction media.
 
@@ -31,10 +31,6 @@ class RDBotReactionMedia(msgspec.Struct, kw_only=True):
     EMPTY_GIF: str
     EMPTY_STICKER: str
 
-    @classmethod
-    def key(cls) -> str:
-        return f"{cls.__name__}"
-
     @classmethod
     async def prepare_images(cls, msg: Message, redis: Redis) -> tuple[Self, list[int]]:
         bot_message_ids: list[int] = []
@@ -75,14 +71,3 @@ class RDBotReactionMedia(msgspec.Struct, kw_only=True):
         await bot_reaction_media.save(redis)
 
         return bot_reaction_media, bot_message_ids
-
-    @classmethod
-    async def get(cls, redis: Redis) -> Self | None:
-        data = await redis.get(cls.key())
-        if data:
-            return msgspec.msgpack.decode(data, type=cls)
-        return None
-
-    async def save(self, redis: Redis) -> Self:
-        await redis.set(self.key(), msgspec.msgpack.encode(self))
-        return self
@@ -1,8 +1,11 @@
+import time
+from collections import defaultdict
+from collections.abc import Sequence
 from datetime import datetime, timedelta, timezone
+from math import ceil
 from random import randrange
-from typing import Final, Literal, Self
+from typing import Final, Self
 
-import msgspec
 from aiogram import Bot
 from aiogram.enums import ChatMemberStatus
 from aiogram.types import (
@@ -13,14 +16,30 @@ from aiogram.types import (
     ChatMemberOwner,
     ChatMemberRestricted,
 )
-from redis.asyncio.client import Redis
+from redis.asyncio.client import Pipeline, Redis
 from redis.typing import ExpiryT
 
+from bot.storages.redis.base import KeyPart, ModelID, RedisStruct, as_key_parts
+
 TG_MIN_DATETIME: Final[datetime] = datetime(1970, 1, 1, tzinfo=timezone.utc)
-ENCODER: Final[msgspec.msgpack.Encoder] = msgspec.msgpack.Encoder()
 
+# Redis < 7.4 has no per-field expiration, so members are expired through a sorted set
+PRUNE_EXPIRED_SCRIPT: Final[str] = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+for i = 1, #expired, 1000 do
+    redis.call('HDEL', KEYS[1], unpack(expired, i, math.min(i + 999, #expired)))
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+return #expired
+"""
+
+
+class RDChatMemberModel(RedisStruct, kw_only=True, array_like=True):
+    """
+    Chat members are stored per chat in a hash, so reads are scoped by chat and override the
+    key/value methods of `RedisStruct`. Batched writes go through `save_many`/`delete_many`.
+    """
 
-class RDChatMemberModel(msgspec.Struct, kw_only=True, array_like=True):
     chat_id: int
     user_id: int
     status: ChatMemberStatus
@@ -53,24 +72,64 @@ class RDChatMemberModel(msgspec.Struct, kw_only=True, array_like=True):
     until_date: datetime | None = None
 
     @classmethod
-    def key(cls, chat_id: int, user_id: int | Literal["*"]) -> str:
-        return f"{cls.__name__}:{chat_id}:{user_id}"
+    def key(cls, chat_id: int) -> str:
+        """Hash of the chat members, the field is the user id."""
+        return f"{cls.__name__}:{chat_id}"
+
+    @classmethod
+    def expiry_key(cls, chat_id: int) -> str:
+        """Sorted set of the chat members' user ids scored by their expiration timestamp."""
+        return f"{cls.__name__}:expiry:{chat_id}"
 
     @classmethod
     async def get(cls, redis: Redis, chat_id: int, user_id: int) -> Self | None:
-        data = await redis.get(cls.key(chat_id, user_id))
-        if data:
-            return msgspec.msgpack.decode(data, type=cls)
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.hget(cls.key(chat_id), user_id)
+            pipe.zscore(cls.expiry_key(chat_id), user_id)
+            data, expires_at = await pipe.execute()
+
+        if data and expires_at and expires_at > time.time():
+            return cls.decode(data)
         return None
 
+    @classmethod
+    async def get_members(
+        cls,
+        redis: Redis,
+        chat_id: int,
+        user_ids: Sequence[int],
+    ) -> list[Self]:
+        if not user_ids:
+            return []
+
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.hmget(cls.key(chat_id), user_ids)
+            pipe.zmscore(cls.expiry_key(chat_id), user_ids)
+            values, expirations = await pipe.execute()
+
+        now = time.time()
+        return [
+            cls.decode(data)
+            for data, expires_at in zip(values, expirations, strict=True)
+            if data and expires_at and expires_at > now
+        ]
+
     @classmethod
     async def get_all(cls, redis: Redis, chat_id: int) -> list[Self]:
-        keys = await redis.keys(cls.key(chat_id, "*"))
-        if keys:
-            return [msgspec.msgpack.decode(await redis.get(key), type=cls) for key in keys]
-        return []
+        async with redis.pipeline(transaction=False) as pipe:
+            # Expired members are dropped atomically before the hash is read
+            cls.queue_prune(pipe, chat_id)
+            pipe.hgetall(cls.key(chat_id))
+            _, members = await pipe.execute()
+
+        return [cls.decode(data) for data in members.values()]
 
-    async def save(self, redis: Redis, ttl: ExpiryT | None = None) -> Self:
+    @classmethod
+    def queue_prune(cls, pipe: Pipeline, chat_id: int) -> None:
+        """Queue the removal of the chat's expired members from the hash and the sorted set."""
+        pipe.eval(PRUNE_EXPIRED_SCRIPT, 2, cls.key(chat_id), cls.expiry_key(chat_id), time.time())
+
+    def queue_save(self, pipe: Pipeline, ttl: ExpiryT | None = None) -> None:
         if self.until_date and ttl is None:
             if self.until_date == TG_MIN_DATETIME:
                 ttl = timedelta(minutes=randrange(45, 75))
@@ -81,23 +140,48 @@ class RDChatMemberModel(msgspec.Struct, kw_only=True, array_like=True):
         elif ttl is None:
             ttl = timedelta(minutes=randrange(45, 75))
 
-        await redis.setex(
-            self.key(self.chat_id, self.user_id),
-            ttl,
-            ENCODER.encode(self),
-        )
-        return self
+        if isinstance(ttl, timedelta):
+            ttl = ttl.total_seconds()
+        # A past `until_date` gives a non-positive TTL, and EXPIRE would delete the hash right away
+        ttl = max(ttl, 1)
+
+        key = self.key(self.chat_id)
+        expiry_key = self.expiry_key(self.chat_id)
+
+        # Both keys outlive their expired members in an active chat, so drop those on every write
+        self.queue_prune(pipe, self.chat_id)
+        pipe.hset(key, self.user_id, self.encode())
+        pipe.zadd(expiry_key, {self.user_id: time.time() + ttl})
+        # Both keys live as long as the longest-living member
+        for name in (key, expiry_key):
+            pipe.expire(name, ceil(ttl), nx=True)
+            pipe.expire(name, ceil(ttl), gt=True)
+
+    @classmethod
+    def queue_delete(cls, pipe: Pipeline, model_ids: list[ModelID]) -> int:
+        """Remove members by `(chat_id, user_id)` pairs."""
+        user_ids_by_chat: defaultdict[KeyPart, list[KeyPart]] = defaultdict(list)
+        for model_id in model_ids:
+            chat_id, user_id = as_key_parts(model_id)
+            user_ids_by_chat[chat_id].append(user_id)
+
+        for chat_id, user_ids in user_ids_by_chat.items():
+            pipe.hdel(cls.key(chat_id), *user_ids)
+        for chat_id, user_ids in user_ids_by_chat.items():
+            pipe.zrem(cls.expiry_key(chat_id), *user_ids)
+        return len(user_ids_by_chat)
 
     @classmethod
     async def delete(cls, redis: Redis, chat_id: int, user_id: int) -> int:
-        return await redis.delete(cls.key(chat_id, user_id))
+        return await cls.delete_many(redis, [(chat_id, user_id)])
 
     @classmethod
     async def delete_for_chat(cls, redis: Redis, chat_id: int) -> int:
-        keys = await redis.keys(cls.key(chat_id, "*"))
-        if keys:
-            return await redis.delete(*keys)
-        return 0
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hlen(cls.key(chat_id))
+            pipe.unlink(cls.key(chat_id), cls.expiry_key(chat_id))
+            deleted, _ = await pipe.execute()
+        return deleted
 
     @classmethod
     def resolve(
@@ -1,21 +1,26 @@
 import uuid
 from binascii import crc32
 from datetime import timedelta
-from typing import Self
+from typing import Final, Self
 
-import msgspec
 from redis.asyncio import Redis
 
+from bot.storages.redis.base import RedisStruct
+from bot.storages.redis.utils.scan import unlink_by_pattern
 
-class RDSetReportsSpecialChatPending(msgspec.Struct, kw_only=True):
+PENDING_TTL: Final[timedelta] = timedelta(hours=1)
+
+
+class RDSetReportsSpecialChatPending(RedisStruct, kw_only=True):
     origin_chat_id: int
     origin_message_id: int
     additional_entropy: str
     secret_hash: str
 
     @classmethod
-    def key(cls, user_id: int, public_hash: str) -> str:
-        return f"{cls.__name__}:{user_id}:{public_hash}"
+    def index_key(cls, user_id: int) -> str:
+        """Set of the user's pending public hashes, so `delete` does not scan the keyspace."""
+        return f"{cls.__name__}:index:{user_id}"
 
     @classmethod
     def calc_public_hash(cls, chat_id: int, user_id: int, secret_hash: str) -> str:
@@ -45,37 +50,36 @@ class RDSetReportsSpecialChatPending(msgspec.Struct, kw_only=True):
         secret_hash, additional_entropy = cls.calc_secret_hash(origin_chat_id, user_id)
         public_hash = cls.calc_public_hash(origin_chat_id, user_id, secret_hash)
 
-        await redis.setex(
-            cls.key(user_id, public_hash),
-            timedelta(hours=1),
-            msgspec.msgpack.encode(
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.setex(
+                cls.key(user_id, public_hash),
+                PENDING_TTL,
                 cls(
                     origin_chat_id=origin_chat_id,
                     origin_message_id=origin_message_id,
                     additional_entropy=additional_entropy,
                     secret_hash=secret_hash,
-                ),
-            ),
-        )
+                ).encode(),
+            )
+            pipe.sadd(cls.index_key(user_id), public_hash)
+            pipe.expire(cls.index_key(user_id), PENDING_TTL)
+            await pipe.execute()
 
         return public_hash
 
     @classmethod
     async def get(cls, redis: Redis, user_id: int, public_hash: str) -> Self | None:
-        data = await redis.get(cls.key(user_id, public_hash))
-        if data is None:
-            return None
-
-        return msgspec.msgpack.decode(data, type=cls)
+        return await super().get(redis, user_id, public_hash)
 
     @classmethod
     async def delete(cls, redis: Redis, user_id: int) -> None:
-        keys = await redis.keys(f"{cls.__name__}:{user_id}:*")
-        if keys:
-            await redis.delete(*keys)
+        public_hashes = await redis.smembers(cls.index_key(user_id))
+        if public_hashes:
+            await redis.unlink(
+                *(cls.key(user_id, public_hash.decode()) for public_hash in public_hashes),
+                cls.index_key(user_id),
+            )
 
     @classmethod
     async def delete_all(cls, redis: Redis) -> None:
-        keys = await redis.keys(f"{cls.__name__}:*")
-        if keys:
-            await redis.delete(*keys)
+        await unlink_by_pattern(redis, f"{cls.__name__}:*")
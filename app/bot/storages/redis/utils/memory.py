@@ -0,0 +1,151 @@
+import logging
+import random
+from collections import defaultdict
+from collections.abc import Mapping
+from typing import Final
+
+import msgspec
+from redis.asyncio import Redis
+
+from bot.storages.redis.utils.scan import SCAN_COUNT
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, keys without expiration are counted separately
+TTL_BUCKETS: Final[tuple[tuple[str, float], ...]] = (
+    ("<1m", 60),
+    ("<10m", 600),
+    ("<1h", 3600),
+    ("<1d", 86400),
+    (">=1d", float("inf")),
+)
+
+
+class PrefixUsage(msgspec.Struct, kw_only=True):
+    prefix: str
+    keys: int
+    sampled: int
+    sampled_bytes: int
+    estimated_bytes: int
+    ttl: dict[str, int]
+    budget: float | None = None
+
+    @property
+    def average_bytes(self) -> float:
+        return self.sampled_bytes / self.sampled if self.sampled else 0.0
+
+    def share(self, maxmemory: int) -> float | None:
+        return self.estimated_bytes / maxmemory if maxmemory else None
+
+    def over_budget(self, maxmemory: int) -> bool:
+        share = self.share(maxmemory)
+        return self.budget is not None and share is not None and share > self.budget
+
+
+class MemoryReport(msgspec.Struct, kw_only=True):
+    used_memory: int
+    maxmemory: int
+    keys: int
+    prefixes: list[PrefixUsage]
+
+    def over_budget(self) -> list[PrefixUsage]:
+        return [usage for usage in self.prefixes if usage.over_budget(self.maxmemory)]
+
+
+def _ttl_bucket(ttl: int) -> str:
+    if ttl < 0:
+        return "none"
+
+    for name, upper_bound in TTL_BUCKETS:
+        if ttl < upper_bound:
+            return name
+
+    return TTL_BUCKETS[-1][0]
+
+
+async def memory_report(
+    redis: Redis,
+    budgets: Mapping[str, float] | None = None,
+    sample: int = 200,
+    prefix: str | None = None,
+) -> MemoryReport:
+    """
+    Estimate memory usage, key counts and TTL distribution per key prefix.
+
+    The prefix is the part of the key before the first `:`, which is the model class name for
+    the RD* models and `fsm` for the FSM storage. Pass `prefix` to report only that one. Every
+    key is counted with an incremental SCAN, which also keeps a uniform random sample of
+    `sample` keys per prefix (reservoir sampling). `MEMORY USAGE` and `TTL` are requested only
+    for the sampled keys and the total is extrapolated from their average. `budgets` maps
+    prefixes to their allowed share of `maxmemory`, prefixes that exceed it are logged as
+    warnings.
+    """
+    budgets = budgets or {}
+    counts: defaultdict[str, int] = defaultdict(int)
+    samples: defaultdict[str, list[bytes]] = defaultdict(list)
+    match = f"{prefix}:*" if prefix is not None else None
+
+    async for key in redis.scan_iter(match=match, count=SCAN_COUNT):
+        key_prefix = key.split(b":", 1)[0].decode(errors="replace")
+        counts[key_prefix] += 1
+        reservoir = samples[key_prefix]
+
+        if len(reservoir) < sample:
+            reservoir.append(key)
+        elif (index := random.randrange(counts[key_prefix])) < sample:
+            reservoir[index] = key
+
+    prefixes = []
+    for key_prefix, keys in samples.items():
+        async with redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.memory_usage(key)
+                pipe.ttl(key)
+            results = await pipe.execute()
+
+        sampled_bytes = 0
+        sampled = 0
+        ttl: defaultdict[str, int] = defaultdict(int)
+
+        for usage, key_ttl in zip(results[::2], results[1::2], strict=True):
+            # The key may expire between SCAN and MEMORY USAGE
+            if usage is None:
+                continue
+
+            sampled_bytes += usage
+            sampled += 1
+            ttl[_ttl_bucket(key_ttl)] += 1
+
+        prefixes.append(
+            PrefixUsage(
+                prefix=key_prefix,
+                keys=counts[key_prefix],
+                sampled=sampled,
+                sampled_bytes=sampled_bytes,
+                estimated_bytes=(
+                    round(sampled_bytes / sampled * counts[key_prefix]) if sampled else 0
+                ),
+                ttl=dict(ttl),
+                budget=budgets.get(key_prefix),
+            ),
+        )
+
+    info = await redis.info("memory")
+    report = MemoryReport(
+        used_memory=info["used_memory"],
+        maxmemory=info["maxmemory"],
+        # SCAN may return a key more than once while the keyspace is rehashed
+        keys=await redis.dbsize() if prefix is None else sum(counts.values()),
+        prefixes=sorted(prefixes, key=lambda usage: usage.estimated_bytes, reverse=True),
+    )
+
+    for usage in report.over_budget():
+        logger.warning(
+            "Redis prefix %s uses ~%d bytes (%.1f%% of maxmemory), over its %.1f%% budget",
+            usage.prefix,
+            usage.estimated_bytes,
+            usage.share(report.maxmemory) * 100,
+            usage.budget * 100,
+        )
+
+    return report
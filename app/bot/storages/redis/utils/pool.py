@@ -0,0 +1,77 @@
+import time
+from typing import Any
+
+import msgspec
+from redis.asyncio import BlockingConnectionPool
+from redis.asyncio.connection import AbstractConnection
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from bot.utils.metrics import HistogramSnapshot, Metrics
+
+
+class PoolStats(msgspec.Struct, kw_only=True):
+    max_connections: int
+    in_use: int
+    idle: int
+    waiting: int
+    peak_in_use: int
+    errors: int
+    checkout: dict[str, HistogramSnapshot]
+
+
+class InstrumentedConnectionPool(BlockingConnectionPool):
+    """
+    Blocking connection pool that records how long commands wait for a connection.
+
+    The checkout time includes connecting when the pool has to open a new connection, so a
+    starved pool shows up as a growing tail in `checkout`, labelled by command name (`MULTI` for
+    pipelines). `errors` counts checkouts that failed, either because the wait exceeded `timeout`
+    or because a new connection could not be opened.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.metrics = Metrics()
+        self.waiting = 0
+        self.peak_in_use = 0
+
+    async def get_connection(
+        self,
+        command_name: str,
+        *keys: Any,
+        **options: Any,
+    ) -> AbstractConnection:
+        started_at = time.perf_counter()
+        waiting = not self.can_get_connection()
+        self.waiting += waiting
+
+        try:
+            connection = await super().get_connection(command_name, *keys, **options)
+
+        except RedisConnectionError:
+            self.metrics.inc("checkout_errors", command_name)
+            raise
+
+        finally:
+            self.waiting -= waiting
+            elapsed = time.perf_counter() - started_at
+            self.metrics.observe("checkout_seconds", command_name, elapsed)
+
+        self.peak_in_use = max(self.peak_in_use, len(self._in_use_connections))
+        return connection
+
+    def stats(self) -> PoolStats:
+        snapshot = self.metrics.snapshot()
+        return PoolStats(
+            max_connections=self.max_connections,
+            in_use=len(self._in_use_connections),
+            idle=len(self._available_connections),
+            waiting=self.waiting,
+            peak_in_use=self.peak_in_use,
+            errors=sum(snapshot.counters.get("checkout_errors", {}).values()),
+            checkout=snapshot.histograms.get("checkout_seconds", {}),
+        )
+
+    def reset_stats(self) -> None:
+        self.metrics.reset()
+        self.peak_in_use = len(self._in_use_connections)
@@ -0,0 +1,28 @@
+from typing import Final
+
+from redis.asyncio import Redis
+
+SCAN_COUNT: Final[int] = 500
+
+
+async def unlink_by_pattern(redis: Redis, match: str, count: int = SCAN_COUNT) -> int:
+    """
+    Unlink every key matching `match` using incremental SCAN instead of KEYS.
+
+    Keys are unlinked in batches of `count` as they are scanned, so the server is never blocked
+    for the whole keyspace and the memory is reclaimed in a background thread.
+    """
+    unlinked = 0
+    batch: list[bytes] = []
+
+    async for key in redis.scan_iter(match=match, count=count):
+        batch.append(key)
+
+        if len(batch) >= count:
+            unlinked += await redis.unlink(*batch)
+            batch.clear()
+
+    if batch:
+        unlinked += await redis.unlink(*batch)
+
+    return unlinked
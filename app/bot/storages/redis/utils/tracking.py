@@ -0,0 +1,166 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import Final
+
+from redis.asyncio import Redis
+from redis.asyncio.connection import Connection
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import ResponseError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL: Final[str] = "__redis__:invalidate"
+
+
+class TrackedCache:
+    """
+    Bounded LRU copy of Redis values that Redis itself keeps coherent with `CLIENT TRACKING`.
+
+    `listen` holds a dedicated connection with broadcasting tracking enabled for `prefixes`, so
+    Redis reports every write, expiration and eviction of a matching key, no matter which client
+    or replica caused it. With RESP3 the invalidations arrive as push messages on that connection,
+    with RESP2 the connection redirects them to itself and subscribes to `__redis__:invalidate`.
+
+    Values are stored only while the tracking connection is up, and values fetched while an
+    invalidation arrived are not stored at all, so a hit is never older than the last write that
+    Redis has reported.
+    """
+
+    def __init__(
+        self,
+        prefixes: Iterable[str],
+        maxsize: int = 50_000,
+        health_check_interval: float = 30.0,
+    ) -> None:
+        self.prefixes = tuple(prefixes)
+        self.maxsize = maxsize
+        self.health_check_interval = health_check_interval
+        self.tracking = False
+        self._data: OrderedDict[str, bytes] = OrderedDict()
+        # Bumped by every invalidation, a fetch that started in another epoch may be stale
+        self._epoch = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> bytes | None:
+        value = self._data.get(key)
+        if value is not None:
+            self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: bytes, epoch: int) -> None:
+        if not self.tracking or epoch != self._epoch:
+            return
+
+        self._data[key] = value
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, keys: Iterable[bytes] | None) -> None:
+        self._epoch += 1
+
+        # Redis sends a null key list when the whole database is flushed
+        if keys is None:
+            self._data.clear()
+            return
+
+        for key in keys:
+            self._data.pop(key.decode(), None)
+
+    def clear(self) -> None:
+        self._epoch += 1
+        self._data.clear()
+
+    async def mget(self, redis: Redis, keys: list[str]) -> list[bytes | None]:
+        values = [self.get(key) for key in keys]
+        missing = [index for index, value in enumerate(values) if value is None]
+        if not missing:
+            return values
+
+        epoch = self._epoch
+        fetched = await redis.mget([keys[index] for index in missing])
+
+        for index, value in zip(missing, fetched, strict=True):
+            values[index] = value
+            if value is not None:
+                self.set(keys[index], value, epoch)
+
+        return values
+
+    async def _enable_tracking(self, connection: Connection) -> None:
+        prefixes = [arg for prefix in self.prefixes for arg in ("PREFIX", prefix)]
+
+        if connection.protocol in (3, "3"):
+            await connection.send_command("CLIENT", "TRACKING", "ON", "BCAST", *prefixes)
+            await connection.read_response()
+            return
+
+        await connection.send_command("CLIENT", "ID")
+        client_id = await connection.read_response()
+
+        await connection.send_command(
+            "CLIENT", "TRACKING", "ON", "REDIRECT", client_id, "BCAST", *prefixes
+        )
+        await connection.read_response()
+
+        await connection.send_command("SUBSCRIBE", INVALIDATION_CHANNEL)
+        await connection.read_response()
+
+    async def _read_invalidations(self, connection: Connection) -> None:
+        awaiting_pong = False
+
+        while True:
+            response = await connection.read_response(
+                timeout=self.health_check_interval,
+                push_request=True,
+            )
+
+            if response is None:
+                # A silently dropped connection would otherwise leave the cache stale forever
+                if awaiting_pong:
+                    msg = "Tracking connection did not answer the health check"
+                    raise RedisTimeoutError(msg)
+
+                await connection.send_command("PING")
+                awaiting_pong = True
+                continue
+
+            awaiting_pong = False
+
+            match response:
+                case [b"message", _, keys] | [b"invalidate", keys]:
+                    self.invalidate(keys)
+
+    async def listen(self, redis: Redis) -> None:
+        while True:
+            connection = redis.connection_pool.make_connection()
+
+            try:
+                await connection.connect()
+                await self._enable_tracking(connection)
+
+                # Anything could have changed while we were not tracking
+                self.clear()
+                self.tracking = True
+
+                await self._read_invalidations(connection)
+
+            except ResponseError:
+                logger.exception("Redis does not support client tracking, local cache disabled")
+                return
+
+            except (RedisConnectionError, RedisTimeoutError):
+                logger.exception("Redis tracking connection lost, reconnecting")
+
+            finally:
+                self.tracking = False
+                self.clear()
+                await connection.disconnect()
+
+            await asyncio.sleep(1)
@@ -0,0 +1,124 @@
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from collections.abc import Generator
+from contextlib import contextmanager
+from typing import Final
+
+import msgspec
+
+# Latency buckets in seconds, upper bounds
+DEFAULT_BUCKETS: Final[tuple[float, ...]] = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+)
+
+
+class HistogramSnapshot(msgspec.Struct, kw_only=True):
+    count: int
+    sum: float
+    p50: float
+    p90: float
+    p99: float
+    buckets: dict[float, int]
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        # The last slot counts observations above the largest bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket that contains the `q` quantile."""
+        if self.count == 0:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for upper_bound, count in zip(self.buckets, self.counts, strict=False):
+            seen += count
+            if seen >= rank:
+                return upper_bound
+
+        return float("inf")
+
+    def snapshot(self) -> HistogramSnapshot:
+        return HistogramSnapshot(
+            count=self.count,
+            sum=self.sum,
+            p50=self.quantile(0.5),
+            p90=self.quantile(0.9),
+            p99=self.quantile(0.99),
+            buckets=dict(zip((*self.buckets, float("inf")), self.counts, strict=True)),
+        )
+
+
+class MetricsSnapshot(msgspec.Struct, kw_only=True):
+    counters: dict[str, dict[str, int]]
+    histograms: dict[str, dict[str, HistogramSnapshot]]
+
+
+class Metrics:
+    """
+    Minimal in-process counters and latency histograms keyed by name and a single label.
+
+    Nothing is exported anywhere, use `snapshot` to read the collected values.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self._counters: defaultdict[str, defaultdict[str, int]] = defaultdict(
+            lambda: defaultdict(int),
+        )
+        self._histograms: defaultdict[str, dict[str, Histogram]] = defaultdict(dict)
+
+    def inc(self, name: str, label: str, value: int = 1) -> None:
+        self._counters[name][label] += value
+
+    def observe(self, name: str, label: str, value: float) -> None:
+        histograms = self._histograms[name]
+        if (histogram := histograms.get(label)) is None:
+            histogram = histograms[label] = Histogram(self.buckets)
+        histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, label: str) -> Generator[None, None, None]:
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, label, time.perf_counter() - started_at)
+
+    def snapshot(self) -> MetricsSnapshot:
+        return MetricsSnapshot(
+            counters={name: dict(labels) for name, labels in self._counters.items()},
+            histograms={
+                name: {label: histogram.snapshot() for label, histogram in labels.items()}
+                for name, labels in self._histograms.items()
+            },
+        )
+
+    def reset(self) -> None:
+        self._counters.clear()
+        self._histograms.clear()
@@ -0,0 +1,35 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Generic, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class SingleFlight(Generic[K, V]):
+    """
+    Coalesce concurrent calls with the same key into a single execution.
+
+    The first caller starts the work in a separate task, every caller that arrives while it is
+    running awaits the same task. Cancelling one of the callers does not cancel the work for the
+    others.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[K, asyncio.Task[V]] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def start(self, key: K, func: Callable[[], Awaitable[V]]) -> asyncio.Task[V]:
+        task = self._calls.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+
+        return task
+
+    async def do(self, key: K, func: Callable[[], Awaitable[V]]) -> V:
+        return await asyncio.shield(self.start(key, func))
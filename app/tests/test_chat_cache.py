@@ -0,0 +1,156 @@
+import asyncio
+import unittest
+from collections.abc import AsyncIterator
+from datetime import datetime
+from typing import Any, Self
+from unittest import mock
+
+from bot.storages.memory.chat_cache import ChatCache
+from bot.storages.psql import RDChatModel, RDChatSettingsModel
+from bot.storages.psql.chat.chat_settings_model import GreetingFarewellType
+
+
+def build_chat(chat_id: int) -> tuple[RDChatModel, RDChatSettingsModel]:
+    return (
+        RDChatModel(
+            id=chat_id,
+            chat_type="supergroup",
+            registration_datetime=datetime(2024, 6, 1, 12, 30),  # noqa: DTZ001
+        ),
+        RDChatSettingsModel(
+            id=chat_id,
+            language_code="en",
+            kus_enabled=True,
+            allow_kus_admin=True,
+            admin_tools_enabled=True,
+            reports_enabled=True,
+            greeting_enabled=False,
+            greeting_type=GreetingFarewellType.TEXT,
+            farewell_enabled=False,
+            farewell_type=GreetingFarewellType.TEXT,
+        ),
+    )
+
+
+class FakePubSub:
+    def __init__(self) -> None:
+        self.messages: asyncio.Queue[bytes] = asyncio.Queue()
+        self.channels: list[str] = []
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        pass
+
+    async def subscribe(self, channel: str) -> None:
+        self.channels.append(channel)
+
+    async def listen(self) -> AsyncIterator[dict[str, Any]]:
+        while True:
+            yield {"type": "message", "data": await self.messages.get()}
+
+
+class FakeRedis:
+    def __init__(self, pubsub: FakePubSub) -> None:
+        self._pubsub = pubsub
+
+    def pubsub(self, **_: Any) -> FakePubSub:
+        return self._pubsub
+
+
+class ChatCacheTest(unittest.TestCase):
+    def test_get_returns_set_entry(self) -> None:
+        cache = ChatCache()
+        chat_model, chat_settings = build_chat(-1)
+        cache.set(chat_model, chat_settings)
+
+        self.assertEqual(cache.get(-1), (chat_model, chat_settings))
+        self.assertIsNone(cache.get(-2))
+
+    def test_entries_expire_after_ttl(self) -> None:
+        cache = ChatCache(ttl=60.0)
+
+        with mock.patch("bot.storages.memory.chat_cache.time.monotonic", return_value=100.0):
+            cache.set(*build_chat(-1))
+
+        with mock.patch("bot.storages.memory.chat_cache.time.monotonic", return_value=159.0):
+            self.assertIsNotNone(cache.get(-1))
+
+        with mock.patch("bot.storages.memory.chat_cache.time.monotonic", return_value=161.0):
+            self.assertIsNone(cache.get(-1))
+
+        self.assertEqual(len(cache), 0)
+
+    def test_least_recently_used_entry_is_evicted(self) -> None:
+        cache = ChatCache(maxsize=2)
+        cache.set(*build_chat(-1))
+        cache.set(*build_chat(-2))
+
+        cache.get(-1)
+        cache.set(*build_chat(-3))
+
+        self.assertIsNotNone(cache.get(-1))
+        self.assertIsNone(cache.get(-2))
+        self.assertIsNotNone(cache.get(-3))
+
+    def test_set_decoded_replaces_only_the_same_encoded_settings(self) -> None:
+        cache = ChatCache()
+        chat_model, chat_settings = build_chat(-1)
+        data = chat_settings.encode()
+        cache.set(chat_model, data)
+
+        cache.set_decoded(-1, chat_settings.encode(), chat_settings)
+        self.assertIs(cache.get(-1)[1], data)
+
+        cache.set_decoded(-1, data, chat_settings)
+        self.assertEqual(cache.get(-1), (chat_model, chat_settings))
+
+    def test_set_decoded_does_not_restore_invalidated_entry(self) -> None:
+        cache = ChatCache()
+        chat_model, chat_settings = build_chat(-1)
+        data = chat_settings.encode()
+        cache.set(chat_model, data)
+        cache.invalidate(-1)
+
+        cache.set_decoded(-1, data, chat_settings)
+
+        self.assertIsNone(cache.get(-1))
+
+
+class ChatCacheListenTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.cache = ChatCache()
+        self.pubsub = FakePubSub()
+        self.listener = asyncio.create_task(self.cache.listen(FakeRedis(self.pubsub)))
+        # The listener clears the cache once subscribed, fill it after that
+        await self.delivered()
+        self.cache.set(*build_chat(-1))
+        self.cache.set(*build_chat(-2))
+
+    async def asyncTearDown(self) -> None:
+        self.listener.cancel()
+
+    async def delivered(self) -> None:
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+    async def test_subscribes_to_invalidation_channel(self) -> None:
+        self.assertEqual(self.pubsub.channels, [RDChatSettingsModel.invalidation_channel()])
+
+    async def test_invalidation_message_evicts_chat(self) -> None:
+        self.pubsub.messages.put_nowait(b"-1")
+        await self.delivered()
+
+        self.assertIsNone(self.cache.get(-1))
+        self.assertIsNotNone(self.cache.get(-2))
+
+    async def test_wildcard_message_clears_cache(self) -> None:
+        self.pubsub.messages.put_nowait(b"*")
+        await self.delivered()
+
+        self.assertEqual(len(self.cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
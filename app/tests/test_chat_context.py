@@ -0,0 +1,320 @@
+import os
+import unittest
+from collections.abc import AsyncIterator, Callable
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Self
+
+import msgspec
+from redis.asyncio import Redis
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import Executable
+
+from bot.storages.psql import RDChatModel, RDChatSettingsModel
+from bot.storages.psql.chat.chat_context import RDChatContext, warm_up_chat_contexts
+from bot.storages.psql.chat.chat_settings_model import GreetingFarewellType
+
+REDIS_URL = os.getenv("TEST_REDIS_URL")
+CHAT_ID = -1000000000019
+
+
+def build_chat_context() -> RDChatContext:
+    return RDChatContext(
+        chat_model=RDChatModel(
+            id=CHAT_ID,
+            chat_type="supergroup",
+            registration_datetime=datetime(2024, 6, 1, 12, 30),  # noqa: DTZ001
+        ),
+        chat_settings=RDChatSettingsModel(
+            id=CHAT_ID,
+            language_code="en",
+            kus_enabled=True,
+            allow_kus_admin=True,
+            admin_tools_enabled=True,
+            reports_enabled=True,
+            greeting_enabled=True,
+            greeting_type=GreetingFarewellType.TEXT,
+            greeting_text="Welcome to the chat!",
+            farewell_enabled=False,
+            farewell_type=GreetingFarewellType.PHOTO,
+        ),
+    )
+
+
+class ChatContextDecodeTest(unittest.TestCase):
+    def setUp(self) -> None:
+        chat_context = build_chat_context()
+        self.chat_model_data = chat_context.chat_model.encode()
+        self.chat_settings_data = chat_context.chat_settings.encode()
+
+    def test_decodes_both_models(self) -> None:
+        chat_context = RDChatContext.decode(self.chat_model_data, self.chat_settings_data)
+
+        self.assertEqual(chat_context, build_chat_context())
+
+    def test_missing_key_is_a_miss(self) -> None:
+        self.assertIsNone(RDChatContext.decode(None, self.chat_settings_data))
+        self.assertIsNone(RDChatContext.decode(self.chat_model_data, None))
+
+    def test_chat_model_is_decoded_without_settings(self) -> None:
+        decoded = RDChatContext.decode_chat_model(self.chat_model_data, b"\x00")
+
+        self.assertEqual(decoded, (build_chat_context().chat_model, False))
+        self.assertIsNone(RDChatContext.decode_chat_model(self.chat_model_data, None))
+
+    def test_entry_without_fresh_marker_is_stale(self) -> None:
+        RDChatSettingsModel.stale_ttl = timedelta(minutes=10)
+        self.addCleanup(setattr, RDChatSettingsModel, "stale_ttl", timedelta(0))
+
+        stale = RDChatContext.decode(self.chat_model_data, self.chat_settings_data, None)
+        fresh = RDChatContext.decode(self.chat_model_data, self.chat_settings_data, b"1")
+
+        self.assertTrue(stale.is_stale)
+        self.assertFalse(fresh.is_stale)
+
+    def test_entries_are_never_stale_without_stale_ttl(self) -> None:
+        chat_context = RDChatContext.decode(self.chat_model_data, self.chat_settings_data, None)
+
+        self.assertFalse(chat_context.is_stale)
+
+    def test_hard_ttl_covers_the_stale_window(self) -> None:
+        RDChatSettingsModel.stale_ttl = timedelta(minutes=10)
+        self.addCleanup(setattr, RDChatSettingsModel, "stale_ttl", timedelta(0))
+
+        self.assertEqual(RDChatSettingsModel.hard_ttl(3600), timedelta(hours=1, minutes=10))
+
+    def test_unreadable_payload_is_a_miss(self) -> None:
+        self.assertIsNone(RDChatContext.decode(b"\xc1\xff", self.chat_settings_data))
+        self.assertIsNone(RDChatContext.decode(self.chat_model_data, b"\x00"))
+
+
+class FakeResult:
+    def __init__(self, row: dict[str, Any]) -> None:
+        self.row = row
+
+    def mappings(self) -> Self:
+        return self
+
+    def one(self) -> dict[str, Any]:
+        return self.row
+
+
+class FakeSession:
+    def __init__(self, row: dict[str, Any]) -> None:
+        self.row = row
+        self.statements: list[Executable] = []
+
+    async def execute(self, statement: Executable) -> FakeResult:
+        self.statements.append(statement)
+        return FakeResult(self.row)
+
+
+class ChatContextUpsertTest(unittest.IsolatedAsyncioTestCase):
+    async def test_upserts_both_rows_in_one_statement(self) -> None:
+        expected = build_chat_context()
+        session = FakeSession(
+            {
+                **{f"chat_{k}": v for k, v in msgspec.structs.asdict(expected.chat_model).items()},
+                **{
+                    f"chat_settings_{k}": v
+                    for k, v in msgspec.structs.asdict(expected.chat_settings).items()
+                },
+            },
+        )
+
+        chat_context = await RDChatContext.upsert(
+            session,
+            chat_id=CHAT_ID,
+            chat_type="supergroup",
+            username=None,
+            language_code="en",
+        )
+
+        self.assertEqual(chat_context, expected)
+        self.assertEqual(len(session.statements), 1)
+        sql = " ".join(str(session.statements[0].compile(dialect=postgresql.dialect())).split())
+        self.assertIn("WITH chat AS (INSERT INTO chats", sql)
+        self.assertIn("chat_settings AS (INSERT INTO chats_settings", sql)
+        self.assertEqual(sql.count("ON CONFLICT (id) DO UPDATE"), 2)
+
+
+class FakeStreamResult:
+    def __init__(self, partitions: list[list[tuple[Any, Any]]]) -> None:
+        self._partitions = partitions
+
+    async def partitions(self) -> AsyncIterator[list[tuple[Any, Any]]]:
+        for partition in self._partitions:
+            yield partition
+
+
+class FakeStreamSession:
+    def __init__(self, partitions: list[list[tuple[Any, Any]]]) -> None:
+        self.partitions = partitions
+        self.statements: list[Executable] = []
+
+    def __call__(self) -> Self:
+        return self
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        pass
+
+    async def stream(self, statement: Executable) -> FakeStreamResult:
+        self.statements.append(statement)
+        return FakeStreamResult(self.partitions)
+
+
+class FakePipeline:
+    def __init__(self) -> None:
+        self.commands: list[tuple[Any, ...]] = []
+        self.executed = False
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        pass
+
+    def __getattr__(self, name: str) -> Callable[..., None]:
+        return lambda *args, **_: self.commands.append((name, *args))
+
+    async def execute(self) -> None:
+        self.executed = True
+
+
+class FakePipelineRedis:
+    def __init__(self) -> None:
+        self.pipelines: list[FakePipeline] = []
+
+    def pipeline(self, **_: Any) -> FakePipeline:
+        self.pipelines.append(FakePipeline())
+        return self.pipelines[-1]
+
+
+class WarmUpTest(unittest.IsolatedAsyncioTestCase):
+    def build_rows(self, chat_id: int) -> tuple[SimpleNamespace, SimpleNamespace]:
+        chat_context = build_chat_context()
+        chat_model = msgspec.structs.replace(chat_context.chat_model, id=chat_id)
+        chat_settings = msgspec.structs.replace(chat_context.chat_settings, id=chat_id)
+        return (
+            SimpleNamespace(**msgspec.structs.asdict(chat_model)),
+            SimpleNamespace(**msgspec.structs.asdict(chat_settings)),
+        )
+
+    async def test_rows_are_written_in_one_pipeline_per_partition(self) -> None:
+        session = FakeStreamSession(
+            [[self.build_rows(-1), self.build_rows(-2)], [self.build_rows(-3)]],
+        )
+        redis = FakePipelineRedis()
+
+        warmed = await warm_up_chat_contexts(session, redis, limit=3, batch_size=2)
+
+        self.assertEqual(warmed, 3)
+        self.assertEqual([len(pipe.commands) for pipe in redis.pipelines], [4, 2])
+        self.assertTrue(all(pipe.executed for pipe in redis.pipelines))
+        # Warmed entries are not changes, so nothing is published
+        commands = [command for pipe in redis.pipelines for command in pipe.commands]
+        self.assertEqual({name for name, *_ in commands}, {"setex"})
+        written = [key for _, key, *_ in commands]
+        self.assertIn(RDChatSettingsModel.key(-3), written)
+
+    async def test_most_recent_chats_within_window_are_selected(self) -> None:
+        session = FakeStreamSession([])
+
+        await warm_up_chat_contexts(
+            session, FakePipelineRedis(), limit=10, window=timedelta(days=7)
+        )
+
+        sql = " ".join(str(session.statements[0].compile(dialect=postgresql.dialect())).split())
+        self.assertIn("WHERE chats.registration_datetime >=", sql)
+        self.assertIn("ORDER BY chats.registration_datetime DESC", sql)
+        self.assertIn("LIMIT", sql)
+
+
+@unittest.skipUnless(REDIS_URL, "TEST_REDIS_URL is not set")
+class ChatContextTouchTest(unittest.IsolatedAsyncioTestCase):
+    keys = (
+        RDChatModel.key(CHAT_ID),
+        RDChatSettingsModel.key(CHAT_ID),
+        RDChatSettingsModel.fresh_key(CHAT_ID),
+    )
+
+    async def asyncSetUp(self) -> None:
+        self.redis = Redis.from_url(REDIS_URL)
+        await self.redis.delete(*self.keys)
+        RDChatSettingsModel.stale_ttl = timedelta(minutes=10)
+
+    async def asyncTearDown(self) -> None:
+        RDChatSettingsModel.stale_ttl = timedelta(0)
+        RDChatSettingsModel.compact = False
+        await self.redis.delete(*self.keys)
+        await self.redis.aclose()
+
+    async def pttls(self) -> list[int]:
+        return [await self.redis.pttl(key) for key in self.keys]
+
+    async def test_fresh_entry(self) -> None:
+        await build_chat_context().save(self.redis, timedelta(hours=1))
+        chat_context = await RDChatContext.get(self.redis, CHAT_ID)
+
+        self.assertEqual(chat_context, build_chat_context())
+        self.assertFalse(chat_context.is_stale)
+
+    async def test_entry_without_fresh_marker_is_stale(self) -> None:
+        await build_chat_context().save(self.redis, timedelta(hours=1))
+        await self.redis.delete(RDChatSettingsModel.fresh_key(CHAT_ID))
+        chat_context = await RDChatContext.get(self.redis, CHAT_ID)
+
+        self.assertIsNotNone(chat_context)
+        self.assertTrue(chat_context.is_stale)
+
+        RDChatSettingsModel.stale_ttl = timedelta(0)
+        self.assertFalse((await RDChatContext.get(self.redis, CHAT_ID)).is_stale)
+
+    async def test_young_entries_are_not_touched(self) -> None:
+        await build_chat_context().save(self.redis, timedelta(hours=1))
+
+        touched = await RDChatContext.touch_many(self.redis, [CHAT_ID], timedelta(hours=1))
+
+        self.assertEqual(touched, 0)
+
+    async def test_old_entries_are_extended(self) -> None:
+        for compact in (False, True):
+            RDChatSettingsModel.compact = compact
+            with self.subTest(compact=compact):
+                await build_chat_context().save(self.redis, timedelta(minutes=1))
+                payloads = [await self.redis.get(key) for key in self.keys]
+
+                touched = await RDChatContext.touch_many(self.redis, [CHAT_ID], timedelta(hours=1))
+
+                self.assertEqual(touched, 1)
+                chat_ttl, chat_settings_ttl, fresh_ttl = await self.pttls()
+                hard_ttl = timedelta(hours=1, minutes=10) / timedelta(milliseconds=1)
+                self.assertGreater(chat_ttl, hard_ttl - 5000)
+                self.assertGreater(chat_settings_ttl, hard_ttl - 5000)
+                self.assertGreater(fresh_ttl, timedelta(minutes=55) / timedelta(milliseconds=1))
+                self.assertLessEqual(fresh_ttl, timedelta(hours=1) / timedelta(milliseconds=1))
+                # Only the expiration changes, the payloads are never rewritten
+                self.assertEqual([await self.redis.get(key) for key in self.keys], payloads)
+
+    async def test_stale_entries_stay_stale(self) -> None:
+        await build_chat_context().save(self.redis, timedelta(minutes=1))
+        await self.redis.delete(RDChatSettingsModel.fresh_key(CHAT_ID))
+
+        touched = await RDChatContext.touch_many(self.redis, [CHAT_ID], timedelta(hours=1))
+
+        self.assertEqual(touched, 1)
+        self.assertEqual(await self.redis.exists(RDChatSettingsModel.fresh_key(CHAT_ID)), 0)
+        self.assertTrue((await RDChatContext.get(self.redis, CHAT_ID)).is_stale)
+
+    async def test_missing_entries_are_not_created(self) -> None:
+        touched = await RDChatContext.touch_many(self.redis, [CHAT_ID], timedelta(hours=1))
+
+        self.assertEqual(touched, 0)
+        self.assertEqual(await self.redis.exists(*self.keys), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+import os
+import unittest
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from bot.storages.psql import RDChatContext, RDChatSettingsModel, init_db
+from bot.storages.psql.chat.chat_model import DBChatModel
+from bot.storages.psql.chat.chat_settings_model import DBChatSettingsModel
+from bot.storages.psql.chat.chat_settings_outbox import (
+    PUBLISHER_LOCK_ID,
+    ChatSettingsOutbox,
+    DBChatSettingsOutboxModel,
+)
+from bot.storages.psql.chat.chat_settings_repository import ChatSettingsRepository
+from bot.storages.psql.routing import ReadSessionRouter
+
+PSQL_DSN = os.getenv("TEST_PSQL_DSN")
+REDIS_URL = os.getenv("TEST_REDIS_URL")
+CHAT_IDS = (-1000000000211, -1000000000212, -1000000000213)
+
+
+@unittest.skipUnless(PSQL_DSN and REDIS_URL, "TEST_PSQL_DSN or TEST_REDIS_URL is not set")
+class ChatSettingsOutboxTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.engine = create_async_engine(PSQL_DSN)
+        await init_db(self.engine)
+        self.db_session = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.redis = Redis.from_url(REDIS_URL)
+        self.outbox = ChatSettingsOutbox(self.db_session, self.redis, batch_size=2)
+        self.repository = ChatSettingsRepository(
+            self.db_session, self.outbox, ReadSessionRouter(self.db_session)
+        )
+
+        await self.cleanup()
+        async with self.db_session() as session:
+            for chat_id in CHAT_IDS:
+                await RDChatContext.upsert(
+                    session,
+                    chat_id=chat_id,
+                    chat_type="supergroup",
+                    username=None,
+                    language_code="en",
+                )
+            await session.commit()
+
+    async def asyncTearDown(self) -> None:
+        await self.cleanup()
+        await self.redis.aclose()
+        await self.engine.dispose()
+
+    async def cleanup(self) -> None:
+        async with self.db_session() as session:
+            await session.execute(delete(DBChatSettingsOutboxModel))
+            await session.execute(
+                delete(DBChatSettingsModel).where(DBChatSettingsModel.id.in_(CHAT_IDS))
+            )
+            await session.execute(delete(DBChatModel).where(DBChatModel.id.in_(CHAT_IDS)))
+            await session.commit()
+
+        await RDChatSettingsModel.delete_many(self.redis, CHAT_IDS)
+
+    async def pending(self) -> list[int]:
+        async with self.db_session() as session:
+            return list(
+                await session.scalars(
+                    select(DBChatSettingsOutboxModel.chat_id).order_by(
+                        DBChatSettingsOutboxModel.id
+                    )
+                ),
+            )
+
+    async def cached(self, chat_id: int) -> RDChatSettingsModel | None:
+        return await RDChatSettingsModel.get(self.redis, chat_id)
+
+    async def test_flush_claims_the_oldest_changes_first(self) -> None:
+        changed = {}
+        for chat_id in reversed(CHAT_IDS):
+            changed[chat_id] = await self.repository.set_language(chat_id, "uk")
+
+        self.assertEqual(await self.pending(), list(reversed(CHAT_IDS)))
+
+        self.assertEqual(await self.outbox.flush(), 2)
+        self.assertEqual(await self.pending(), [CHAT_IDS[0]])
+        self.assertEqual(await self.cached(CHAT_IDS[2]), changed[CHAT_IDS[2]])
+        self.assertEqual(await self.cached(CHAT_IDS[1]), changed[CHAT_IDS[1]])
+        self.assertIsNone(await self.cached(CHAT_IDS[0]))
+
+        self.assertEqual(await self.outbox.flush(), 1)
+        self.assertEqual(await self.cached(CHAT_IDS[0]), changed[CHAT_IDS[0]])
+
+        self.assertEqual(await self.outbox.flush(), 0)
+
+    async def test_flush_caches_the_latest_settings(self) -> None:
+        chat_id = CHAT_IDS[0]
+        await self.repository.toggle(chat_id, "kus_enabled")
+        latest = await self.repository.set_language(chat_id, "uk")
+        self.outbox.batch_size = 10
+
+        self.assertEqual(await self.outbox.flush(), 2)
+        self.assertEqual(await self.cached(chat_id), latest)
+
+    async def test_changes_are_kept_until_redis_accepts_them(self) -> None:
+        chat_id = CHAT_IDS[0]
+        latest = await self.repository.set_language(chat_id, "uk")
+        unreachable = Redis(port=1, socket_connect_timeout=0.5)
+        self.outbox.redis = unreachable
+
+        try:
+            with self.assertRaises(RedisError):
+                await self.outbox.flush()
+        finally:
+            self.outbox.redis = self.redis
+            await unreachable.aclose()
+
+        self.assertEqual(await self.pending(), [chat_id])
+        self.assertEqual(await self.outbox.flush(), 1)
+        self.assertEqual(await self.cached(chat_id), latest)
+
+    async def test_only_one_replica_flushes(self) -> None:
+        await self.repository.set_language(CHAT_IDS[0], "uk")
+
+        async with self.db_session() as session:
+            await session.execute(select(func.pg_advisory_xact_lock(PUBLISHER_LOCK_ID)))
+            self.assertEqual(await self.outbox.flush(), -1)
+
+        self.assertEqual(await self.pending(), [CHAT_IDS[0]])
+
+    async def test_update_evicts_the_cached_settings(self) -> None:
+        chat_id = CHAT_IDS[0]
+        async with self.db_session() as session:
+            chat_context = await RDChatContext.upsert(
+                session,
+                chat_id=chat_id,
+                chat_type="supergroup",
+                username=None,
+                language_code="en",
+            )
+        await chat_context.save(self.redis, 3600)
+
+        async with self.redis.pubsub() as pubsub:
+            await pubsub.subscribe(RDChatSettingsModel.invalidation_channel())
+            await pubsub.get_message(timeout=1)
+
+            await self.repository.set_language(chat_id, "uk")
+
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1)
+
+        self.assertIsNone(await self.cached(chat_id))
+        self.assertEqual(int(message["data"]), chat_id)
+        self.assertEqual(await self.pending(), [chat_id])
+
+    async def test_failed_eviction_leaves_the_change_to_the_outbox(self) -> None:
+        unreachable = Redis(port=1, socket_connect_timeout=0.5)
+        self.outbox.redis = unreachable
+
+        try:
+            with self.assertLogs("bot.storages.psql.chat.chat_settings_outbox", "WARNING"):
+                changed = await self.repository.set_language(CHAT_IDS[0], "uk")
+        finally:
+            self.outbox.redis = self.redis
+            await unreachable.aclose()
+
+        self.assertEqual(changed.language_code, "uk")
+        self.assertEqual(await self.pending(), [CHAT_IDS[0]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+import unittest
+from typing import Any, Self
+
+import msgspec
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import Executable
+
+from bot.storages.psql.chat.chat_settings_model import GreetingFarewellType
+from bot.storages.psql.chat.chat_settings_repository import ChatSettingsRepository
+from bot.storages.psql.routing import ReadSessionRouter
+from tests.test_chat_context import CHAT_ID, build_chat_context
+
+
+class FakeResult:
+    def __init__(self, row: dict[str, Any] | None) -> None:
+        self.row = row
+
+    def mappings(self) -> Self:
+        return self
+
+    def one_or_none(self) -> dict[str, Any] | None:
+        return self.row
+
+
+class FakeSession:
+    def __init__(self, row: dict[str, Any] | None) -> None:
+        self.row = row
+        self.statements: list[Executable] = []
+        self.commits = 0
+
+    def __call__(self) -> Self:
+        return self
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        pass
+
+    async def execute(self, statement: Executable) -> FakeResult:
+        self.statements.append(statement)
+        return FakeResult(self.row)
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+
+class FakeOutbox:
+    def __init__(self) -> None:
+        self.evicted: list[int] = []
+        self.wakes = 0
+
+    async def evict(self, chat_id: int) -> None:
+        self.evicted.append(chat_id)
+
+    def wake(self) -> None:
+        self.wakes += 1
+
+
+class ChatSettingsRepositoryTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.chat_settings = build_chat_context().chat_settings
+        self.session = FakeSession(msgspec.structs.asdict(self.chat_settings))
+        self.outbox = FakeOutbox()
+        self.router = ReadSessionRouter(self.session, self.session)
+        self.repository = ChatSettingsRepository(self.session, self.outbox, self.router)
+
+    def sql(self) -> str:
+        (statement,) = self.session.statements
+        compiled = statement.compile(
+            dialect=postgresql.dialect(),
+            compile_kwargs={"literal_binds": True},
+        )
+        return " ".join(str(compiled).split())
+
+
+class ToggleTest(ChatSettingsRepositoryTestCase):
+    async def test_toggle_flips_the_column_in_the_database(self) -> None:
+        chat_settings = await self.repository.toggle(CHAT_ID, "kus_enabled")
+
+        self.assertEqual(chat_settings, self.chat_settings)
+        sql = self.sql()
+        self.assertIn("UPDATE chats_settings SET kus_enabled=NOT chats_settings.kus_enabled", sql)
+        self.assertIn(f"WHERE chats_settings.id = {CHAT_ID} RETURNING", sql)
+
+    async def test_change_is_recorded_in_the_outbox_by_the_same_statement(self) -> None:
+        await self.repository.toggle(CHAT_ID, "reports_enabled")
+
+        self.assertIn(
+            "INSERT INTO chats_settings_outbox (chat_id) SELECT updated.id AS id", self.sql()
+        )
+        self.assertEqual(self.session.commits, 1)
+        self.assertEqual(self.outbox.evicted, [CHAT_ID])
+        self.assertEqual(self.outbox.wakes, 1)
+        self.assertTrue(self.router.is_pinned(CHAT_ID))
+
+    async def test_unknown_chat(self) -> None:
+        self.session.row = None
+
+        self.assertIsNone(await self.repository.toggle(CHAT_ID, "kus_enabled"))
+        self.assertEqual(self.outbox.evicted, [])
+        self.assertFalse(self.router.is_pinned(CHAT_ID))
+
+
+class GreetingFarewellTest(ChatSettingsRepositoryTestCase):
+    async def test_set_media_also_selects_its_type(self) -> None:
+        await self.repository.set_media(CHAT_ID, "greeting", GreetingFarewellType.VIDEO, "file")
+
+        sql = self.sql()
+        self.assertIn("greeting_video_id='file'", sql)
+        self.assertIn("greeting_type='video'", sql)
+
+    async def test_reset_text_only_updates_a_set_text(self) -> None:
+        await self.repository.reset_text(CHAT_ID, "farewell")
+
+        sql = self.sql()
+        self.assertIn("SET farewell_text=NULL", sql)
+        self.assertIn("AND chats_settings.farewell_text IS NOT NULL", sql)
+
+    async def test_reset_media_clears_the_selected_type(self) -> None:
+        await self.repository.reset_media(CHAT_ID, "greeting")
+
+        sql = self.sql()
+        self.assertIn(
+            "greeting_photo_id=CASE WHEN (chats_settings.greeting_type = 'photo') THEN NULL "
+            "ELSE chats_settings.greeting_photo_id END",
+            sql,
+        )
+        self.assertIn(
+            "AND CASE chats_settings.greeting_type WHEN 'photo' THEN "
+            "chats_settings.greeting_photo_id",
+            sql,
+        )
+        self.assertIn("END IS NOT NULL", sql)
+
+    async def test_nothing_to_reset(self) -> None:
+        self.session.row = None
+
+        self.assertIsNone(await self.repository.reset_media(CHAT_ID, "greeting"))
+        self.assertEqual(self.session.commits, 1)
+        self.assertEqual(self.outbox.evicted, [])
+
+    async def test_reset_all_clears_every_column(self) -> None:
+        await self.repository.reset_all(CHAT_ID, "farewell")
+
+        assignments = self.sql().partition(" SET ")[2].partition(" WHERE ")[0]
+        self.assertIn("farewell_type='photo'", assignments)
+        for column in ("text", "topic_id", "photo_id", "video_id", "gif_id", "sticker_id"):
+            self.assertIn(f"farewell_{column}=NULL", assignments)
+        self.assertNotIn("greeting_", assignments)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,237 @@
+import asyncio
+import unittest
+from datetime import datetime, timedelta
+from typing import Any
+
+import msgspec
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.fsm.scene import Scene, on
+from aiogram.types import Chat, Message, Update, User
+
+from bot.middlewares.check_chat_middleware import (
+    ChatContextMiddleware,
+    CheckChatMiddleware,
+    LazyChatContext,
+    _handler_requires_chat_context,
+)
+from bot.storages.memory.chat_cache import ChatCache
+from bot.storages.psql import RDChatContext, RDChatModel, RDChatSettingsModel
+from bot.storages.psql.chat.chat_settings_model import GreetingFarewellType
+
+CHAT_ID = -1000000000305
+
+
+def build_chat() -> tuple[RDChatModel, RDChatSettingsModel]:
+    return (
+        RDChatModel(
+            id=CHAT_ID,
+            chat_type="supergroup",
+            registration_datetime=datetime(2024, 6, 1, 12, 30),  # noqa: DTZ001
+        ),
+        RDChatSettingsModel(
+            id=CHAT_ID,
+            language_code="en",
+            kus_enabled=True,
+            allow_kus_admin=True,
+            admin_tools_enabled=True,
+            reports_enabled=True,
+            greeting_enabled=False,
+            greeting_type=GreetingFarewellType.TEXT,
+            farewell_enabled=False,
+            farewell_type=GreetingFarewellType.TEXT,
+        ),
+    )
+
+
+async def plain_handler(message: Message) -> None:  # noqa: ARG001
+    pass
+
+
+async def settings_handler(
+    message: Message,  # noqa: ARG001
+    chat_settings: RDChatSettingsModel,  # noqa: ARG001
+) -> None:
+    pass
+
+
+async def kwargs_handler(message: Message, **kwargs: Any) -> None:  # noqa: ARG001
+    pass
+
+
+class SettingsScene(Scene, state="check_chat_middleware_test"):
+    @on.message.enter()
+    async def on_enter(self, message: Message) -> None:
+        pass
+
+    @on.message(lambda message: message.text == "plain")
+    async def plain(self, message: Message) -> None:
+        pass
+
+    @on.message()
+    async def with_settings(self, message: Message, chat_settings: RDChatSettingsModel) -> None:
+        pass
+
+
+def scene_handler(name: str) -> HandlerObject:
+    for handler in SettingsScene.as_router().message.handlers:
+        if handler.callback.handler.callback.__name__ == name:
+            return handler
+    raise LookupError(name)
+
+
+class HandlerRequiresChatContextTest(unittest.TestCase):
+    def test_plain_handler(self) -> None:
+        self.assertFalse(_handler_requires_chat_context(HandlerObject(plain_handler)))
+
+    def test_handler_with_chat_settings(self) -> None:
+        self.assertTrue(_handler_requires_chat_context(HandlerObject(settings_handler)))
+
+    def test_handler_with_kwargs(self) -> None:
+        self.assertTrue(_handler_requires_chat_context(HandlerObject(kwargs_handler)))
+
+    def test_flagged_handler(self) -> None:
+        handler = HandlerObject(plain_handler, flags={"chat_context": True})
+
+        self.assertTrue(_handler_requires_chat_context(handler))
+
+    def test_scene_handlers_are_checked_by_the_wrapped_method(self) -> None:
+        self.assertFalse(_handler_requires_chat_context(scene_handler("plain")))
+        self.assertTrue(_handler_requires_chat_context(scene_handler("with_settings")))
+
+
+class LazyChatContextTest(unittest.IsolatedAsyncioTestCase):
+    async def test_settings_are_decoded_once(self) -> None:
+        chat_model, chat_settings = build_chat()
+        calls = 0
+
+        async def decoder(
+            chat_model: RDChatModel, data: bytes
+        ) -> tuple[RDChatModel, RDChatSettingsModel]:
+            nonlocal calls
+            calls += 1
+            return chat_model, RDChatSettingsModel.decode(data)
+
+        chat_context = LazyChatContext(chat_model, chat_settings.encode(), decoder)
+        self.assertFalse(chat_context.resolved)
+
+        self.assertEqual(await chat_context, (chat_model, chat_settings))
+        self.assertEqual(await chat_context, (chat_model, chat_settings))
+        self.assertTrue(chat_context.resolved)
+        self.assertEqual(calls, 1)
+
+
+class CheckChatMiddlewareTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.chat_model, self.chat_settings = build_chat()
+        self.chat_cache = ChatCache()
+        self.chat_cache.set(self.chat_model, self.chat_settings.encode())
+        self.middleware = CheckChatMiddleware(self.chat_cache)
+
+        chat = Chat(id=CHAT_ID, type="supergroup")
+        user = User(id=42, is_bot=False, first_name="Test")
+        self.event = Update(
+            update_id=1,
+            message=Message(
+                message_id=1,
+                date=datetime(2024, 6, 1, 12, 30),  # noqa: DTZ001
+                chat=chat,
+                from_user=user,
+                text="hello",
+            ),
+        )
+        self.data: dict[str, Any] = {
+            "event_chat": chat,
+            "event_from_user": user,
+            "db_session": None,
+            "redis": None,
+        }
+
+    async def run_handler(self, handler: HandlerObject) -> dict[str, Any]:
+        async def call_handler(_: Any, data: dict[str, Any]) -> dict[str, Any]:
+            return data
+
+        async def call_inner(event: Any, data: dict[str, Any]) -> dict[str, Any]:
+            data["handler"] = handler
+            return await ChatContextMiddleware()(call_handler, event, data)
+
+        return await self.middleware(call_inner, self.event, self.data)
+
+    async def test_chat_is_resolved_for_every_update(self) -> None:
+        data = await self.run_handler(HandlerObject(plain_handler))
+
+        self.assertIsInstance(data["chat_context"], LazyChatContext)
+        self.assertEqual(self.middleware.metrics.snapshot().counters["memory_hit"], {"message": 1})
+
+    async def test_settings_stay_encoded_for_handlers_without_them(self) -> None:
+        data = await self.run_handler(HandlerObject(plain_handler))
+
+        self.assertFalse(data["chat_context"].resolved)
+        self.assertNotIn("chat_settings", data)
+        self.assertIsInstance(self.chat_cache.get(CHAT_ID)[1], bytes)
+
+    async def test_settings_are_decoded_for_handlers_that_use_them(self) -> None:
+        data = await self.run_handler(HandlerObject(settings_handler))
+
+        self.assertEqual(data["chat_model"], self.chat_model)
+        self.assertEqual(data["chat_settings"], self.chat_settings)
+        self.assertEqual(self.chat_cache.get(CHAT_ID), (self.chat_model, self.chat_settings))
+
+
+class FakeRedis:
+    def __init__(self, values: dict[str, bytes]) -> None:
+        self.values = values
+
+    async def mget(self, keys: list[str]) -> list[bytes | None]:
+        return [self.values.get(key) for key in keys]
+
+
+class RecordingCheckChatMiddleware(CheckChatMiddleware):
+    def __init__(self, chat_context: RDChatContext, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.chat_context = chat_context
+        self.upserts = 0
+
+    async def _upsert_chat_model(self, *_: Any) -> RDChatContext:
+        self.upserts += 1
+        return self.chat_context
+
+
+class StaleWhileRevalidateTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        RDChatSettingsModel.stale_ttl = timedelta(minutes=10)
+        chat_model, self.stale_settings = build_chat()
+        self.fresh_settings = msgspec.structs.replace(self.stale_settings, language_code="uk")
+        self.redis = FakeRedis(
+            {
+                RDChatModel.key(CHAT_ID): chat_model.encode(),
+                RDChatSettingsModel.key(CHAT_ID): self.stale_settings.encode(),
+            },
+        )
+        self.chat_cache = ChatCache()
+        self.middleware = RecordingCheckChatMiddleware(
+            RDChatContext(chat_model=chat_model, chat_settings=self.fresh_settings),
+            chat_cache=self.chat_cache,
+        )
+
+    async def asyncTearDown(self) -> None:
+        RDChatSettingsModel.stale_ttl = timedelta(0)
+
+    async def test_stale_entry_is_served_and_refreshed_in_background(self) -> None:
+        chat = Chat(id=CHAT_ID, type="supergroup")
+        user = User(id=42, is_bot=False, first_name="Test")
+
+        chat_context = await self.middleware._get_chat_context(  # noqa: SLF001
+            None, self.redis, chat, user, "message"
+        )
+        _, chat_settings = await chat_context
+        self.assertEqual(chat_settings, self.stale_settings)
+
+        await asyncio.gather(*self.middleware.refreshes._calls.values())  # noqa: SLF001
+        self.assertEqual(self.middleware.upserts, 1)
+        self.assertEqual(self.chat_cache.get(CHAT_ID)[1], self.fresh_settings)
+        counters = self.middleware.metrics.snapshot().counters
+        self.assertEqual(counters["redis_stale"], {"message": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
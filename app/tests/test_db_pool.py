@@ -0,0 +1,119 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from bot.storages.psql.utils.pool import InstrumentedQueuePool
+
+
+class FakeConnection:
+    def __init__(self) -> None:
+        self.closed = False
+
+    def rollback(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class FakeDBAPI:
+    class Error(Exception):
+        pass
+
+
+class InstrumentedQueuePoolTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.now = 100.0
+        patcher = mock.patch(
+            "bot.storages.psql.utils.pool.time.monotonic", side_effect=lambda: self.now
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.connections: list[FakeConnection] = []
+        self.pool = InstrumentedQueuePool(
+            self.connect, pool_size=2, max_overflow=1, use_lifo=True, idle_timeout=60.0
+        )
+
+    def connect(self) -> FakeConnection:
+        self.connections.append(FakeConnection())
+        return self.connections[-1]
+
+    def test_reap_closes_only_idle_connections(self) -> None:
+        first, second = self.pool.connect(), self.pool.connect()
+        first.close()
+        self.now += 50.0
+        second.close()
+        self.now += 20.0
+
+        self.assertEqual(self.pool.reap(), 1)
+
+        self.assertEqual([connection.closed for connection in self.connections], [True, False])
+        self.assertEqual(self.pool.checkedin(), 1)
+        self.assertEqual(self.pool.metrics.snapshot().counters["reaped"], {"pool": 1})
+
+    def test_reaped_slots_open_new_connections(self) -> None:
+        connections = [self.pool.connect() for _ in range(3)]
+        for connection in connections:
+            connection.close()
+        self.now += 61.0
+
+        # The overflow connection was closed when it came back to a full pool
+        self.assertEqual(self.pool.reap(), 2)
+        self.assertEqual(self.pool.checkedin(), 0)
+        self.assertTrue(all(connection.closed for connection in self.connections))
+
+        connections = [self.pool.connect() for _ in range(3)]
+        self.assertEqual(len(self.connections), 6)
+        for connection in connections:
+            connection.close()
+
+    def test_reap_is_disabled_without_idle_timeout(self) -> None:
+        self.pool.idle_timeout = None
+        self.pool.connect().close()
+        self.now += 3600.0
+
+        self.assertEqual(self.pool.reap(), 0)
+        self.assertEqual(self.pool.checkedin(), 1)
+
+    def test_idle_connection_is_replaced_at_checkout(self) -> None:
+        self.pool.connect().close()
+        self.now += 61.0
+
+        self.pool.connect().close()
+
+        self.assertEqual([connection.closed for connection in self.connections], [True, False])
+        self.assertEqual(self.pool.metrics.snapshot().counters["discarded"], {"pool": 1})
+
+    def ping_failing_with(self, error: type[BaseException]) -> None:
+        self.pool.stale_after = 30.0
+        self.pool.connect().close()
+        self.now += 31.0
+
+        dialect = self.pool._dialect  # noqa: SLF001
+        dbapi = mock.patch.object(dialect, "loaded_dbapi", FakeDBAPI, create=True)
+        ping = mock.patch.object(dialect, "do_ping", side_effect=error, create=True)
+        dbapi.start()
+        ping.start()
+        self.addCleanup(dbapi.stop)
+        self.addCleanup(ping.stop)
+
+    def test_failed_ping_replaces_the_connection(self) -> None:
+        self.ping_failing_with(FakeDBAPI.Error)
+
+        self.pool.connect().close()
+
+        self.assertEqual([connection.closed for connection in self.connections], [True, False])
+        self.assertEqual(self.pool.metrics.snapshot().counters["pings"], {"pool": 1})
+
+    def test_interrupted_ping_returns_the_connection(self) -> None:
+        self.ping_failing_with(asyncio.CancelledError)
+
+        with self.assertRaises(asyncio.CancelledError):
+            self.pool.connect()
+
+        self.assertEqual(self.pool.checkedout(), 0)
+        self.assertTrue(self.connections[0].closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+
+from bot.utils.metrics import Histogram, Metrics
+
+
+class HistogramTest(unittest.TestCase):
+    def test_observations_land_in_their_bucket(self) -> None:
+        histogram = Histogram(buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 5.0):
+            histogram.observe(value)
+
+        snapshot = histogram.snapshot()
+
+        self.assertEqual(snapshot.buckets, {0.1: 2, 1.0: 1, float("inf"): 1})
+        self.assertEqual(snapshot.count, 4)
+        self.assertAlmostEqual(snapshot.sum, 5.65)
+
+    def test_quantiles_are_bucket_upper_bounds(self) -> None:
+        histogram = Histogram(buckets=(0.1, 1.0))
+        for _ in range(90):
+            histogram.observe(0.05)
+        for _ in range(9):
+            histogram.observe(0.5)
+        histogram.observe(5.0)
+
+        self.assertEqual(histogram.quantile(0.5), 0.1)
+        self.assertEqual(histogram.quantile(0.9), 0.1)
+        self.assertEqual(histogram.quantile(0.99), 1.0)
+        self.assertEqual(histogram.quantile(1.0), float("inf"))
+
+    def test_empty_histogram(self) -> None:
+        self.assertEqual(Histogram().quantile(0.99), 0.0)
+
+
+class MetricsTest(unittest.TestCase):
+    def test_counters_are_kept_per_label(self) -> None:
+        metrics = Metrics()
+        metrics.inc("redis_hit", "message")
+        metrics.inc("redis_hit", "message")
+        metrics.inc("redis_hit", "callback_query", 3)
+
+        self.assertEqual(
+            metrics.snapshot().counters,
+            {"redis_hit": {"message": 2, "callback_query": 3}},
+        )
+
+    def test_timer_observes_elapsed_time(self) -> None:
+        metrics = Metrics()
+
+        with metrics.timer("decode_seconds", "message"):
+            pass
+
+        snapshot = metrics.snapshot().histograms["decode_seconds"]["message"]
+        self.assertEqual(snapshot.count, 1)
+        self.assertGreaterEqual(snapshot.sum, 0.0)
+
+    def test_timer_observes_failed_calls(self) -> None:
+        metrics = Metrics()
+
+        with self.assertRaises(LookupError), metrics.timer("db_upsert_seconds", "message"):
+            raise LookupError
+
+        self.assertEqual(metrics.snapshot().histograms["db_upsert_seconds"]["message"].count, 1)
+
+    def test_reset(self) -> None:
+        metrics = Metrics()
+        metrics.inc("redis_hit", "message")
+        metrics.observe("decode_seconds", "message", 0.001)
+
+        metrics.reset()
+
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot.counters, {})
+        self.assertEqual(snapshot.histograms, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from unittest import mock
+
+from bot.storages.psql.routing import ReadSessionRouter
+
+CHAT_ID = -1000000000024
+
+
+def primary() -> str:
+    return "primary"
+
+
+def replica() -> str:
+    return "replica"
+
+
+class ReadSessionRouterTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.now = 100.0
+        patcher = mock.patch(
+            "bot.storages.psql.routing.time.monotonic", side_effect=lambda: self.now
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.router = ReadSessionRouter(primary, replica, read_your_writes_window=5.0)
+
+    def test_reads_go_to_the_replica(self) -> None:
+        self.assertEqual(self.router(CHAT_ID), "replica")
+        self.assertEqual(self.router(), "replica")
+
+    def test_without_replica_everything_goes_to_the_primary(self) -> None:
+        router = ReadSessionRouter(primary)
+        router.written(CHAT_ID)
+
+        self.assertEqual(router(CHAT_ID), "primary")
+        self.assertFalse(router.is_pinned(CHAT_ID))
+
+    def test_changed_chat_is_read_from_the_primary_within_the_window(self) -> None:
+        self.router.written(CHAT_ID)
+        self.now += 4.9
+
+        self.assertEqual(self.router(CHAT_ID), "primary")
+        self.assertEqual(self.router(CHAT_ID + 1), "replica")
+        self.assertEqual(self.router(), "replica")
+
+    def test_pin_expires_after_the_window(self) -> None:
+        self.router.written(CHAT_ID)
+        self.now += 5.0
+
+        self.assertFalse(self.router.is_pinned(CHAT_ID))
+        self.assertEqual(self.router(CHAT_ID), "replica")
+
+    def test_another_write_extends_the_window(self) -> None:
+        self.router.written(CHAT_ID)
+        self.now += 3.0
+        self.router.written(CHAT_ID)
+        self.now += 3.0
+
+        self.assertTrue(self.router.is_pinned(CHAT_ID))
+
+    def test_expired_pins_are_dropped_on_write(self) -> None:
+        self.router.written(CHAT_ID)
+        self.now += 10.0
+        self.router.written(CHAT_ID + 1)
+
+        self.assertEqual(list(self.router._pinned), [CHAT_ID + 1])  # noqa: SLF001
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,191 @@
+import unittest
+from datetime import UTC, datetime
+from typing import Any, ClassVar
+
+import msgspec
+from aiogram.enums import ChatMemberStatus
+
+from bot.storages.psql import RDChatModel, RDChatSettingsModel
+from bot.storages.psql.chat.chat_settings_model import (
+    COMPACT_DEFAULTS,
+    COMPACT_FORMAT_V1,
+    GreetingFarewellType,
+    ReportPolicy,
+)
+from bot.storages.redis.base import SCHEMA_MARKER, RedisStruct
+from bot.storages.redis.chat.chat_member_model import RDChatMemberModel
+from bot.storages.redis.reports_special_chat.set_reports_special_chat_pending_model import (
+    RDSetReportsSpecialChatPending,
+)
+
+
+class VersionedStruct(RedisStruct, kw_only=True, array_like=True):
+    schema_version: ClassVar[int] = 3
+
+    id: int
+    title: str
+    members: int
+
+
+@VersionedStruct.register_upgrade(1)
+def _add_title(raw: Any) -> Any:
+    return [raw[0], "", raw[1]]
+
+
+@VersionedStruct.register_upgrade(2)
+def _count_members(raw: Any) -> Any:
+    return [raw[0], raw[1], len(raw[2])]
+
+
+def build_chat_settings(**changes: Any) -> RDChatSettingsModel:
+    chat_settings = RDChatSettingsModel(
+        id=-1001234567890,
+        language_code="uk",
+        kus_enabled=True,
+        allow_kus_admin=True,
+        admin_tools_enabled=True,
+        reports_enabled=True,
+        greeting_enabled=True,
+        greeting_type=GreetingFarewellType.PHOTO,
+        farewell_enabled=True,
+        farewell_type=GreetingFarewellType.PHOTO,
+    )
+    return msgspec.structs.replace(chat_settings, **changes)
+
+
+CHAT_SETTINGS: dict[str, RDChatSettingsModel] = {
+    "default": build_chat_settings(),
+    "customized": build_chat_settings(
+        language_code="en",
+        timezone="Europe/Kyiv",
+        reports_policy=ReportPolicy.SPECIAL_CHAT,
+        reports_special_chat_id=-1009876543210,
+        greeting_type=GreetingFarewellType.TEXT,
+        greeting_text="Welcome to the chat!",
+        greeting_topic_id=42,
+        farewell_enabled=False,
+    ),
+}
+
+
+class ChatSettingsCodecTest(unittest.TestCase):
+    def tearDown(self) -> None:
+        RDChatSettingsModel.compact = False
+
+    def test_plain_round_trip(self) -> None:
+        for name, chat_settings in CHAT_SETTINGS.items():
+            with self.subTest(name):
+                self.assertEqual(RDChatSettingsModel.decode(chat_settings.encode()), chat_settings)
+
+    def test_plain_is_readable_without_header_support(self) -> None:
+        for name, chat_settings in CHAT_SETTINGS.items():
+            with self.subTest(name):
+                data = chat_settings.encode()
+                self.assertNotEqual(data[0], SCHEMA_MARKER)
+                self.assertEqual(
+                    msgspec.msgpack.decode(data, type=RDChatSettingsModel), chat_settings
+                )
+
+    def test_compact_round_trip(self) -> None:
+        RDChatSettingsModel.compact = True
+
+        for name, chat_settings in CHAT_SETTINGS.items():
+            with self.subTest(name):
+                data = chat_settings.encode()
+                self.assertEqual(data[:3], bytes((SCHEMA_MARKER, 1)) + COMPACT_FORMAT_V1)
+                self.assertEqual(RDChatSettingsModel.decode(data), chat_settings)
+
+    def test_compact_is_smaller_for_defaults(self) -> None:
+        chat_settings = CHAT_SETTINGS["default"]
+        plain = chat_settings.encode()
+        RDChatSettingsModel.compact = True
+
+        self.assertLess(len(chat_settings.encode()), len(plain))
+
+    def test_compact_stores_only_fields_that_differ_from_defaults(self) -> None:
+        defaults = msgspec.convert(list(COMPACT_DEFAULTS), RDChatSettingsModel)
+        chat_settings = msgspec.structs.replace(defaults, id=-1, greeting_text="Hi")
+
+        body = chat_settings.encode_compact()
+
+        fields = RDChatSettingsModel.__struct_fields__
+        self.assertEqual(body[:1], COMPACT_FORMAT_V1)
+        self.assertEqual(
+            msgspec.msgpack.decode(body[1:]),
+            {fields.index("id"): -1, fields.index("greeting_text"): "Hi"},
+        )
+        self.assertEqual(RDChatSettingsModel.decode_compact(body), chat_settings)
+
+    def test_both_formats_are_decoded_regardless_of_the_flag(self) -> None:
+        chat_settings = CHAT_SETTINGS["customized"]
+        plain = chat_settings.encode()
+        RDChatSettingsModel.compact = True
+        compact = chat_settings.encode()
+
+        for compact_enabled in (False, True):
+            RDChatSettingsModel.compact = compact_enabled
+            with self.subTest(compact=compact_enabled):
+                self.assertEqual(RDChatSettingsModel.decode(plain), chat_settings)
+                self.assertEqual(RDChatSettingsModel.decode(compact), chat_settings)
+
+    def test_compact_of_another_version_is_a_miss(self) -> None:
+        RDChatSettingsModel.compact = True
+        data = CHAT_SETTINGS["customized"].encode()
+
+        self.assertIsNone(RDChatSettingsModel.decode(bytes((SCHEMA_MARKER, 2)) + data[2:]))
+
+    def test_incompatible_payload_is_a_miss(self) -> None:
+        for data in (b"\x01", b"\x01\x92\xcb", b"1", msgspec.msgpack.encode([1, 2, 3])):
+            with self.subTest(data=data):
+                self.assertIsNone(RDChatSettingsModel.decode(data))
+
+
+class RedisStructCodecTest(unittest.TestCase):
+    def test_round_trip(self) -> None:
+        models: list[RedisStruct] = [
+            RDChatModel(
+                id=-1001234567890,
+                chat_type="supergroup",
+                username="chat",
+                registration_datetime=datetime(2024, 6, 1, 12, 30),  # noqa: DTZ001
+            ),
+            RDChatMemberModel(
+                chat_id=-1001234567890,
+                user_id=1,
+                status=ChatMemberStatus.RESTRICTED,
+                can_send_messages=False,
+                until_date=datetime(2038, 1, 1, tzinfo=UTC),
+            ),
+            RDSetReportsSpecialChatPending(
+                origin_chat_id=-1001234567890,
+                origin_message_id=1,
+                additional_entropy="entropy",
+                secret_hash="secret",
+            ),
+            VersionedStruct(id=1, title="title", members=2),
+        ]
+
+        for model in models:
+            with self.subTest(type(model).__name__):
+                self.assertEqual(type(model).decode(model.encode()), model)
+
+    def test_versioned_payload_has_header(self) -> None:
+        data = VersionedStruct(id=1, title="title", members=2).encode()
+        self.assertEqual(data[:2], bytes((SCHEMA_MARKER, 3)))
+
+    def test_older_versions_are_upgraded(self) -> None:
+        v1 = msgspec.msgpack.encode([1, ["a", "b"]])
+        v2 = bytes((SCHEMA_MARKER, 2)) + msgspec.msgpack.encode([1, "title", ["a", "b"]])
+
+        self.assertEqual(VersionedStruct.decode(v1), VersionedStruct(id=1, title="", members=2))
+        self.assertEqual(
+            VersionedStruct.decode(v2), VersionedStruct(id=1, title="title", members=2)
+        )
+
+    def test_newer_version_is_a_miss(self) -> None:
+        data = bytes((SCHEMA_MARKER, 4)) + msgspec.msgpack.encode([1, "title", 2, None])
+        self.assertIsNone(VersionedStruct.decode(data))
+
+
+if __name__ == "__main__":
+    unittest.main()
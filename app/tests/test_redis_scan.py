@@ -0,0 +1,97 @@
+import unittest
+from collections.abc import AsyncIterator
+from fnmatch import fnmatchcase
+from typing import Any, Self
+
+from bot.storages.redis.reports_special_chat.set_reports_special_chat_pending_model import (
+    RDSetReportsSpecialChatPending,
+)
+from bot.storages.redis.utils.scan import unlink_by_pattern
+
+
+class FakeRedis:
+    """Keyspace of plain values and sets with the few commands the scanned deletes use."""
+
+    def __init__(self, keys: dict[str, Any] | None = None) -> None:
+        self.keys: dict[str, Any] = keys or {}
+        self.unlink_calls: list[int] = []
+        self.scan_counts: list[int] = []
+
+    async def scan_iter(self, match: str, count: int) -> AsyncIterator[bytes]:
+        self.scan_counts.append(count)
+        for key in list(self.keys):
+            if fnmatchcase(key, match):
+                yield key.encode()
+
+    async def unlink(self, *keys: bytes | str) -> int:
+        self.unlink_calls.append(len(keys))
+        names = [key.decode() if isinstance(key, bytes) else key for key in keys]
+        return sum(self.keys.pop(name, None) is not None for name in names)
+
+    async def smembers(self, key: str) -> set[bytes]:
+        return {member.encode() for member in self.keys.get(key, set())}
+
+    def pipeline(self, **_: Any) -> "FakePipeline":
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis: FakeRedis) -> None:
+        self.redis = redis
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        pass
+
+    def setex(self, key: str, _: Any, value: bytes) -> None:
+        self.redis.keys[key] = value
+
+    def sadd(self, key: str, member: str) -> None:
+        self.redis.keys.setdefault(key, set()).add(member)
+
+    def expire(self, *_: Any) -> None:
+        pass
+
+    async def execute(self) -> None:
+        pass
+
+
+class UnlinkByPatternTest(unittest.IsolatedAsyncioTestCase):
+    async def test_matching_keys_are_unlinked_in_batches(self) -> None:
+        redis = FakeRedis({f"RDChatModel:{chat_id}": b"" for chat_id in range(5)})
+        redis.keys["RDChatSettingsModel:1"] = b""
+
+        unlinked = await unlink_by_pattern(redis, "RDChatModel:*", count=2)
+
+        self.assertEqual(unlinked, 5)
+        self.assertEqual(redis.scan_counts, [2])
+        self.assertEqual(redis.unlink_calls, [2, 2, 1])
+        self.assertEqual(list(redis.keys), ["RDChatSettingsModel:1"])
+
+    async def test_nothing_to_unlink(self) -> None:
+        redis = FakeRedis()
+
+        self.assertEqual(await unlink_by_pattern(redis, "RDChatModel:*"), 0)
+        self.assertEqual(redis.unlink_calls, [])
+
+
+class PendingIndexTest(unittest.IsolatedAsyncioTestCase):
+    async def test_delete_uses_the_user_index_instead_of_scanning(self) -> None:
+        redis = FakeRedis()
+        first = await RDSetReportsSpecialChatPending.set(redis, -1, 10, user_id=42)
+        second = await RDSetReportsSpecialChatPending.set(redis, -2, 20, user_id=42)
+        other = await RDSetReportsSpecialChatPending.set(redis, -1, 10, user_id=43)
+
+        await RDSetReportsSpecialChatPending.delete(redis, 42)
+
+        self.assertEqual(redis.scan_counts, [])
+        self.assertNotIn(RDSetReportsSpecialChatPending.key(42, first), redis.keys)
+        self.assertNotIn(RDSetReportsSpecialChatPending.key(42, second), redis.keys)
+        self.assertNotIn(RDSetReportsSpecialChatPending.index_key(42), redis.keys)
+        self.assertIn(RDSetReportsSpecialChatPending.key(43, other), redis.keys)
+
+
+if __name__ == "__main__":
+    unittest.main()
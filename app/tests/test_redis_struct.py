@@ -0,0 +1,145 @@
+import unittest
+from collections.abc import Callable
+from datetime import timedelta
+from typing import Any, Self
+
+from bot.storages.psql import RDChatModel, RDChatSettingsModel
+from bot.storages.redis.base import RedisStruct, redis_transaction
+from tests.test_chat_context import CHAT_ID, build_chat_context
+
+
+class ChatTitle(RedisStruct, kw_only=True, array_like=True):
+    chat_id: int
+    topic_id: int
+    title: str
+
+    def key_parts(self) -> tuple[int, int]:
+        return self.chat_id, self.topic_id
+
+
+class FakeRedis:
+    """Plain values with expirations, written through pipelines like the real client."""
+
+    def __init__(self) -> None:
+        self.values: dict[str, bytes] = {}
+        self.ttls: dict[str, timedelta] = {}
+        self.pipelines: list[FakePipeline] = []
+
+    def pipeline(self, *, transaction: bool = True) -> "FakePipeline":
+        self.pipelines.append(FakePipeline(self, transaction=transaction))
+        return self.pipelines[-1]
+
+    async def get(self, key: str) -> bytes | None:
+        return self.values.get(key)
+
+    async def mget(self, keys: list[str]) -> list[bytes | None]:
+        return [self.values.get(key) for key in keys]
+
+    def setex(self, key: str, ttl: timedelta, value: bytes) -> bool:
+        self.values[key] = value
+        self.ttls[key] = ttl
+        return True
+
+    def set(self, key: str, value: bytes) -> bool:
+        self.values[key] = value
+        return True
+
+    def delete(self, *keys: str) -> int:
+        return sum(self.values.pop(key, None) is not None for key in keys)
+
+
+class FakePipeline:
+    def __init__(self, redis: FakeRedis, *, transaction: bool) -> None:
+        self.redis = redis
+        self.transaction = transaction
+        self.commands: list[Callable[[], Any]] = []
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        pass
+
+    def __getattr__(self, name: str) -> Callable[..., None]:
+        command = getattr(self.redis, name)
+        return lambda *args: self.commands.append(lambda: command(*args))
+
+    async def execute(self) -> list[Any]:
+        commands, self.commands = self.commands, []
+        return [command() for command in commands]
+
+
+def build_titles(count: int) -> list[ChatTitle]:
+    return [
+        ChatTitle(chat_id=-1, topic_id=topic_id, title=f"#{topic_id}") for topic_id in range(count)
+    ]
+
+
+class RedisStructTest(unittest.IsolatedAsyncioTestCase):
+    def test_key_joins_class_name_and_parts(self) -> None:
+        self.assertEqual(ChatTitle.key(-1, 7), "ChatTitle:-1:7")
+
+    async def test_save_and_get(self) -> None:
+        redis = FakeRedis()
+        title = ChatTitle(chat_id=-1, topic_id=7, title="News")
+
+        await title.save(redis, timedelta(minutes=5))
+
+        self.assertEqual(await ChatTitle.get(redis, -1, 7), title)
+        self.assertEqual(redis.ttls[ChatTitle.key(-1, 7)], timedelta(minutes=5))
+        self.assertIsNone(await ChatTitle.get(redis, -1, 8))
+
+    async def test_save_many_uses_one_pipeline(self) -> None:
+        redis = FakeRedis()
+
+        await ChatTitle.save_many(redis, build_titles(3))
+
+        self.assertEqual(len(redis.pipelines), 1)
+        self.assertEqual(len(redis.values), 3)
+
+    async def test_get_many_keeps_order_and_misses(self) -> None:
+        redis = FakeRedis()
+        titles = build_titles(2)
+        await ChatTitle.save_many(redis, titles)
+
+        found = await ChatTitle.get_many(redis, [(-1, 1), (-1, 5), (-1, 0)])
+
+        self.assertEqual(found, [titles[1], None, titles[0]])
+        self.assertEqual(await ChatTitle.get_many(redis, []), [])
+
+    async def test_delete_many_counts_removed_entries(self) -> None:
+        redis = FakeRedis()
+        await ChatTitle.save_many(redis, build_titles(3))
+
+        deleted = await ChatTitle.delete_many(redis, [(-1, 0), (-1, 2), (-1, 9)])
+
+        self.assertEqual(deleted, 2)
+        self.assertEqual(list(redis.values), [ChatTitle.key(-1, 1)])
+        self.assertEqual(await ChatTitle.delete_many(redis, []), 0)
+
+    async def test_redis_transaction_executes_on_exit(self) -> None:
+        redis = FakeRedis()
+
+        async with redis_transaction(redis) as pipe:
+            for title in build_titles(2):
+                title.queue_save(pipe, 60)
+            self.assertEqual(redis.values, {})
+
+        self.assertTrue(redis.pipelines[0].transaction)
+        self.assertEqual(len(redis.values), 2)
+
+    async def test_chat_context_is_saved_in_one_transaction(self) -> None:
+        redis = FakeRedis()
+        chat_context = build_chat_context()
+
+        await chat_context.save(redis, timedelta(hours=1))
+
+        self.assertEqual([pipe.transaction for pipe in redis.pipelines], [True])
+        self.assertEqual(
+            set(redis.values),
+            {RDChatModel.key(CHAT_ID), RDChatSettingsModel.key(CHAT_ID)},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
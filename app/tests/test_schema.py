@@ -0,0 +1,123 @@
+import unittest
+from typing import Any, Self
+from unittest import mock
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.sql import Executable
+
+from bot.storages.psql.base import Base, apply_additive_schema, init_db, schema_fingerprint
+
+
+def build_metadata(*columns: Column[Any]) -> MetaData:
+    metadata = MetaData()
+    Table("chats", metadata, Column("id", Integer, primary_key=True), *columns)
+    return metadata
+
+
+class FakeConnection:
+    """Records the executed statements and answers the catalog query with `existing`."""
+
+    dialect = postgresql.dialect()
+
+    def __init__(self, existing: set[tuple[str, str]], stored: str | None = None) -> None:
+        self.existing = existing
+        self.stored = stored
+        self.statements: list[str] = []
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        pass
+
+    def begin(self) -> Self:
+        return self
+
+    async def execute(self, statement: Executable) -> list[tuple[str, str]]:
+        self.statements.append(" ".join(str(statement.compile(dialect=self.dialect)).split()))
+        return list(self.existing)
+
+    async def scalar(self, statement: Executable) -> str | None:
+        await self.execute(statement)
+        return self.stored
+
+
+class SchemaFingerprintTest(unittest.TestCase):
+    def fingerprint(self, metadata: MetaData) -> str:
+        with mock.patch.object(Base, "metadata", metadata):
+            return schema_fingerprint(postgresql.dialect())
+
+    def test_fingerprint_is_stable(self) -> None:
+        self.assertEqual(self.fingerprint(build_metadata()), self.fingerprint(build_metadata()))
+
+    def test_fingerprint_changes_with_the_schema(self) -> None:
+        self.assertNotEqual(
+            self.fingerprint(build_metadata()),
+            self.fingerprint(build_metadata(Column("title", String))),
+        )
+
+
+class ApplyAdditiveSchemaTest(unittest.IsolatedAsyncioTestCase):
+    async def apply(self, metadata: MetaData, existing: set[tuple[str, str]]) -> list[str]:
+        conn = FakeConnection(existing)
+        with mock.patch.object(Base, "metadata", metadata):
+            await apply_additive_schema(conn)
+        return conn.statements
+
+    async def test_only_missing_columns_are_added(self) -> None:
+        metadata = build_metadata(Column("title", String), Column("topic_id", Integer))
+
+        statements = await self.apply(metadata, {("chats", "id"), ("chats", "title")})
+
+        self.assertTrue(statements[0].startswith("CREATE TABLE IF NOT EXISTS chats"))
+        self.assertEqual(
+            [statement for statement in statements if statement.startswith("ALTER")],
+            ["ALTER TABLE chats ADD COLUMN IF NOT EXISTS topic_id INTEGER"],
+        )
+
+    async def test_required_column_without_default_is_added_as_nullable(self) -> None:
+        metadata = build_metadata(Column("title", String, nullable=False))
+
+        with self.assertLogs("bot.storages.psql.base", "WARNING") as logs:
+            statements = await self.apply(metadata, {("chats", "id")})
+
+        self.assertIn("ALTER TABLE chats ADD COLUMN IF NOT EXISTS title VARCHAR", statements)
+        self.assertIn("Adding chats.title as nullable", logs.output[0])
+        self.assertFalse(metadata.tables["chats"].c.title.nullable)
+
+    async def test_required_column_with_default_stays_required(self) -> None:
+        metadata = build_metadata(
+            Column("title", String, nullable=False, server_default=text("''")),
+        )
+
+        statements = await self.apply(metadata, {("chats", "id")})
+
+        self.assertIn(
+            "ALTER TABLE chats ADD COLUMN IF NOT EXISTS title VARCHAR DEFAULT '' NOT NULL",
+            statements,
+        )
+
+
+class InitDbTest(unittest.IsolatedAsyncioTestCase):
+    async def test_matching_fingerprint_skips_the_ddl(self) -> None:
+        metadata = build_metadata()
+        with mock.patch.object(Base, "metadata", metadata):
+            conn = FakeConnection(set(), stored=schema_fingerprint(FakeConnection.dialect))
+            await init_db(conn)
+
+        self.assertEqual(len(conn.statements), 3)
+        self.assertFalse(any("ALTER" in statement for statement in conn.statements))
+
+    async def test_changed_fingerprint_applies_and_stores_the_schema(self) -> None:
+        with mock.patch.object(Base, "metadata", build_metadata()):
+            conn = FakeConnection({("chats", "id")}, stored="outdated")
+            await init_db(conn)
+
+        self.assertIn("CREATE TABLE IF NOT EXISTS chats", " ".join(conn.statements))
+        self.assertTrue(conn.statements[-1].startswith("INSERT INTO schema_meta"))
+        self.assertIn("ON CONFLICT (key) DO UPDATE", conn.statements[-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import unittest
+from typing import Any
+
+from redis.backoff import ExponentialBackoff, NoBackoff
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+
+from bot.settings import PostgresSettings, RedisSettings, Settings
+from bot.storages.redis.utils.pool import InstrumentedConnectionPool
+
+
+def build_settings(
+    *,
+    psql: dict[str, Any] | None = None,
+    redis: dict[str, Any] | None = None,
+) -> Settings:
+    return Settings(
+        developer_id=1,
+        bot_token="token",
+        psql=PostgresSettings(
+            host="db", port=5432, user="bot", password="secret", db="bot", **psql or {}
+        ),
+        redis=RedisSettings(
+            host="cache", port=6379, user="bot", password="secret", db=2, **redis or {}
+        ),
+    )
+
+
+class RedisPoolTest(unittest.IsolatedAsyncioTestCase):
+    async def test_pool_is_instrumented_and_configured(self) -> None:
+        redis = await build_settings(redis={"max_connections": 7, "pool_timeout": 1.5}).redis_dsn()
+        pool = redis.connection_pool
+
+        self.assertIsInstance(pool, InstrumentedConnectionPool)
+        self.assertEqual(pool.max_connections, 7)
+        self.assertEqual(pool.timeout, 1.5)
+        self.assertEqual(pool.connection_kwargs["host"], "cache")
+        self.assertEqual(pool.connection_kwargs["db"], 2)
+        self.assertIsNone(pool.connection_kwargs["socket_timeout"])
+        self.assertEqual(pool.connection_kwargs["socket_connect_timeout"], 2.0)
+        self.assertEqual(pool.connection_kwargs["health_check_interval"], 30)
+        await redis.aclose()
+
+    async def test_commands_are_not_retried_by_default(self) -> None:
+        redis = await build_settings().redis_dsn()
+        kwargs = redis.connection_pool.connection_kwargs
+
+        self.assertIsInstance(kwargs["retry"]._backoff, NoBackoff)  # noqa: SLF001
+        self.assertEqual(kwargs["retry"]._retries, 0)  # noqa: SLF001
+        self.assertEqual(kwargs["retry_on_error"], [])
+        await redis.aclose()
+
+    async def test_retries_back_off_exponentially(self) -> None:
+        redis = await build_settings(redis={"retry_attempts": 3}).redis_dsn()
+        kwargs = redis.connection_pool.connection_kwargs
+
+        self.assertIsInstance(kwargs["retry"]._backoff, ExponentialBackoff)  # noqa: SLF001
+        self.assertEqual(kwargs["retry"]._retries, 3)  # noqa: SLF001
+        self.assertEqual(kwargs["retry_on_error"], [RedisConnectionError, RedisTimeoutError])
+        await redis.aclose()
+
+    def test_stats_of_an_unused_pool(self) -> None:
+        stats = InstrumentedConnectionPool(max_connections=3).stats()
+
+        self.assertEqual((stats.max_connections, stats.in_use, stats.idle), (3, 0, 0))
+        self.assertEqual((stats.waiting, stats.peak_in_use, stats.errors), (0, 0, 0))
+        self.assertEqual(stats.checkout, {})
+
+    async def test_failed_checkouts_are_counted(self) -> None:
+        pool = InstrumentedConnectionPool(host="127.0.0.1", port=1, socket_connect_timeout=1)
+
+        with self.assertRaises(RedisConnectionError):
+            await pool.get_connection("GET")
+
+        stats = pool.stats()
+        self.assertEqual(stats.errors, 1)
+        self.assertEqual(stats.checkout["GET"].count, 1)
+        self.assertEqual(stats.waiting, 0)
+        await pool.disconnect()
+
+
+class PostgresEngineOptionsTest(unittest.TestCase):
+    def test_direct_profile_caches_statements(self) -> None:
+        options = build_settings(psql={"prepared_statement_cache_size": 100}).psql_engine_options()
+
+        self.assertEqual(
+            options["connect_args"],
+            {
+                "prepared_statement_cache_size": 100,
+                "server_settings": {"idle_session_timeout": "605000"},
+            },
+        )
+
+    def test_server_keeps_idle_sessions_without_idle_timeout(self) -> None:
+        options = build_settings(psql={"pool_idle_timeout": None}).psql_engine_options()
+
+        self.assertNotIn("server_settings", options["connect_args"])
+        self.assertIsNone(options["idle_timeout"])
+
+    def test_pgbouncer_profile_prepares_unique_statements(self) -> None:
+        options = build_settings(psql={"profile": "pgbouncer"}).psql_engine_options()
+        connect_args = options["connect_args"]
+        name_func = connect_args.pop("prepared_statement_name_func")
+
+        self.assertEqual(
+            connect_args,
+            {"prepared_statement_cache_size": 0, "statement_cache_size": 0},
+        )
+        self.assertNotEqual(name_func(), name_func())
+        self.assertTrue(name_func().startswith("__asyncpg_"))
+
+
+class PostgresPoolLimitsTest(unittest.TestCase):
+    def test_pool_size_and_overflow_without_budget(self) -> None:
+        settings = build_settings(psql={"pool_size": 20, "max_overflow": 5})
+
+        self.assertEqual(settings.psql_pool_limits(), (20, 5))
+
+    def test_budget_is_split_between_processes(self) -> None:
+        settings = build_settings(psql={"connection_budget": 90, "processes": 4})
+
+        self.assertEqual(settings.psql_pool_limits(), (11, 11))
+
+    def test_every_process_keeps_a_connection(self) -> None:
+        settings = build_settings(psql={"connection_budget": 2, "processes": 4})
+
+        self.assertEqual(settings.psql_pool_limits(), (1, 0))
+
+    def test_idle_connections_are_reaped_by_the_pool(self) -> None:
+        options = build_settings(psql={"pool_idle_timeout": 120.0}).psql_engine_options()
+
+        self.assertEqual(options["idle_timeout"], 120.0)
+        self.assertTrue(options["pool_use_lifo"])
+
+    def test_pgbouncer_profile_keeps_the_idle_timeout(self) -> None:
+        options = build_settings(psql={"profile": "pgbouncer"}).psql_engine_options()
+
+        self.assertEqual(options["idle_timeout"], 600.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
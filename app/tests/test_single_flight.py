@@ -0,0 +1,77 @@
+import asyncio
+import unittest
+
+from bot.utils.single_flight import SingleFlight
+
+
+class SingleFlightTest(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_calls_share_one_execution(self) -> None:
+        single_flight: SingleFlight[int, str] = SingleFlight()
+        release = asyncio.Event()
+        calls = 0
+
+        async def load() -> str:
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "loaded"
+
+        callers = [asyncio.create_task(single_flight.do(1, load)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+
+        self.assertEqual(await asyncio.gather(*callers), ["loaded"] * 3)
+        self.assertEqual(calls, 1)
+        self.assertEqual(len(single_flight), 0)
+
+    async def test_different_keys_run_separately(self) -> None:
+        single_flight: SingleFlight[int, int] = SingleFlight()
+
+        async def load(value: int) -> int:
+            await asyncio.sleep(0)
+            return value
+
+        results = await asyncio.gather(
+            single_flight.do(1, lambda: load(1)),
+            single_flight.do(2, lambda: load(2)),
+        )
+
+        self.assertEqual(results, [1, 2])
+
+    async def test_exception_is_raised_to_every_caller(self) -> None:
+        single_flight: SingleFlight[int, None] = SingleFlight()
+        release = asyncio.Event()
+
+        async def fail() -> None:
+            await release.wait()
+            raise LookupError
+
+        callers = [asyncio.create_task(single_flight.do(1, fail)) for _ in range(2)]
+        await asyncio.sleep(0)
+        release.set()
+
+        for result in await asyncio.gather(*callers, return_exceptions=True):
+            self.assertIsInstance(result, LookupError)
+        self.assertEqual(len(single_flight), 0)
+
+    async def test_cancelled_caller_does_not_cancel_the_work(self) -> None:
+        single_flight: SingleFlight[int, str] = SingleFlight()
+        release = asyncio.Event()
+
+        async def load() -> str:
+            await release.wait()
+            return "loaded"
+
+        cancelled = asyncio.create_task(single_flight.do(1, load))
+        waiting = asyncio.create_task(single_flight.do(1, load))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        release.set()
+
+        self.assertEqual(await waiting, "loaded")
+        with self.assertRaises(asyncio.CancelledError):
+            await cancelled
+
+
+if __name__ == "__main__":
+    unittest.main()